@@ -40,9 +40,14 @@ class IO_Manager(Application):
         try:
             if use_rez:
                 self.append_rez_env(
-                    ["openpyxl", "openpyxl_image_loader", "ocio2"]
+                    ["openpyxl", "pillow", "ocio2"]
                     )
             tk_desktop_iomanager = self.import_module("app")
+            
+            # set the level of the app's logger, if configured
+            log_level = tk_desktop_iomanager.constants.LOG_LEVEL
+            if log_level:
+                self.logger.setLevel(log_level)
 
             menu_callback = lambda: tk_desktop_iomanager.dialog.show_dialog(self)
             menu_caption = "IO Manager"
@@ -63,22 +68,22 @@ class IO_Manager(Application):
         
         # Get env from rez_packages name
         openpyxl_path = env["REZ_OPENPYXL_ROOT"]
-        openpyxl_image_loader_path = env["REZ_OPENPYXL_IMAGE_LOADER_ROOT"]
+        pillow_path = env["REZ_PILLOW_ROOT"]
         ocio_path = env["OCIO"]
         
         # Check if rez_packages are found
         if not openpyxl_path:
             raise ValueError("Rez Package 'openpyxl' not found")
         
-        if not openpyxl_image_loader_path:
-            raise ValueError("Rez Package 'openpyxl_image_loader' not found")
+        if not pillow_path:
+            raise ValueError("Rez Package 'pillow' not found")
         
         if not ocio_path:
             raise ValueError("Rez Package 'ocio2' not found")
         
         # append PYTHONPATH
         sys.path.append(openpyxl_path)
-        sys.path.append(openpyxl_image_loader_path)
+        sys.path.append(pillow_path)
         
         # set OCIO
         os.environ["OCIO"] = ocio_path
@@ -16,17 +16,27 @@ logger = sgtk.platform.get_logger(__name__)
 
 def cleanup_temp_files(completed_converters: list, cliplib: bool) -> None:
     """
-    Clean up temporary script files.
+    Clean up temporary converter spec files,
+    and their publish directory once it's empty.
     
     Args:
         completed_converters (list): List of completed converters
     """
     import os
+    spec_dirs = set()
     for completed_converter in completed_converters:
+        spec_dirs.add(os.path.dirname(completed_converter))
         if not os.path.exists(completed_converter):
             continue
         
         os.remove(completed_converter)
+    
+    for spec_dir in spec_dirs:
+        try:
+            os.rmdir(spec_dir)
+        except OSError:
+            # the specs of the failed converters are kept
+            pass
         
     if cliplib:
         logger.info("This function is not implemented yet.")
\ No newline at end of file
@@ -26,3 +26,104 @@ COLORSPACE = {
     "ACES - ACES2065-1": "Linear Rec.709 (sRGB)",
     "Linear Rec.709 (sRGB)": "Linear Rec.709 (sRGB)",
 }
+
+# Stream the excel file in read-only mode when loading.
+# Set to False to parse the whole workbook in edit mode.
+EXCEL_READ_ONLY = True
+
+# Number of threads to decode thumbnails, 0 for the CPU count.
+THUMBNAIL_THREADS = 0
+
+# Show a placeholder in the thumbnail cells until they are decoded.
+THUMBNAIL_PLACEHOLDER = True
+
+# Size limit of the thumbnail disk cache in bytes.
+# The cache is stored in the app's cache location, per user.
+THUMBNAIL_CACHE_SIZE = 512 * 1024 * 1024
+
+# Memory budget of the decoded thumbnails in bytes.
+# Thumbnails of the rows scrolled away are dropped first.
+THUMBNAIL_MEMORY_BUDGET = 128 * 1024 * 1024
+
+# Number of version code prefixes in a single 'Version' query.
+# The checked shots are queried in batches of this size.
+VERSION_QUERY_BATCH_SIZE = 50
+
+# Number of 'Version' entities fetched per page of a query.
+VERSION_QUERY_PAGE_SIZE = 500
+
+# Keep a local index of the latest versions in the app's cache location.
+# Only the versions updated since the last validation are fetched.
+# Set to False to query the versions of the checked shots every time.
+VERSION_INDEX = True
+
+# Level of the app's logger, ex) "DEBUG", None to keep the toolkit's level.
+LOG_LEVEL = None
+
+# Log a single summary line with counts and elapsed time per phase
+# for validations and conversions. The per-record lines are debug only.
+LOG_SUMMARY = True
+
+# Number of versions created in a single batch request when publishing.
+PUBLISH_BATCH_SIZE = 50
+
+# Seconds a converted shot waits for others to be published in the same batch.
+# The shots are published when a batch is full or after this delay.
+PUBLISH_FLUSH_INTERVAL = 10.0
+
+# Seconds the dialog waits on close for the publish to record
+# and upload the shots already converted.
+# The converters still running are not published, publish them again.
+PUBLISH_CLOSE_TIMEOUT = 60.0
+
+# Number of movies uploaded at the same time when publishing.
+# Each upload uses its own ShotGrid connection.
+UPLOAD_WORKERS = 4
+
+# Number of retries of a failed upload, and the seconds to wait
+# before the first retry. The wait doubles on every retry.
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF = 2.0
+
+# Number of Nuke processes running at the same time, 0 for the CPU count.
+# Set it to the number of Nuke render licences of the workstation.
+NUKE_MAX_JOBS = 0
+
+# Where the converters run, "local", "pool" or "farm".
+# "local" starts a Nuke process per converter.
+# "pool" runs the converters on persistent Nuke processes, NUKE_MAX_JOBS of them,
+# so Nuke starts once per process instead of once per shot.
+EXECUTION_BACKEND = "local"
+
+# Shared directory of the farm queue, visible from the workstations
+# and the farm nodes. The converter specs of every publish are written
+# in its "specs" directory. The app directory, where the Nuke runner
+# script is, must be visible from the nodes too.
+FARM_QUEUE_DIR = ""
+
+# Seconds between the checks of the farm jobs.
+FARM_POLL_INTERVAL = 5.0
+
+# Seconds a farm job can wait for a node before it's failed, 0 for no limit.
+FARM_PENDING_TIMEOUT = 4 * 3600.0
+
+# Seconds a running farm job can go without a heartbeat of its node
+# before it's failed, as when the node crashed. 0 for no limit.
+FARM_HEARTBEAT_TIMEOUT = 300.0
+
+# Read image sequence plates directly as the source of the converters.
+# Set to False to convert them to a MOV in "mov" next to the plate first.
+READ_SEQUENCE_DIRECTLY = True
+
+# Also write the plate as a MOV in "mov" next to the plate, as a deliverable.
+# It's rendered in the same pass as the other outputs.
+PLATE_MOV_DELIVERABLE = False
+
+# Also write the colored JPG sequence in "jpg" next to the plate,
+# as a deliverable of the MOV to DPX conversion.
+# The colored MOV is rendered directly, it doesn't need the sequence.
+JPG_DELIVERABLE = False
+
+# Number of converters a persistent Nuke process runs before it's restarted,
+# to release the memory Nuke keeps between the jobs. 0 for no limit.
+NUKE_WORKER_MAX_JOBS = 50
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script runs converter job specs in Nuke:
+    nuke -t converter_runner.py spec.json [spec.json ...]
+
+Every spec is built as a single graph, the source is read once
+and every output is rendered in one pass.
+Several specs can be run in the same Nuke session,
+the session is cleared between them.
+The exit code is 1 if any spec failed.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import sys
+import traceback
+
+import nuke
+
+# the runner is started by Nuke, not imported from the app package
+RUNNER_DIR = os.path.dirname(os.path.abspath(__file__))
+if RUNNER_DIR not in sys.path:
+    sys.path.insert(0, RUNNER_DIR)
+from converter_spec import ConverterSpec
+
+
+def set_ocio_color_management() -> None:
+    ocio_config_path = os.environ.get("OCIO")
+    if not ocio_config_path:
+        raise RuntimeError("OCIO is not set.")
+
+    root = nuke.root()
+    root["colorManagement"].setValue("OCIO")
+    root["OCIO_config"].setValue("custom")
+    root["customOCIOConfigPath"].setValue('')
+    root["customOCIOConfigPath"].setValue(ocio_config_path)
+
+
+def make_dirs(path: str) -> None:
+    output_dir = os.path.dirname(path)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+
+def read_source(source) -> tuple:
+    """
+    Create the Read node of the source.
+
+    Returns:
+        tuple: (Read node, first frame, last frame) of the read frames
+    """
+    path, first, last, start_at = source.path, source.first, source.last, source.start_at
+
+    if source.transcode_path:
+        read_node = nuke.createNode("Read")
+        read_node["file"].setValue(path)
+        read_node["first"].setValue(first)
+        read_node["origfirst"].setValue(first)
+        read_node["last"].setValue(last)
+        read_node["origlast"].setValue(last)
+
+        make_dirs(source.transcode_path)
+        write_node = nuke.createNode("Write")
+        write_node["file"].setValue(source.transcode_path)
+        write_node["file_type"].setValue("mov")
+        if source.transcode_codec:
+            write_node["mov64_codec"].setValue(source.transcode_codec)
+        nuke.execute(write_node, first, last)
+
+        # the frames of the converted mov start at 1
+        path, first, last, start_at = source.transcode_path, 1, last - first + 1, None
+
+    read_node = nuke.createNode("Read")
+    read_node["file"].setValue(path)
+    read_node["first"].setValue(first)
+    read_node["origfirst"].setValue(first)
+    read_node["last"].setValue(last)
+    read_node["origlast"].setValue(last)
+    read_node["colorspace"].setValue(source.colorspace)
+
+    if start_at is not None:
+        read_node["frame_mode"].setValue("start at")
+        read_node["frame"].setValue(str(start_at))
+        last = start_at + last - first
+        first = start_at
+
+    return read_node, first, last
+
+
+def retime_source(read_node, retimes: list) -> tuple:
+    """
+    Retime the segments of the source and append them.
+
+    Returns:
+        tuple: (AppendClip node, first frame, last frame)
+    """
+    retime_nodes = []
+    for retime in retimes:
+        retime_node = nuke.createNode("Retime")
+        retime_node.setInput(0, read_node)
+        retime_node["input.first_lock"].setValue("enable")
+        retime_node["input.last_lock"].setValue("enable")
+        retime_node["output.first_lock"].setValue("enable")
+        retime_node["input.first"].setValue(retime.first)
+        retime_node["input.last"].setValue(retime.last)
+        retime_node["output.first"].setValue(1)
+        output_last = (retime.last - retime.first) / retime.speed + 1
+        retime_node["output.last"].setValue(output_last)
+        retime_node["speed"].setValue(retime.speed)
+        retime_nodes.append(retime_node)
+
+    append_clip_node = nuke.createNode("AppendClip")
+    for idx, retime_node in enumerate(retime_nodes):
+        append_clip_node.setInput(idx, retime_node)
+
+    return (
+        append_clip_node,
+        int(append_clip_node["firstFrame"].value()),
+        int(append_clip_node["lastFrame"].value()),
+        )
+
+
+def run_spec(spec: ConverterSpec) -> None:
+    """
+    Build the graph of a spec and render every output in a single pass.
+    """
+    if spec.ocio:
+        set_ocio_color_management()
+
+    read_node, first, last = read_source(spec.source)
+    retimed = (read_node, first, last)
+    if spec.retimes:
+        retimed = retime_source(read_node, spec.retimes)
+
+    write_nodes = []
+    for output in spec.outputs:
+        input_node, output_first, output_last = retimed if output.retimed else (read_node, first, last)
+        make_dirs(output.path)
+
+        write_node = nuke.createNode("Write")
+        write_node.setInput(0, input_node)
+        write_node["file"].setValue(output.path)
+        write_node["file_type"].setValue(output.file_type)
+        if output.codec:
+            write_node["mov64_codec"].setValue(output.codec)
+        write_node["colorspace"].setValue(output.colorspace)
+        # the outputs before and after the retimes have their own frame ranges
+        write_node["use_limit"].setValue(True)
+        write_node["first"].setValue(output_first)
+        write_node["last"].setValue(output_last)
+        write_nodes.append((write_node, output_first, output_last))
+
+    if not write_nodes:
+        return
+    nuke.executeMultiple(
+        [write_node for write_node, _, _ in write_nodes],
+        ((
+            min(output_first for _, output_first, _ in write_nodes),
+            max(output_last for _, _, output_last in write_nodes),
+            1,
+        ),)
+        )
+
+
+def main(spec_paths: list) -> int:
+    """
+    Run the specs one after another in this session.
+
+    Returns:
+        int: 0 if every spec succeeded, 1 otherwise
+    """
+    failed = 0
+    for spec_path in spec_paths:
+        try:
+            spec = ConverterSpec.load(spec_path)
+            print(f"Running {spec.name}: {spec_path}")
+            run_spec(spec)
+        except Exception:
+            traceback.print_exc()
+            failed += 1
+        finally:
+            # remove the nodes and reset the root settings for the next spec
+            nuke.scriptClear()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script defines the job spec of the converters.
+
+A spec describes a conversion as data: the source and its frame range,
+the retimes and the outputs to write. It's written as JSON by
+generate_converter.py and run in Nuke by converter_runner.py,
+so the same runner handles every kind of conversion.
+
+This module doesn't depend on sgtk or Nuke, it's imported on both sides.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import json
+
+
+# version of the spec format, a runner refuses the specs it doesn't know
+SPEC_VERSION = 1
+
+
+class _Spec:
+    """
+    Base of the spec parts, the fields are checked against their types.
+    """
+    # {field: (type, required)}
+    FIELDS = {}
+
+    def __init__(self, **values):
+        name = type(self).__name__
+        for field, (kind, required) in self.FIELDS.items():
+            value = values.pop(field, None)
+            if value is None:
+                if required:
+                    raise ValueError(f"{name}.{field} is required.")
+            elif not isinstance(value, kind):
+                raise ValueError(
+                    f"{name}.{field} must be {kind.__name__}, not {type(value).__name__}."
+                    )
+            setattr(self, field, value)
+        if values:
+            raise ValueError(f"Unknown fields of {name}: {', '.join(sorted(values))}")
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**data)
+
+
+class SourceSpec(_Spec):
+    """
+    The plate read by the converter.
+        first, last     frame range of the file
+        start_at        renumber the frames to start at this frame
+        transcode_path  convert the plate to this MOV first, and read the MOV
+    """
+    FIELDS = {
+        "path": (str, True),
+        "first": (int, True),
+        "last": (int, True),
+        "colorspace": (str, True),
+        "start_at": (int, False),
+        "transcode_path": (str, False),
+        "transcode_codec": (str, False),
+    }
+
+
+class RetimeSpec(_Spec):
+    """
+    A retimed segment of the source, the segments are appended in order.
+    """
+    FIELDS = {
+        "first": (int, True),
+        "duration": (int, True),
+        "percent": (int, True),
+    }
+
+    def __init__(self, **values):
+        _Spec.__init__(self, **values)
+        if self.duration <= 0 or self.percent <= 0:
+            raise ValueError("The retime duration and percent must be positive.")
+
+    @property
+    def last(self) -> int:
+        return self.first + self.duration - 1
+
+    @property
+    def speed(self) -> float:
+        return self.percent / 100
+
+
+class OutputSpec(_Spec):
+    """
+    A file written by the converter.
+        retimed     written after the retimes, otherwise from the source
+    """
+    FIELDS = {
+        "name": (str, True),
+        "path": (str, True),
+        "file_type": (str, True),
+        "colorspace": (str, True),
+        "codec": (str, False),
+        "retimed": (bool, False),
+    }
+
+
+class ConverterSpec:
+    """
+    Job spec of a converter.
+    """
+    def __init__(
+        self,
+        name: str,
+        source: SourceSpec,
+        outputs: list,
+        retimes: list = None,
+        ocio: bool = True
+        ):
+        """
+        Args:
+            name (str): name of the job, for the logs
+            source (SourceSpec): the plate to read
+            outputs (list): [OutputSpec] files to write
+            retimes (list): [RetimeSpec] segments of the retimed outputs
+            ocio (bool): whether to use the OCIO config of $OCIO
+        """
+        self.name = name
+        self.source = source
+        self.outputs = outputs
+        self.retimes = retimes or []
+        self.ocio = ocio
+
+    def to_dict(self) -> dict:
+        return {
+            "spec_version": SPEC_VERSION,
+            "name": self.name,
+            "ocio": self.ocio,
+            "source": self.source.to_dict(),
+            "retimes": [retime.to_dict() for retime in self.retimes],
+            "outputs": [output.to_dict() for output in self.outputs],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConverterSpec":
+        if data.get("spec_version") != SPEC_VERSION:
+            raise ValueError(f"Unsupported spec version: {data.get('spec_version')}")
+        return cls(
+            data["name"],
+            SourceSpec.from_dict(data["source"]),
+            [OutputSpec.from_dict(output) for output in data["outputs"]],
+            [RetimeSpec.from_dict(retime) for retime in data.get("retimes", [])],
+            data.get("ocio", True),
+            )
+
+    def save(self, path: str) -> None:
+        # sorted and indented, so the specs of two runs can be diffed
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> "ConverterSpec":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
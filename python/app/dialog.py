@@ -11,7 +11,6 @@ __github__ = "https://github.com/junopark00"
 
 import os
 import sys
-import shutil
 import importlib
 from collections import defaultdict
 
@@ -19,9 +18,34 @@ import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 
 from .ui.dialog import Ui_Dialog
-from .excel_manager import ExcelManager
+from .constants import (
+    EXCEL_READ_ONLY,
+    PUBLISH_CLOSE_TIMEOUT,
+    THUMBNAIL_CACHE_SIZE,
+    THUMBNAIL_MEMORY_BUDGET,
+    THUMBNAIL_PLACEHOLDER,
+    THUMBNAIL_THREADS,
+    VERSION_INDEX,
+    )
+from .excel_manager import ColumnStore, ExcelManager
+from .table_model import ExcelTableModel
+from .thumbnails import (
+    ThumbnailCache,
+    ThumbnailDelegate,
+    ThumbnailDiskCache,
+    ThumbnailLoader,
+    )
+from .workers import (
+    LoadExcelThread,
+    PublishThread,
+    RefreshVersionIndexThread,
+    SaveExcelThread,
+    )
 from .generate_converter import GenerateConverter
 from .validate_version import ValidateVersion
+from .log_summary import LogSummary
+from .version_index import VersionIndex
+from .version_query import find_versions, version_code_prefix
 from .validate_src_version import ValidateSrcVersion
 from .validate_timecode import ValidateTimecode
 from .validate_shot_for_editorial import ValidateShotForEditorial
@@ -44,6 +68,9 @@ importlib.reload(cleanup)
 # Set standard sgtk logger
 logger = sgtk.platform.get_logger(__name__)
 
+# worker threads still running after their dialog was closed
+_detached_threads = []
+
 def show_dialog(app_instance):
     """
     Shows the main dialog window.
@@ -78,6 +105,10 @@ class AppDialog(QtGui.QWidget):
         self._thumnbail_column = 1
         self._version_column = 5
         
+        # set table model
+        self._table_model = ExcelTableModel(self._check_column, self)
+        self.ui.table_view.setModel(self._table_model)
+        
         # set variables
         self._app = sgtk.platform.current_bundle()
         self._sg = self._app.shotgun
@@ -86,21 +117,49 @@ class AppDialog(QtGui.QWidget):
         self.colorspace = ""
         self.checked_data = {}
         self._excel_manager = ExcelManager()
+        self._load_thread = None
+        self._save_thread = None
+        self._publish_thread = None
+        self._version_index = None
+        self._version_index_thread = None
+        self._validate_pending = False
+        self._on_validated = None
+        self._save_version_up = False
+        self._queued_save = None
         self._current_dir = os.path.dirname(__file__)
-        self._temp_images = os.path.join(self._current_dir, ".temp_images")
+        self._thumbnail_cache = ThumbnailCache(THUMBNAIL_MEMORY_BUDGET)
+        self._thumbnail_loader = ThumbnailLoader(
+            self._thumbnail_cache,
+            disk_cache=ThumbnailDiskCache(
+                os.path.join(self._app.cache_location, "thumbnails"),
+                THUMBNAIL_CACHE_SIZE
+                ),
+            max_threads=THUMBNAIL_THREADS,
+            placeholder=THUMBNAIL_PLACEHOLDER,
+            parent=self
+            )
+        self._thumbnail_loader.thumbnail_ready.connect(
+            self._table_model.thumbnail_changed
+            )
+        self.ui.table_view.setItemDelegate(
+            ThumbnailDelegate(self._thumbnail_loader, self)
+            )
         self._validate_version = ValidateVersion([], {}, "")
         self._validate_src_version = ValidateSrcVersion()
         self._validate_timecode = ValidateTimecode()
         self._validate_shot_for_editorial = ValidateShotForEditorial()
         self._generate_converter = GenerateConverter({}, False, False, "", "")
         self._collect = Collect()
-        self._publish = Publish([], "")
         self._cleanup = cleanup
         
         # set flags and connections
         self.__flags()
         self.__connections()
         
+        # the first sync of the version index runs while the user works
+        if VERSION_INDEX:
+            self.refresh_version_index()
+        
     def __flags(self) -> None:
         """
         Set flags for the app.
@@ -113,11 +172,12 @@ class AppDialog(QtGui.QWidget):
         """
         self.ui.button_select_path.clicked.connect(self.select_excel)
         self.ui.button_load_path.clicked.connect(self.load_excel)
+        self.ui.button_cancel_load.clicked.connect(self.cancel_load)
         self.ui.button_check_all.clicked.connect(self.check_all)
         self.ui.button_uncheck_all.clicked.connect(self.uncheck_all)
         self.ui.button_excel_save.clicked.connect(lambda: self.save_excel(True))
         self.ui.button_excel_edit.clicked.connect(lambda: self.save_excel(False))
-        self.ui.button_validate_version.clicked.connect(self.validate_version)
+        self.ui.button_validate_version.clicked.connect(lambda: self.validate_version())
         self.ui.button_validate_src_version.clicked.connect(self.validate_src_version)
         self.ui.button_validate_timecode.clicked.connect(self.validate_timecode)
         self.ui.button_validate_shot_for_editorial.clicked.connect(self.validate_shot_for_editorial)
@@ -167,7 +227,7 @@ class AppDialog(QtGui.QWidget):
     def load_excel(self) -> None:
         """
         When the load button is clicked, this method is called.
-        It loads the Excel file and displays the data in the table widget.
+        It loads the Excel file and displays the data in the table.
         """
         if not self.ui.line_edit_path.text():
             logger.error("No Excel file selected.")
@@ -187,98 +247,174 @@ class AppDialog(QtGui.QWidget):
                 )
             return
         
-        # If the Excel file is already loaded, clear the table widget
+        if self._save_thread is not None:
+            logger.warning("Excel file is being saved.")
+            QtGui.QMessageBox.warning(
+                self, 
+                "Warning", 
+                "Excel file is being saved. Load it again when the save is done."
+                )
+            return
+        
+        # If a load is already running, stop it first
+        self.cancel_load()
+        self._thumbnail_loader.cancel()
+        
+        # If the Excel file is already loaded, clear the table
         if self.excel_loaded:
-            self.ui.table_widget.clear()
+            self._table_model.clear()
             self.excel_loaded = False
             
         logger.info("Loading Excel file: %s" % self._excel_path)
         
-        # Load the Excel file
-        self._excel_manager.load_excel(self._excel_path)
+        # Load the Excel file in the background
+        self._load_thread = LoadExcelThread(
+            self._excel_manager, self._excel_path, EXCEL_READ_ONLY, parent=self
+            )
+        self._load_thread.header_loaded.connect(self.on_header_loaded)
+        self._load_thread.rows_loaded.connect(self.on_rows_loaded)
+        self._load_thread.progress.connect(self.on_load_progress)
+        self._load_thread.layout_loaded.connect(self.update_layout_from_excel)
+        self._load_thread.images_loaded.connect(self.update_thumbnails_from_excel)
+        self._load_thread.load_finished.connect(self.on_load_finished)
+        self._load_thread.load_failed.connect(self.on_load_failed)
+        
+        self.ui.progress_bar_load.setRange(0, 0)
+        self.ui.progress_bar_load.setVisible(True)
+        self.ui.button_cancel_load.setVisible(True)
+        self.ui.button_load_path.setEnabled(False)
+        self._load_thread.start()
+    
+    def cancel_load(self) -> None:
+        """
+        When the cancel button is clicked, this method is called.
+        It stops the running load and clears the partially loaded table.
+        """
+        if self._load_thread is None:
+            return
+        
+        logger.info("Canceling Excel load")
+        self._load_thread.cancel()
+        self._load_thread.wait()
+        self._load_thread = None
+        
+        self._table_model.clear()
+        self.excel_loaded = False
+        self._finish_load_ui()
+        
+    def _is_current_load(self) -> bool:
+        """
+        Check if the signal comes from the running load.
+        Signals of a canceled load can still be queued and must be ignored.
+        """
+        return self._load_thread is not None and self.sender() is self._load_thread
+        
+    def on_header_loaded(self, header_labels: list) -> None:
+        """
+        Reset the table with the header labels of the loading file.
+        """
+        if not self._is_current_load():
+            return
+        self._table_model.set_sheet(header_labels, ColumnStore())
+        
+    def on_rows_loaded(self, rows: list) -> None:
+        """
+        Append a batch of loaded rows to the table.
+        """
+        if not self._is_current_load():
+            return
+        self._table_model.append_rows(rows)
+        
+    def on_load_progress(self, loaded: int, total: int) -> None:
+        """
+        Update the progress bar with the number of loaded rows.
+        """
+        if not self._is_current_load():
+            return
+        self.ui.progress_bar_load.setRange(0, total)
+        self.ui.progress_bar_load.setValue(loaded)
         
-        # Update the UI with the loaded data
-        self.update_ui_from_excel()
+    def on_load_finished(self, snapshot) -> None:
+        """
+        Called when every row, the layout and the images are loaded.
+        """
+        if not self._is_current_load():
+            return
+        self._excel_manager.snapshot = snapshot
+        self._load_thread = None
+        self._finish_load_ui()
         
         # Set the flag to True
         self.excel_loaded = True
         self.ui.label_excel_path.setText(self._excel_path)
-    
-    def update_ui_from_excel(self) -> None:
+        
+    def on_load_failed(self, message: str) -> None:
         """
-        Update the UI with the loaded data.
+        Called when the load raised an error.
         """
-        logger.debug("Updating UI from Excel")
-        # Get data from excel manager
-        row_heights = self._excel_manager.row_heights
-        column_widths = self._excel_manager.column_widths
-        header_labels = self._excel_manager.header_labels
-        cell_values = self._excel_manager.cell_values
-        thumbnails = self._excel_manager.loaded_images
+        if not self._is_current_load():
+            return
+        self._load_thread = None
+        self._table_model.clear()
+        self._finish_load_ui()
+        QtGui.QMessageBox.critical(
+            self, 
+            "Error", 
+            "Failed to load Excel file.\n%s" % message
+            )
         
-        # Set row and column count
-        self.ui.table_widget.setRowCount(max(row_heights.keys()) - 1)
-        self.ui.table_widget.setColumnCount(max(column_widths.keys()))
-        self.ui.table_widget.setHorizontalHeaderLabels(header_labels)
+    def _finish_load_ui(self) -> None:
+        if self._publish_thread is None:
+            self.ui.progress_bar_load.setVisible(False)
+        self.ui.button_cancel_load.setVisible(False)
+        self.ui.button_load_path.setEnabled(True)
+    
+    def update_layout_from_excel(self, row_heights: dict, column_widths: dict) -> None:
+        """
+        Update the row heights and column widths with the loaded layout.
+        """
+        if not self._is_current_load():
+            return
+        logger.debug("Updating layout from Excel")
+        table_view = self.ui.table_view
         
         # Set row heights
-        for row, height in row_heights.items():
-            # data starts from row 2, so subtract 2
-            # Set the row height to 1.6 times the original height
-            self.ui.table_widget.setRowHeight(row - 2, height*1.6)
+        # Set the row height to 1.6 times the original height
+        heights = set(row_heights.values())
+        if len(heights) == 1 and None not in heights:
+            # every row has the same height, set it once for all rows
+            table_view.verticalHeader().setDefaultSectionSize(int(heights.pop()*1.6))
+        else:
+            for row, height in row_heights.items():
+                if height is None:
+                    continue
+                # data starts from row 2, so subtract 2
+                table_view.setRowHeight(row - 2, height*1.6)
             
         # Set column widths
         for column, width in column_widths.items():
             # data starts from column 1, so subtract 1
             # Set the column width to 9 times the original width
-            self.ui.table_widget.setColumnWidth(column - 1, width*9)
-            
-        # Set cell values
-        for (row, column), value in cell_values.items():
-            item = QtGui.QTableWidgetItem(value)
-            # skip the header row
-            self.ui.table_widget.setItem(row - 1, column, item)
-                
-        # Set the first column to be checkable only
-        for row in range(self.ui.table_widget.rowCount()):
-            item = self.ui.table_widget.item(row, self._check_column)
-            if item:
-                item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
-                item.setCheckState(QtCore.Qt.Unchecked)
-        
-        # Set thumbnail column
-        for image_path in thumbnails:
-            # parse the image path to get the row and column
-            # ex) {self.temp_dir}/{row}_{column}.png
-            filename = os.path.splitext(os.path.basename(image_path))[0]
-            row, column = filename.split("_")
-            q_image = QtGui.QImage(image_path)
-            pixmap = QtGui.QPixmap.fromImage(q_image)
-
-            # Get the current cell size
-            cell_width = self.ui.table_widget.columnWidth(int(column) - 1)
-            cell_height = self.ui.table_widget.rowHeight(int(row) - 2)
-
-            # Scale the pixmap to fit the cell size, 
-            # preserving the aspect ratio
-            scaled_pixmap = pixmap.scaled(
-                cell_width, 
-                cell_height, 
-                QtCore.Qt.KeepAspectRatio, 
-                QtCore.Qt.SmoothTransformation
-                )
-
-            item = QtGui.QTableWidgetItem()
-            item.setData(QtCore.Qt.DecorationRole, scaled_pixmap)
-            item.setFlags(QtCore.Qt.ItemIsEnabled)
-            self.ui.table_widget.setItem(
-                int(row) - 2, int(column) - 1, item
-                )
+            table_view.setColumnWidth(column - 1, width*9)
+    
+    def update_thumbnails_from_excel(self, thumbnails: list) -> None:
+        """
+        Update the thumbnail cells with the loaded images.
+        """
+        if not self._is_current_load():
+            return
+        logger.debug("Updating thumbnails from Excel")
         
-        # Resize the row to fit the content
-        self.ui.table_widget.resizeRowsToContents()
+        # Set thumbnail images, they are read and decoded when their row is painted
+        # row and column of the images are 1-based excel positions,
+        # and images in the header row are skipped
+        self._table_model.set_images(self._excel_path, [
+            (row - 2, column - 1, digest, media_path)
+            for row, column, digest, media_path in thumbnails
+            if row >= 2
+            ])
         
-        logger.debug("UI updated from Excel")
+        logger.debug("Thumbnails updated from Excel")
     
     def check_all(self) -> None:
         """
@@ -296,10 +432,7 @@ class AppDialog(QtGui.QWidget):
         
         logger.debug("Checking all rows")
         
-        for row in range(self.ui.table_widget.rowCount()):
-            item = self.ui.table_widget.item(row, self._check_column)
-            if item:
-                item.setCheckState(QtCore.Qt.Checked)
+        self._table_model.set_all_checked(True)
                 
     def uncheck_all(self) -> None:
         """
@@ -317,10 +450,7 @@ class AppDialog(QtGui.QWidget):
         
         logger.debug("Unchecking all rows")
         
-        for row in range(self.ui.table_widget.rowCount()):
-            item = self.ui.table_widget.item(row, self._check_column)
-            if item:
-                item.setCheckState(QtCore.Qt.Unchecked)
+        self._table_model.set_all_checked(False)
                 
     def save_excel(self, version_up: bool) -> None:
         """
@@ -345,6 +475,16 @@ class AppDialog(QtGui.QWidget):
                 )
             return
         
+        changed_cells = self._table_model.changed_cells()
+        if not changed_cells and not version_up:
+            logger.info("No changes to save.")
+            QtGui.QMessageBox.information(
+                self, 
+                "Overwrite", 
+                "No changes to save."
+                )
+            return
+        
         if version_up:
             confirm = QtGui.QMessageBox.question(
                 self, 
@@ -361,61 +501,160 @@ class AppDialog(QtGui.QWidget):
                 )
         
         if confirm == QtGui.QMessageBox.Yes:
-            logger.debug("Saving Excel file: %s" % self._excel_path)
-            
-            # Get table widget data
-            header_data, cell_data = self.get_table_data()
-            saved_path = self._excel_manager.save_excel(
-                header_data, 
-                cell_data, 
-                self._excel_path, 
-                version_up
-                )
-            QtGui.QMessageBox.information(
-                self, 
-                "Saved", 
-                "Excel file saved to %s" % saved_path
-                )
-            logger.debug("Excel file saved to %s" % saved_path)
+            self.start_save(version_up)
         else:
             logger.debug("Save canceled.")
+    
+    def start_save(self, version_up: bool, full: bool = False) -> None:
+        """
+        Save the Excel file in the background.
+        The table stays editable, the cells edited during the save
+        are kept as changed for the next save.
+        If a save is already running, this one runs after it.
+        
+        Args:
+            version_up (bool): whether to save as a new version
+            full (bool): whether to write the whole table
+                instead of the changed cells
+        """
+        if self._save_thread is not None:
+            logger.info("Excel file is being saved, the save is queued.")
+            self._queued_save = version_up
+            return
+        
+        logger.debug("Saving Excel file: %s" % self._excel_path)
+        
+        # Write only the cells changed until now
+        changed_cells = self._table_model.changed_cells()
+        table_data = self.get_table_data() if full else None
+        
+        self._save_version_up = version_up
+        self._save_thread = SaveExcelThread(
+            self._excel_manager, 
+            self._excel_path, 
+            version_up, 
+            changed_cells=changed_cells, 
+            table_data=table_data, 
+            parent=self
+            )
+        self._save_thread.save_finished.connect(self.on_save_finished)
+        self._save_thread.patch_failed.connect(self.on_save_patch_failed)
+        self._save_thread.save_failed.connect(self.on_save_failed)
+        self._save_thread.start()
+        
+    def on_save_finished(
+        self, 
+        saved_path: str, 
+        saved_cells: dict, 
+        saved_images: list
+        ) -> None:
+        """
+        Called when the Excel file is saved.
+        saved_images is None if the file was patched and its images are unchanged.
+        """
+        self._save_thread = None
+        self._table_model.clear_changed_cells(saved_cells)
+        logger.debug("Excel file saved to %s" % saved_path)
+        
+        # the changes are patched into the saved file from now on,
+        # it holds every change saved so far
+        if saved_path != self._excel_path:
+            self._excel_path = saved_path
+            self.ui.line_edit_path.setText(saved_path)
+            self.ui.label_excel_path.setText(saved_path)
+        
+        # the images are read from the saved file from now on,
+        # a full save stores them under new members
+        if saved_images is not None:
+            self._excel_manager.snapshot.images = [
+                image for image in saved_images if image[0] < 2
+                ]
+            saved_images = [
+                (row - 2, column - 1, media_path)
+                for row, column, media_path in saved_images
+                if row >= 2
+                ]
+        self._table_model.set_image_source(saved_path, saved_images)
+        
+        QtGui.QMessageBox.information(
+            self, 
+            "Saved", 
+            "Excel file saved to %s" % saved_path
+            )
+        self._start_queued_save()
+        
+    def on_save_patch_failed(self, message: str) -> None:
+        """
+        Called when the sheet can't be patched, write the whole table instead.
+        """
+        logger.warning("Failed to patch Excel file, saving all cells: %s" % message)
+        self._save_thread = None
+        self.start_save(self._save_version_up, full=True)
+        
+    def on_save_failed(self, message: str) -> None:
+        """
+        Called when the save raised an error. The original file is untouched.
+        """
+        self._save_thread = None
+        QtGui.QMessageBox.critical(
+            self, 
+            "Error", 
+            "Failed to save Excel file.\n%s" % message
+            )
+        self._start_queued_save()
+        
+    def _start_queued_save(self) -> None:
+        if self._queued_save is None:
+            return
+        version_up = self._queued_save
+        self._queued_save = None
+        
+        # the running save may have written every change already
+        if not version_up and not self._table_model.changed_cells():
+            logger.debug("No changes left to save.")
+            return
+        self.start_save(version_up)
             
-    def get_table_data(self) -> dict:
+    def get_table_data(self) -> tuple:
         """
-        Get the data from the table widget.
+        Get the data from the table model.
         
         Returns:
-            dict: Dictionary of cell values
+            tuple: (header data, cell values, images at excel positions)
         """
         logger.debug("Getting table data")
         
-        header_data = []
-        cell_data = []
-        
         # Get header labels as the first row
-        for column in range(self.ui.table_widget.columnCount()):
-            header_item = self.ui.table_widget.horizontalHeaderItem(column)
-            header_data.append(header_item.text())
+        header_data = self._table_model.header_labels()
             
         # Get cell values
-        for row in range(self.ui.table_widget.rowCount()):
-            row_data = []
-            for column in range(self.ui.table_widget.columnCount()):
-                item = self.ui.table_widget.item(row, column)
-                if item:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            cell_data.append(row_data)
+        cell_data = [
+            self._table_model.row_values(row)
+            for row in range(self._table_model.rowCount())
+            ]
+        
+        # the image bytes are read from the excel file when it's saved
+        images = [
+            (row + 2, column + 1, media_path)
+            for row, column, media_path in self._table_model.images()
+            ]
         
         logger.debug("Table data retrieved")
         
-        return header_data, cell_data
+        return header_data, cell_data, images
 
-    def validate_version(self) -> None:
+    def validate_version(self, on_validated=None) -> None:
         """
         When the validate version button is clicked, this method is called.
         It gets the version from the 'Version' entity and updates UI.
+        
+        The validation can finish later, once the version index is refreshed,
+        so the callers that need the validated versions pass on_validated.
+        
+        Args:
+            on_validated (callable): called as on_validated(validated)
+                when the validation is finished, validated is False
+                if the versions couldn't be validated
         """
         if not self.excel_loaded:
             logger.error("No Excel file loaded.")
@@ -424,34 +663,13 @@ class AppDialog(QtGui.QWidget):
                 "Error", 
                 "No Excel file loaded."
                 )
+            if on_validated is not None:
+                on_validated(False)
             return
         
         self.checked_data = self.get_checked_data()
         self.colorspace = self.ui.comboBox_colorspace.currentText()
         
-        # get the 'Version' entity data from ShotGrid
-        try:
-            entity_type = "Version"
-            filters = [["project", "is", self._app.context.project]]
-            fields = ["code"]
-            sg_data = self._sg.find(entity_type, filters, fields)
-        except Exception as e:
-            logger.error("Failed to get ShotGrid data: %s" % e)
-            QtGui.QMessageBox.critical(
-                self, 
-                "Error", 
-                "Failed to get ShotGrid data."
-                )
-            return
-        
-        # if no data found, set version to 1
-        if not sg_data:
-            logger.info("ShotGrid 'Version' entity's 'code' field not found.")
-            for row in self.checked_data.keys():
-                self.ui.table_widget.item(row, self._version_column).setText("1")
-                self.ui.table_widget.item(row, self._version_column).setSelected(True)
-            return
-        
         # check if the checked data is empty
         if not self.checked_data:
             logger.error("No data checked")
@@ -460,44 +678,210 @@ class AppDialog(QtGui.QWidget):
                 "Error", 
                 "No data checked."
                 )
+            if on_validated is not None:
+                on_validated(False)
             return
         
+        if self._validate_pending:
+            logger.info("Waiting for the version index to validate the versions")
+            if on_validated is not None:
+                self._on_validated = on_validated
+            return
+        
+        if VERSION_INDEX and self.is_version_index_synced():
+            # answered by the index once the latest versions are fetched
+            self._validate_pending = True
+            self._on_validated = on_validated
+            self.refresh_version_index()
+            return
+        
+        if VERSION_INDEX:
+            # the first sync pages every version of the project,
+            # the checked shots are queried until it's finished
+            self.refresh_version_index()
+        self.finish_validate_version(False, on_validated)
+        
+    def finish_validate_version(self, use_index: bool, on_validated=None) -> None:
+        """
+        Validate the versions of the checked data and update the UI.
+        
+        Args:
+            use_index (bool): whether to get the latest versions
+                from the version index instead of ShotGrid
+            on_validated (callable): called as on_validated(validated)
+                when the validation is finished
+        """
+        summary = LogSummary(logger, "Validate version")
+        
+        # get the latest versions from the local index
+        latest_versions = None
+        if use_index:
+            with summary.phase("index"):
+                latest_versions = self.get_indexed_versions([
+                    (data["shot_name"], self.colorspace, data["type"])
+                    for data in self.checked_data.values()
+                    ])
+        
+        sg_data = []
+        if latest_versions is None:
+            # get the 'Version' entities of the checked shots from ShotGrid
+            prefixes = [
+                version_code_prefix(data["shot_name"], self.colorspace, data["type"])
+                for data in self.checked_data.values()
+                ]
+            try:
+                with summary.phase("query"):
+                    sg_data = find_versions(
+                        self._sg, self._app.context.project, prefixes
+                        )
+            except Exception as e:
+                logger.error("Failed to get ShotGrid data: %s", e)
+                QtGui.QMessageBox.critical(
+                    self, 
+                    "Error", 
+                    "Failed to get ShotGrid data."
+                    )
+                if on_validated is not None:
+                    on_validated(False)
+                return
+            
+            # if no data found, the versions start from 1
+            if not sg_data:
+                logger.info("No 'Version' entity found for the checked shots.")
+        
         # validate the version
-        logger.debug("Validating version")
-        version = ValidateVersion(
-            sg_data, self.checked_data, self.colorspace
-            ).validated_version
+        validator = ValidateVersion(
+            sg_data, self.checked_data, self.colorspace, latest_versions, summary
+            )
+        validated = validator.validated_version
+        if validator.malformed_codes:
+            logger.warning(
+                "%d version codes don't follow the naming, ignored: %s",
+                len(validator.malformed_codes),
+                ", ".join(map(str, validator.malformed_codes[:10]))
+                )
         
         # update the UI with the validated version
-        for row, version in version.items():
-            self.ui.table_widget.item(row, self._version_column).setText(str(version))
-            self.ui.table_widget.item(row, self._version_column).setSelected(True)
+        with summary.phase("update"):
+            for row, new_version in validated.items():
+                self.set_version(row, new_version)
         
+        summary.log()
         logger.debug("Version validated")
+        if on_validated is not None:
+            on_validated(True)
+        
+    def refresh_version_index(self) -> None:
+        """
+        Fetch the latest versions into the local version index
+        in the background, unless a refresh is already running.
+        """
+        if self._version_index_thread is not None:
+            return
+        
+        try:
+            if self._version_index is None:
+                self._version_index = VersionIndex(
+                    os.path.join(self._app.cache_location, "version_index.db")
+                    )
+        except Exception as e:
+            logger.warning("Failed to open the version index: %s" % e)
+            self.on_version_index_failed(str(e))
+            return
+        
+        self._version_index_thread = RefreshVersionIndexThread(
+            self._version_index, self._app.context.project, self
+            )
+        self._version_index_thread.refresh_finished.connect(
+            self.on_version_index_refreshed
+            )
+        self._version_index_thread.refresh_failed.connect(
+            self.on_version_index_failed
+            )
+        self._version_index_thread.start()
+        
+    def on_version_index_refreshed(self, count: int) -> None:
+        """
+        Called when the version index is refreshed.
+        """
+        self._version_index_thread = None
+        if self._validate_pending:
+            self._validate_pending = False
+            on_validated, self._on_validated = self._on_validated, None
+            self.finish_validate_version(True, on_validated)
+        
+    def on_version_index_failed(self, message: str) -> None:
+        """
+        Called when the version index can't be refreshed,
+        the versions are queried from ShotGrid instead.
+        """
+        self._version_index_thread = None
+        if self._validate_pending:
+            self._validate_pending = False
+            on_validated, self._on_validated = self._on_validated, None
+            self.finish_validate_version(False, on_validated)
+        
+    def is_version_index_synced(self) -> bool:
+        """
+        Whether the version index has finished a full sync of the project.
+        """
+        if self._version_index is None:
+            return False
+        try:
+            return self._version_index.last_sync(self._app.context.project["id"]) is not None
+        except Exception as e:
+            logger.warning("Failed to use the version index: %s" % e)
+            return False
+        
+    def get_indexed_versions(self, keys: list) -> dict:
+        """
+        Get the latest versions from the local version index.
+        
+        Args:
+            keys (list): [(seq_shot_name, colorspace, type)]
+            
+        Returns:
+            dict: {(seq_shot_name, colorspace, type): latest version},
+                None if the index can't be used
+        """
+        try:
+            return self._version_index.latest_versions(
+                self._app.context.project["id"], keys
+                )
+        except Exception as e:
+            logger.warning("Failed to use the version index: %s" % e)
+            return None
+        
+    def set_version(self, row: int, version: int) -> None:
+        """
+        Set the version of the row and select the cell.
+        
+        Args:
+            row (int): row of the table
+            version (int): version to set
+        """
+        self._table_model.set_text(row, self._version_column, str(version))
+        self.ui.table_view.selectionModel().select(
+            self._table_model.index(row, self._version_column),
+            QtCore.QItemSelectionModel.Select
+            )
 
     def get_checked_data(self) -> dict:
         """
-        Get the checked data from the table widget.
+        Get the checked data from the table model.
         
         Returns:
             dict: Dictionary of checked data
         """
         logger.debug("Getting checked data")
         
-        checked_rows = []
-        for row in range(self.ui.table_widget.rowCount()):
-            item = self.ui.table_widget.item(row, 0)
-            if item and item.checkState() == QtCore.Qt.Checked:
-                checked_rows.append(row)
+        header_labels = self._table_model.header_labels()
         
         checked_data = {}
-        for row in checked_rows:
-            row_data = {}
-            for column in range(self.ui.table_widget.columnCount()):
-                item = self.ui.table_widget.item(row, column)
-                column_name = self.ui.table_widget.horizontalHeaderItem(column).text()
-                row_data[column_name] = item.text()
-            checked_data[row] = row_data
+        for row in self._table_model.checked_rows():
+            checked_data[row] = dict(
+                zip(header_labels, self._table_model.row_values(row))
+                )
         
         logger.debug("Checked data retrieved")
         
@@ -583,40 +967,120 @@ class AppDialog(QtGui.QWidget):
                 )
             return
         
+        if self._publish_thread is not None:
+            logger.warning("Publish is already running.")
+            return
+        
         # set data
         self.checked_data = self.get_checked_data()
         self.grouped_data = self.group_data(self.checked_data)
         self.colorspace = self.ui.comboBox_colorspace.currentText()
         
-        # validate data
+        # validate data, the publish goes on once the versions are validated
         logger.debug("Validating data")
-        self.validate_version()
+        self.ui.button_publish.setEnabled(False)
+        self.validate_version(self._publish_validated)
+        
+    def _publish_validated(self, validated: bool) -> None:
+        """
+        Continue the publish once the versions are validated.
+        
+        Args:
+            validated (bool): whether the versions were validated
+        """
+        if not validated:
+            logger.error("Publish canceled, the versions were not validated.")
+            self.ui.button_publish.setEnabled(True)
+            return
+        
+        # the validated versions are in the table now
+        self.checked_data = self.get_checked_data()
+        self.grouped_data = self.group_data(self.checked_data)
+        
         self.validate_timecode()
         self.validate_src_version()
         self.validate_shot_for_editorial()
         
+        if not self.grouped_data:
+            logger.error("No data to publish")
+            QtGui.QMessageBox.critical(
+                self, 
+                "Error", 
+                "No data to publish."
+                )
+            self.ui.button_publish.setEnabled(True)
+            return
+        
         # generate converter
         logger.debug("Generating converter")
         converters = self.generate_converter()
         logger.debug("Converters: %s" % converters)
+        if not converters:
+            self.ui.button_publish.setEnabled(True)
+            return
+        
+        # start the longest shots first, so the last jobs are short ones
+        priorities = {}
+        for converter, data in zip(converters, self.grouped_data):
+            try:
+                priorities[converter] = int(data["duration"])
+            except (KeyError, TypeError, ValueError):
+                priorities[converter] = 0
         
-        # execute converter
+        # execute converter in the background,
+        # each shot is published as soon as its conversion is completed
         logger.debug("Executing converter")
-        completed_converter = self._generate_converter.execute(converters)
-        logger.debug("Completed converter: %s" % completed_converter)
-
-        # publish data
-        self.publish_to_shotgrid()
+        self._publish_thread = PublishThread(
+            self._generate_converter,
+            converters,
+            self.grouped_data,
+            self.colorspace,
+            priorities,
+            self.ui.checkbox_cliplib.isChecked(),
+            parent=self
+            )
+        self._publish_thread.shot_completed.connect(self.on_shot_completed)
+        self._publish_thread.publish_finished.connect(self.on_publish_finished)
+        self._publish_thread.publish_failed.connect(self.on_publish_failed)
         
-        # cleanup
-        logger.debug("Cleaning up")
-        if self.ui.checkbox_cliplib.isChecked():
-            self._cleanup.cleanup_temp_files(completed_converter, True)
-        else:
-            self._cleanup.cleanup_temp_files(completed_converter, False)
-        logger.debug("Cleaned up")
+        self.ui.button_publish.setEnabled(False)
+        self.ui.progress_bar_load.setRange(0, len(converters))
+        self.ui.progress_bar_load.setValue(0)
+        self.ui.progress_bar_load.setVisible(True)
+        self._publish_thread.start()
+        
+    def on_shot_completed(self, completed: int, total: int) -> None:
+        """
+        Update the progress bar with the number of published shots.
+        """
+        self.ui.progress_bar_load.setRange(0, total)
+        self.ui.progress_bar_load.setValue(completed)
+    
+    def on_publish_finished(self, completed_converter: list) -> None:
+        """
+        Called when every converter is done and the uploads are finished.
+        """
+        logger.debug("Completed converter: %s" % completed_converter)
+        self._finish_publish_ui()
         
         logger.info("Publish completed")
+        
+    def on_publish_failed(self, message: str) -> None:
+        """
+        Called when the publish raised an error.
+        """
+        self._finish_publish_ui()
+        QtGui.QMessageBox.critical(
+            self, 
+            "Error", 
+            "Failed to publish.\n%s" % message
+            )
+        
+    def _finish_publish_ui(self) -> None:
+        self._publish_thread = None
+        self.ui.button_publish.setEnabled(True)
+        if self._load_thread is None:
+            self.ui.progress_bar_load.setVisible(False)
     
     def generate_converter(self):
         """
@@ -648,7 +1112,18 @@ class AppDialog(QtGui.QWidget):
                 )
             return
 
-        script_paths = []
+        try:
+            spec_dir = GenerateConverter.create_spec_dir()
+        except (OSError, ValueError) as e:
+            logger.error("Failed to create the converter directory: %s" % e)
+            QtGui.QMessageBox.critical(
+                self, 
+                "Error", 
+                f"Failed to create the converter directory.\n{e}"
+                )
+            return
+        
+        spec_paths = []
         for data in self.grouped_data:
             # check if retime info in the data
             # if exists, apply retime = True
@@ -664,10 +1139,22 @@ class AppDialog(QtGui.QWidget):
                 data, mov_to_dpx, apply_retime, self.colorspace, codec
                 )
             self._generate_converter.set_data()
-            script_path = self._generate_converter.generate()
-            script_paths.append(script_path)
+            try:
+                spec_path = self._generate_converter.generate(spec_dir)
+            except ValueError as e:
+                logger.error("Failed to generate converter: %s" % e)
+                self._cleanup.cleanup_temp_files(spec_paths, False)
+                if not spec_paths:
+                    os.rmdir(spec_dir)
+                QtGui.QMessageBox.critical(
+                    self, 
+                    "Error", 
+                    f"{data['shot_name']}: {e}"
+                    )
+                return
+            spec_paths.append(spec_path)
         
-        return script_paths
+        return spec_paths
             
     def group_data(self, checked_data: dict) -> list[dict]:
         """
@@ -748,35 +1235,51 @@ class AppDialog(QtGui.QWidget):
         
         return final_data
     
-    def publish_to_shotgrid(self) -> None:
+    def _detach_thread(self, thread: QtCore.QThread) -> None:
         """
-        Publish the data to ShotGrid.
+        Keep a running thread alive once the dialog is deleted,
+        until the thread finishes.
         """
-        # publish data
-        if not self.grouped_data:
-            logger.error("No data to publish")
-            QtGui.QMessageBox.critical(
-                self, 
-                "Error", 
-                "No data to publish."
-                )
+        thread.setParent(None)
+        if thread.isFinished():
             return
-        self._publish = Publish(self.grouped_data, self.colorspace)
-        self._publish.publish_to_shotgrid()
-            
+        _detached_threads.append(thread)
+        thread.finished.connect(lambda: _detached_threads.remove(thread))
+        
     def closeEvent(self, event):
         """
         When the dialog is closed, this method is called.
-        clenup temp directory and close the dialog.
+        stop the running load and close the dialog.
         """
         logger.info("Closing IO Manager")
         
-        if not os.path.exists(self._temp_images):
-            logger.debug("Temp directory not found: %s" % self._temp_images)
-        else:
-            shutil.rmtree(self._temp_images)
-            logger.debug("Temp directory removed: %s" % self._temp_images)
-            
+        self.cancel_load()
+        self._thumbnail_loader.cancel()
+        self._thumbnail_loader.wait()
+        
+        # let the running save finish, the file must not be left half written
+        if self._save_thread is not None:
+            self._save_thread.wait()
+        
+        # the version index is committed at the end of the refresh,
+        # let it finish in the background rather than wait for it
+        if self._version_index_thread is not None:
+            self._detach_thread(self._version_index_thread)
+        
+        # the running jobs keep going, on the farm or as local processes,
+        # only the shots already converted are recorded and uploaded
+        if self._publish_thread is not None:
+            logger.info("Stopping the running publish")
+            self._publish_thread.cancel()
+            if not self._publish_thread.wait(int(PUBLISH_CLOSE_TIMEOUT * 1000)):
+                logger.warning(
+                    "The publish is still uploading, it goes on in the background."
+                    )
+                self._detach_thread(self._publish_thread)
+        GenerateConverter.shutdown_worker_pool()
+        if self._queued_save is not None:
+            logger.warning("Queued save was not run, the dialog was closed.")
+        
         logger.info("IO Manager closed")
         event.accept()
         
\ No newline at end of file
@@ -8,157 +8,309 @@ it will handle the logic for the excel files.
 __author__ = "Juno Park"
 __github__ = "https://github.com/junopark00"
 
+import io
 import os
-import openpyxl.utils
+import time
+import shutil
+import tempfile
 import sgtk
-from sgtk.platform.qt import QtGui, QtCore
 from sgtk import TankError
 
+from .xlsx_reader import iter_image_data, read_sheet_images, read_sheet_layout
+from .xlsx_writer import patch_cells
+
 try:
-    from PIL import Image
     import openpyxl
-    import openpyxl_image_loader
+    # openpyxl needs Pillow to embed the images when the whole table is saved
+    import PIL
 except ImportError as e:
-    raise TankError("This script requires the following packages: Pillow, openpyxl, openpyxl-image-loader")
+    raise TankError(
+        "This script requires the following packages: openpyxl, Pillow"
+        ) from e
 
 
 # Set standard sgtk logger
 logger = sgtk.platform.get_logger(__name__)
 
 
-class ExcelManager:
+class ColumnStore:
+    """
+    Cell values of a sheet, stored as one list of strings per column.
+    The header row is not included.
+    """
+    def __init__(self):
+        self.columns = []
+        self.row_count = 0
+        
+    @property
+    def column_count(self) -> int:
+        return len(self.columns)
+        
+    def append_rows(self, rows) -> None:
+        """
+        Append rows to the store.
+        Short rows are padded with empty strings.
+        
+        Args:
+            rows (iterable): rows of cell values
+        """
+        for row in rows:
+            # a wider row adds columns, filled for the previous rows
+            self.ensure_columns(len(row))
+            for j, column in enumerate(self.columns):
+                column.append(row[j] if j < len(row) else "")
+            self.row_count += 1
+            
+    def ensure_columns(self, count: int) -> None:
+        """
+        Add empty columns until the store has at least the given count.
+        """
+        while len(self.columns) < count:
+            self.columns.append([""] * self.row_count)
+            
+    def value(self, row: int, column: int) -> str:
+        if column >= len(self.columns):
+            return ""
+        return self.columns[column][row]
+    
+    def set_value(self, row: int, column: int, value: str) -> None:
+        self.ensure_columns(column + 1)
+        self.columns[column][row] = value
+        
+    def row(self, row: int) -> list:
+        return [column[row] for column in self.columns]
+    
+    def rows(self):
+        """
+        Iterate over the rows of the store.
+        """
+        return zip(*self.columns)
+
+
+class SheetSnapshot:
+    """
+    In-memory snapshot of the active sheet of an excel file.
+    Every field is filled from a single parse of the workbook.
+    The images are (row, column, media path), their bytes are read
+    from the excel file when they're needed.
+    """
     def __init__(self):
-        self._current_dir = os.path.dirname(__file__)
-        self._temp_dir = os.path.join(self._current_dir, ".temp_images")
         self.row_heights = {}
         self.column_widths = {}
         self.header_labels = []
-        self.cell_values = {}
-        self.loaded_images = []
+        self.cell_values = ColumnStore()
+        self.images = []
+        self.timings = {}
 
-    def load_excel(self, excel_path: str):
+
+class ExcelManager:
+    def __init__(self):
+        self.snapshot = SheetSnapshot()
+
+    def load_excel(self, excel_path: str, read_only: bool = False) -> SheetSnapshot:
         """
-        Load the excel file and update UI.
+        Load the excel file into a sheet snapshot.
+        The workbook is parsed once and every getter reads from that sheet.
+        In read-only mode, the cell values are streamed and
+        the layout is read separately from the xlsx package.
         
         Args:
             excel_path (str): path to the excel file
+            read_only (bool): whether to stream the sheet in read-only mode
+            
+        Returns:
+            SheetSnapshot: snapshot of the active sheet
         """
-        self.row_heights = self.get_row_heights(excel_path)
-        self.column_widths = self.get_column_widths(excel_path)
-        self.header_labels = self.get_header_labels(excel_path)
-        self.cell_values = self.get_cell_values(excel_path)
-        self.loaded_images = self.get_images(excel_path)
+        if read_only:
+            return self.load_excel_read_only(excel_path)
+        
+        snapshot = SheetSnapshot()
+        
+        start = time.perf_counter()
+        wb = openpyxl.load_workbook(excel_path)
+        sheet = wb.active
+        snapshot.timings["parse"] = time.perf_counter() - start
+        
+        phases = [
+            ("row_heights", self.get_row_heights),
+            ("column_widths", self.get_column_widths),
+            ("header_labels", self.get_header_labels),
+            ("cell_values", self.get_cell_values),
+        ]
+        for name, getter in phases:
+            phase_start = time.perf_counter()
+            setattr(snapshot, name, getter(sheet))
+            snapshot.timings[name] = time.perf_counter() - phase_start
+        wb.close()
+        
+        phase_start = time.perf_counter()
+        snapshot.images = self.get_images(excel_path)
+        snapshot.timings["images"] = time.perf_counter() - phase_start
+        
+        snapshot.timings["total"] = time.perf_counter() - start
+        self.log_timings(excel_path, snapshot)
+        
+        self.snapshot = snapshot
+        
+        return snapshot
+    
+    def load_excel_read_only(self, excel_path: str) -> SheetSnapshot:
+        """
+        Load the excel file into a sheet snapshot without building the
+        whole workbook in memory.
+        
+        Args:
+            excel_path (str): path to the excel file
+            
+        Returns:
+            SheetSnapshot: snapshot of the active sheet
+        """
+        snapshot = SheetSnapshot()
+        
+        start = time.perf_counter()
+        layout = read_sheet_layout(excel_path)
+        snapshot.row_heights = layout.row_heights
+        snapshot.column_widths = layout.column_widths
+        snapshot.timings["layout"] = time.perf_counter() - start
+        
+        phase_start = time.perf_counter()
+        rows = self.stream_rows(excel_path)
+        snapshot.header_labels = list(next(rows, ()))
+        snapshot.cell_values.append_rows(rows)
+        snapshot.timings["cell_values"] = time.perf_counter() - phase_start
+        
+        phase_start = time.perf_counter()
+        snapshot.images = layout.images
+        snapshot.timings["images"] = time.perf_counter() - phase_start
+        
+        snapshot.timings["total"] = time.perf_counter() - start
+        self.log_timings(excel_path, snapshot)
+        
+        self.snapshot = snapshot
+        
+        return snapshot
+    
+    def stream_rows(self, excel_path: str):
+        """
+        Stream the rows of the active sheet in read-only mode.
+        Each row is yielded as soon as it is parsed, including the header row.
+        
+        Args:
+            excel_path (str): path to the excel file
+            
+        Yields:
+            tuple: cell values of the row as strings
+        """
+        wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            sheet = wb.active
+            # the dimension tag of the sheet can be wrong, so don't trust it
+            sheet.reset_dimensions()
+            for row in sheet.iter_rows(values_only=True):
+                yield tuple(
+                    str(value) if value is not None else ""
+                    for value in row
+                    )
+        finally:
+            wb.close()
+    
+    def log_timings(self, excel_path: str, snapshot: SheetSnapshot) -> None:
+        """
+        Log the timings of each load phase.
+        """
+        logger.info(
+            "Loaded %s in %.2fs (%s)",
+            excel_path,
+            snapshot.timings["total"],
+            ", ".join(
+                f"{name}: {seconds:.2f}s"
+                for name, seconds in snapshot.timings.items()
+                if name != "total"
+                ),
+            )
 
-    def get_row_heights(self, excel_path: str) -> dict:
+    def get_row_heights(self, sheet) -> dict:
         """
-        Get the row heights of the excel file.
+        Get the row heights of the sheet.
         Exclude the header row.
         
         Args:
-            excel_path (str): path to the excel file
+            sheet (Worksheet): active sheet of the loaded workbook
         """
-        wb = openpyxl.load_workbook(excel_path)
-        sheet = wb.active
         row_heights = {
             row : sheet.row_dimensions[row].height
             for row in range(2, sheet.max_row + 1) # Skip the header row
         }
-        wb.close()
         
         return row_heights
     
-    def get_column_widths(self, excel_path: str) -> dict:
+    def get_column_widths(self, sheet) -> dict:
         """
-        Get the column widths of the excel file.
+        Get the column widths of the sheet.
         
         Args:
-            excel_path (str): path to the excel file
+            sheet (Worksheet): active sheet of the loaded workbook
         """
-        wb = openpyxl.load_workbook(excel_path)
-        sheet = wb.active
         column_widths = {
             column: sheet.column_dimensions[
                 openpyxl.utils.get_column_letter(column)
                 ].width
             for column in range(1, sheet.max_column + 1)
         }
-        wb.close()
         
         return column_widths
     
-    def get_header_labels(self, excel_path: str) -> list:
+    def get_header_labels(self, sheet) -> list:
         """
-        Get the header labels of the excel file.
+        Get the header labels of the sheet.
         
         Args:
-            excel_path (str): path to the excel file
+            sheet (Worksheet): active sheet of the loaded workbook
         """
-        wb = openpyxl.load_workbook(excel_path)
-        sheet = wb.active
-        header_labels = [cell.value for cell in sheet[1]]
-        wb.close()
+        header_labels = [
+            str(cell.value) if cell.value is not None else ""
+            for cell in sheet[1]
+            ]
         
         return header_labels
         
-    def get_cell_values(self, excel_path: str) -> dict:
+    def get_cell_values(self, sheet) -> ColumnStore:
         """
-        Get the cell values of the excel file.
+        Get the cell values of the sheet.
+        Exclude the header row.
         
         Args:
-            excel_path (str): path to the excel file
+            sheet (Worksheet): active sheet of the loaded workbook
         """
-        items = {}
-        wb = openpyxl.load_workbook(excel_path)
-        sheet = wb.active
-        for i, row in enumerate(sheet.iter_rows(values_only=True)):
-            for j, value in enumerate(row):
-                item = QtGui.QTableWidgetItem(
-                    str(value)
-                    ) if value is not None else QtGui.QTableWidgetItem("")
-                items[(i, j)] = item
-        wb.close()        
-        
-        return items
+        store = ColumnStore()
+        store.append_rows(
+            tuple(str(value) if value is not None else "" for value in row)
+            for row in sheet.iter_rows(min_row=2, values_only=True)
+            )
+        
+        return store
     
     def get_images(self, excel_path: str) -> list:
         """
-        Get the images of the excel file.
+        Get where the images of the active sheet are stored.
+        The original bytes are read from the xlsx package when needed,
+        without decoding, so they can be embedded again without re-encoding.
         
         Args:
             excel_path (str): path to the excel file
+            
+        Returns:
+            list: [(row, column, media path)], row and column are 1-based
         """
-        wb = openpyxl.load_workbook(excel_path)
-        sheet = wb.active
-        image_loader = openpyxl_image_loader.SheetImageLoader(sheet)
-        
-        images = []
-        for row in sheet.iter_rows():
-            for cell in row:
-                if image_loader.image_in(cell.coordinate):
-                    img_obj = image_loader.get(cell.coordinate)
-                    images.append((cell.row, cell.column, img_obj))
-        
-        for img in images:
-            row, column, img_obj = img
-            img = Image.open(img_obj.fp)
-            
-            if not os.path.exists(self._temp_dir):
-                os.makedirs(self._temp_dir)
-                
-            # Save the image to the temp directory
-            img_path = os.path.join(self._temp_dir, f"{row}_{column}.png")    
-            self.loaded_images.append(img_path)
-            img.save(img_path)
-        wb.close()
-        
-        return self.loaded_images
+        return read_sheet_images(excel_path)
 
     def save_excel(
         self, 
         header_data: list, 
         cell_data: list, 
         excel_path: str, 
-        version_up: bool
+        version_up: bool,
+        images: list = None
         ) -> str:
         """
         Save the excel file.
@@ -166,6 +318,9 @@ class ExcelManager:
         Args:
             excel_path (str): path to the excel file
             version_up (bool): whether to version up the file
+            images (list): [(row, column, media path)] of the table,
+                at 1-based excel positions, the bytes are read
+                from the excel file before it's replaced
             
         Returns:
             str: path to the saved excel file
@@ -180,37 +335,155 @@ class ExcelManager:
         for row in cell_data:
             sheet.append(row)
             
-        # save images to the excel file
-        for img_path in os.listdir(self._temp_dir):
-            if img_path.endswith(".png"):
-                row, column = os.path.splitext(img_path)[0].split("_")
-                img = openpyxl.drawing.image.Image(os.path.join(self._temp_dir, img_path))
-                
-                img.width, img.height = 304, 171
-                sheet.add_image(
-                    img, 
-                    f"{openpyxl.utils.get_column_letter(int(column))}{row}"
-                    )
+        # embed the original image bytes to the excel file,
+        # the snapshot only keeps the images outside of the table
+        images = self.snapshot.images + (images or [])
+        image_data = iter_image_data(
+            excel_path, [media_path for _, _, media_path in images]
+            )
+        for (row, column, _), (_, data) in zip(images, image_data):
+            img = openpyxl.drawing.image.Image(io.BytesIO(data))
+            
+            img.width, img.height = 304, 171
+            sheet.add_image(
+                img, 
+                f"{openpyxl.utils.get_column_letter(column)}{row}"
+                )
         
         # apply row heights and column widths
-        for row, height in self.row_heights.items():
+        for row, height in self.snapshot.row_heights.items():
             sheet.row_dimensions[row].height = height
-        for column, width in self.column_widths.items():
+        for column, width in self.snapshot.column_widths.items():
             sheet.column_dimensions[
                 openpyxl.utils.get_column_letter(column)
                 ].width = width
             
-        # get new excel path if version up
-        if version_up:
-            save_path = self.version_up(excel_path)
-        else:
-            save_path = excel_path
+        try:
+            return self.write_atomic(wb.save, excel_path, version_up)
+        finally:
+            wb.close()
             
-        wb.save(save_path)
-        wb.close()
+    def save_excel_incremental(
+        self, 
+        changed_cells: dict, 
+        excel_path: str, 
+        version_up: bool
+        ) -> str:
+        """
+        Save only the changed cells to the excel file.
+        The workbook is patched as it is, so styles, images and
+        other sheets are kept.
+
+        Args:
+            changed_cells (dict): {(row, column): text} of the table,
+                row and column are 0-based and the header row is excluded
+            excel_path (str): path to the excel file
+            version_up (bool): whether to version up the file
+            
+        Returns:
+            str: path to the saved excel file
+        """
+        # table rows start from the excel row 2
+        cells = {
+            (row + 2, column + 1): text
+            for (row, column), text in changed_cells.items()
+        }
+        
+        start = time.perf_counter()
+        save_path = self.write_atomic(
+            lambda temp_path: patch_cells(excel_path, temp_path, cells),
+            excel_path,
+            version_up
+            )
+        logger.info(
+            "Saved %d changed cells to %s in %.2fs",
+            len(cells),
+            save_path,
+            time.perf_counter() - start
+            )
         
         return save_path
             
+    def write_atomic(self, write, excel_path: str, version_up: bool) -> str:
+        """
+        Write a file next to the excel file and move it into place atomically,
+        so a crash or a full disk never leaves a truncated excel file.
+        
+        The file is written to a temporary file in the same directory,
+        flushed to the disk and then renamed over the target.
+        When versioning up, the new version is created exclusively,
+        so two artists saving at the same time never overwrite
+        each other's version, the later one takes the next version.
+        
+        Args:
+            write (callable): writes the file to the given path
+            excel_path (str): path to the excel file
+            version_up (bool): whether to version up the file
+            
+        Returns:
+            str: path to the saved excel file
+        """
+        excel_dir = os.path.dirname(excel_path)
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(excel_path)}.", 
+            suffix=".tmp", 
+            dir=excel_dir
+            )
+        os.close(fd)
+        
+        try:
+            write(temp_path)
+            # keep the permissions of the original, mkstemp makes it private
+            shutil.copymode(excel_path, temp_path)
+            _fsync_file(temp_path)
+            
+            if version_up:
+                save_path = self._link_new_version(temp_path, excel_path)
+            else:
+                save_path = excel_path
+                os.replace(temp_path, save_path)
+            _fsync_dir(excel_dir)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        return save_path
+    
+    def _link_new_version(self, temp_path: str, excel_path: str) -> str:
+        """
+        Create the next version of the excel file from the written file.
+        A hard link fails if the name exists, so the existence check and
+        the creation of the version are a single step.
+        
+        Args:
+            temp_path (str): path to the written file
+            excel_path (str): path to the excel file
+            
+        Returns:
+            str: path to the new version
+        """
+        save_path = self.version_up(excel_path)
+        while True:
+            try:
+                os.link(temp_path, save_path)
+                return save_path
+            except FileExistsError:
+                # saved by someone else in the meantime
+                save_path = self.version_up(save_path)
+            except OSError:
+                # no hard links on this file system, reserve the name instead
+                break
+        
+        while True:
+            try:
+                fd = os.open(save_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                save_path = self.version_up(save_path)
+                continue
+            os.close(fd)
+            os.replace(temp_path, save_path)
+            return save_path
+            
     def version_up(self, excel_path: str) -> str:
         """
         Version up the excel file.
@@ -250,4 +523,26 @@ class ExcelManager:
         # create new file path
         save_path = os.path.join(excel_dir, new_file_name)
         
-        return save_path
\ No newline at end of file
+        return save_path
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str) -> None:
+    """
+    Flush the directory entry of a renamed file.
+    Not supported on every platform, like Windows.
+    """
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script submits jobs to a render farm through a spool directory,
+and tracks their status until they finish.
+
+The queue directory is shared by the workstations and the farm nodes:
+    pending/<job id>.json   job spec, written by the submitter
+    running/<job id>.json   job spec, claimed by a farm node
+    done/<job id>.json      result, written by the farm node
+A farm node claims a job by renaming its spec, which is atomic,
+so a job never runs twice. While the job runs, the node touches
+its running spec as a heartbeat, so a job lost with its node
+is failed by the submitter. The paths in the job arguments,
+like the converter specs and the runner script, must be visible from the farm nodes.
+
+LocalFarmQueue is a stand-in for the farm, it runs the queued jobs
+on this machine, so the farm backend can be tested without a farm.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import json
+import time
+import socket
+import threading
+
+import sgtk
+
+from .job_scheduler import ExecutionBackend, Job, LocalBackend
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+
+
+def _write_json(path: str, data: dict) -> None:
+    # readers never see a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FarmBackend(ExecutionBackend):
+    """
+    Submit the jobs to the farm queue and poll their results.
+    """
+    name = "farm"
+
+    def __init__(
+        self, 
+        queue_dir: str, 
+        pending_timeout: float = 0, 
+        heartbeat_timeout: float = 0
+        ):
+        """
+        Args:
+            queue_dir (str): shared directory of the farm queue
+            pending_timeout (float): seconds a job can wait for a farm node
+                before it's failed, 0 for no limit
+            heartbeat_timeout (float): seconds a running job can go
+                without a heartbeat before it's failed, 0 for no limit
+        """
+        self._queue_dir = queue_dir
+        self.pending_timeout = pending_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        for state in (PENDING, RUNNING, DONE):
+            os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+        self._submitted = {}
+        self._submit_times = {}
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self._queue_dir, state, f"{job_id}.json")
+
+    def submit(self, job: Job) -> None:
+        _write_json(
+            self._path(PENDING, job.job_id),
+            {
+                "job_id": job.job_id,
+                "name": job.name,
+                "args": job.args,
+                "priority": job.priority,
+                "submitted_by": socket.gethostname(),
+                "submit_time": time.time(),
+            }
+            )
+        self._submitted[job.job_id] = job
+        self._submit_times[job.job_id] = time.time()
+        logger.debug("Submitted %s to the farm as %s", job.name, job.job_id)
+
+    def poll(self) -> list:
+        finished = []
+        for job_id, job in list(self._submitted.items()):
+            done_path = self._path(DONE, job_id)
+            if not os.path.exists(done_path):
+                error = self._check_stale(job_id)
+                if error is not None:
+                    job.error = error
+                    job.end_time = time.time()
+                    self._forget(job_id)
+                    finished.append(job)
+                continue
+            try:
+                result = _read_json(done_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to read the result of %s: %s", job.name, e)
+                continue
+
+            job.return_code = result.get("return_code")
+            job.error = result.get("error")
+            job.start_time = result.get("start_time")
+            job.end_time = result.get("end_time")
+            logger.debug("%s finished on %s", job.name, result.get("host"))
+
+            os.remove(done_path)
+            self._forget(job_id)
+            finished.append(job)
+        return finished
+
+    def _forget(self, job_id: str) -> None:
+        del self._submitted[job_id]
+        del self._submit_times[job_id]
+
+    def _check_stale(self, job_id: str) -> str:
+        """
+        Take back a job that waits too long for a node,
+        or whose node stopped sending heartbeats.
+
+        Returns:
+            str: why the job failed, None if it's still alive
+        """
+        now = time.time()
+        running_path = self._path(RUNNING, job_id)
+        try:
+            heartbeat = os.path.getmtime(running_path)
+        except OSError:
+            heartbeat = None
+
+        if heartbeat is not None:
+            if not self.heartbeat_timeout or now - heartbeat <= self.heartbeat_timeout:
+                return None
+            try:
+                os.remove(running_path)
+            except OSError:
+                pass
+            return "No heartbeat from the farm node for %.0fs." % (now - heartbeat)
+
+        waited = now - self._submit_times[job_id]
+        if not self.pending_timeout or waited <= self.pending_timeout:
+            return None
+        try:
+            os.remove(self._path(PENDING, job_id))
+        except FileNotFoundError:
+            # claimed or finished in the meantime
+            return None
+        return "No farm node picked up the job in %.0fs." % waited
+
+
+class LocalFarmQueue:
+    """
+    Stand-in for the farm, it runs the jobs of the queue on this machine.
+    Several queues can share the same directory, like farm nodes.
+    """
+    def __init__(self, queue_dir: str, max_parallel: int = 1, poll_interval: float = 0.5):
+        """
+        Args:
+            queue_dir (str): shared directory of the farm queue
+            max_parallel (int): number of jobs running at the same time
+            poll_interval (float): seconds between the checks of the queue
+        """
+        self._queue_dir = queue_dir
+        for state in (PENDING, RUNNING, DONE):
+            os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+        self._backend = LocalBackend(max_parallel)
+        self._poll_interval = poll_interval
+        self._running = 0
+        self._claimed = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self._queue_dir, state, f"{job_id}.json")
+
+    def _claim(self) -> None:
+        """
+        Claim the pending jobs in priority order, as many as free slots.
+        """
+        free = self._backend.max_parallel - self._running
+        if free <= 0:
+            return
+
+        specs = []
+        for entry in os.scandir(os.path.join(self._queue_dir, PENDING)):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                specs.append(_read_json(entry.path))
+            except (OSError, ValueError):
+                # claimed by another node, or still being written
+                continue
+        specs.sort(key=lambda spec: (-spec["priority"], spec["submit_time"]))
+
+        for spec in specs[:free]:
+            try:
+                os.rename(
+                    self._path(PENDING, spec["job_id"]),
+                    self._path(RUNNING, spec["job_id"])
+                    )
+            except OSError:
+                # claimed by another node
+                continue
+            job = Job(spec["name"], spec["args"], spec["priority"])
+            job.job_id = spec["job_id"]
+            self._backend.submit(job)
+            self._running += 1
+            self._claimed.add(job.job_id)
+
+    def _heartbeat(self) -> None:
+        for job_id in self._claimed:
+            try:
+                os.utime(self._path(RUNNING, job_id))
+            except OSError:
+                # taken back by the submitter
+                pass
+
+    def process(self) -> int:
+        """
+        Claim the pending jobs and report the finished ones, once.
+
+        Returns:
+            int: number of finished jobs
+        """
+        self._heartbeat()
+        self._claim()
+        count = 0
+        while True:
+            # starts the claimed jobs and reaps the finished ones
+            finished = self._backend.poll()
+            if not finished:
+                return count
+            count += len(finished)
+            for job in finished:
+                self._running -= 1
+                self._claimed.discard(job.job_id)
+                if not os.path.exists(self._path(RUNNING, job.job_id)):
+                    logger.warning("%s was taken back by the submitter", job.name)
+                    continue
+                _write_json(
+                    self._path(DONE, job.job_id),
+                    {
+                        "return_code": job.return_code,
+                        "error": job.error,
+                        "start_time": job.start_time,
+                        "end_time": job.end_time,
+                        "host": socket.gethostname(),
+                    }
+                    )
+                os.remove(self._path(RUNNING, job.job_id))
+            # take the next jobs in the slots just freed
+            self._claim()
+
+    def start(self) -> None:
+        """
+        Process the queue on a background thread until stopped.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.process()
+            self._stop.wait(self._poll_interval)
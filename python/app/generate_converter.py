@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 
 """
-This script generates a converter script for the conversion process.
+This script generates a converter job spec for the conversion process.
 Then, it will execute the conversion process.
 Finally, it will return the list of completed converters.
 
-If you want to modify the generated script, please modify this script.
+The spec describes the source, frame ranges, retimes and outputs as JSON,
+and converter_runner.py renders it in Nuke.
 """
 
 __author__ = "Juno Park"
@@ -13,11 +14,48 @@ __github__ = "https://github.com/junopark00"
 
 
 import os
-import subprocess
+import time
+import getpass
+import tempfile
+
+import sgtk
+
+from .constants import (
+    CODECS,
+    COLORSPACE,
+    EXECUTION_BACKEND,
+    FARM_HEARTBEAT_TIMEOUT,
+    FARM_PENDING_TIMEOUT,
+    FARM_POLL_INTERVAL,
+    FARM_QUEUE_DIR,
+    JPG_DELIVERABLE,
+    NUKE_MAX_JOBS,
+    NUKE_PATH,
+    NUKE_WORKER_MAX_JOBS,
+    PLATE_MOV_DELIVERABLE,
+    READ_SEQUENCE_DIRECTLY,
+    )
+from .converter_spec import ConverterSpec, OutputSpec, RetimeSpec, SourceSpec
+from .farm_backend import FarmBackend
+from .job_scheduler import ExecutionBackend, Job, JobScheduler, LocalBackend
+from .log_summary import LogSummary
+from .nuke_worker_pool import NukeWorkerPool
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+# Nuke script running the converter specs
+RUNNER_SCRIPT = os.path.join(os.path.dirname(__file__), "converter_runner.py")
 
-from .constants import CODECS, COLORSPACE, NUKE_PATH
 
 class GenerateConverter:
+    # seconds between the checks of the running processes
+    POLL_INTERVAL = 0.5
+    # persistent Nuke workers of the "pool" backend
+    _worker_pool = None
+    
     def __init__(
         self, 
         data: dict,
@@ -31,7 +69,8 @@ class GenerateConverter:
         self.apply_retime = apply_retime
         self.colorspace_key = colorspace
         self.codec = codec
-        self.current_dir = os.path.dirname(__file__)
+        # jobs of the last execution, with their timing and exit codes
+        self.jobs = []
         
     def set_data(self) -> None:
         """
@@ -128,583 +167,258 @@ class GenerateConverter:
             self.output_dir, self.colored_mov_name
         )
         
-    def execute(self, converters: list) -> list:
+    def execute(
+        self, 
+        converters: list, 
+        on_completed=None, 
+        priorities: dict = None,
+        backend: ExecutionBackend = None,
+        on_poll=None,
+        canceled=None
+        ) -> list:
         """
-        Execute the conversion process.
+        Execute the conversion process on the configured backend.
+        Locally, at most NUKE_MAX_JOBS converters run at the same time,
+        the next one starts as soon as a running one exits.
+        With the "pool" backend, they run on that many persistent Nuke workers.
+        
+        Args:
+            converters (list): paths of the converter specs
+            on_completed (callable): called as on_completed(converter)
+                as soon as a converter is successfully completed,
+                while the others are still running
+            priorities (dict): {converter: priority}, the converters
+                with a higher priority are started first
+            backend (ExecutionBackend): backend to run the converters on,
+                the one of EXECUTION_BACKEND by default
+            on_poll (callable): called as on_poll() between the checks
+                of the running converters
+            canceled (threading.Event): stop waiting for the converters
+                when set, the completed ones are still returned
         
         Returns:
-            list: The list of completed converters.
+            list: The list of completed converters, in the completion order.
         """
-        # list of processes
-        processes = []
+        priorities = priorities or {}
+        if backend is None:
+            backend = self.create_backend()
+        summary = LogSummary(logger, f"Convert ({backend.name})")
+        summary.count("jobs", len(converters))
+        
+        jobs = [
+            Job(
+                os.path.basename(converter),
+                [NUKE_PATH, "-t", RUNNER_SCRIPT, converter],
+                priorities.get(converter, 0)
+                )
+            for converter in converters
+            ]
+        converter_of = {job.job_id: converter for job, converter in zip(jobs, converters)}
         # list of completed converters
         completed_converter = []
         
-        for converter in converters:
-            cmd = f"{NUKE_PATH} -t {converter}"
-            process = subprocess.Popen(cmd, shell=True)
-            processes.append((process, converter))
+        def job_finished(job):
+            if not job.succeeded:
+                return
+            converter = converter_of[job.job_id]
+            completed_converter.append(converter)
+            if on_completed is None:
+                return
+            with summary.phase("on_completed"):
+                try:
+                    on_completed(converter)
+                except Exception:
+                    logger.exception("Failed to handle completed %s.", converter)
         
-        for process, converter in processes:
-            try:
-                return_code = process.wait()
-                # if return code is 0, the process is successfully completed
-                if return_code == 0:
-                    completed_converter.append(converter)
-                else:
-                    print(f"Process for {converter} failed with return code {return_code}.")
-            except Exception as e:
-                print(f"An Error occured during process for {converter}.\n", e)
+        poll_interval = FARM_POLL_INTERVAL if backend.name == "farm" else self.POLL_INTERVAL
+        scheduler = JobScheduler(backend, poll_interval)
+        with summary.phase("run"):
+            self.jobs = scheduler.run(jobs, job_finished, on_poll, canceled)
+        
+        summary.count("completed", len(completed_converter))
+        summary.count("failed", len(converters) - len(completed_converter))
+        summary.log()
         
         return completed_converter
         
-    def generate(self) -> str:
+    @classmethod
+    def create_spec_dir(cls) -> str:
         """
-        Generate the converter script.
+        Create the directory of the specs of a publish.
+        The specs are written in the app cache of the user,
+        or on the farm queue path for the farm backend, where the nodes
+        can read them. Every publish has its own directory,
+        so the publishes of several users never share a spec.
         
         Returns:
-            str: The path of the generated script.
+            str: path of the new directory
         """
-        if self.mov_to_dpx:
-            if self.apply_retime:
-                script = f"""# -*- coding: utf-8 -*-
-# WHEN YOU WANT TO MODIFY THIS SCRIPT, PLEASE MODIFY "generate_converter.py".
-
-# IF THIS SCRIPT STILL EXISTS, 
-# IT IS LIKELY THAT AN ERROR OCCURRED DURING THE CONVERSION PROCESS.
-
-__author__ = "Juno Park"
-__github__ = "https://github.com/junopark00"
-
-import os
-import sys
-import nuke
-
-codec = "{self.codec}"
-colorspace_key = "{self.colorspace_key}"
-colorspace_value = "{COLORSPACE[self.colorspace_key]}"
-retime_info = {self.retime_info}
-start_frame = {self.start_frame}
-end_frame = {self.end_frame}
-
-original_path = "{self.original_path}"
-output_dir = "{self.output_dir}"
-mov_input_dir = "{self.mov_input_dir}"
-converted_mov_path = "{self.converted_mov_path}"
-edited_mov_path = "{self.edited_mov_path}"
-dpx_output_dir = "{self.dpx_output_dir}"
-dpx_output_path = "{self.dpx_output_path}"
-jpg_output_dir = "{self.jpg_output_dir}"
-jpg_output_path = "{self.jpg_output_path}"
-colored_mov_output_path = "{self.colored_mov_output_path}"
-
-# set_ocio_color_management
-ocio_config_path = os.environ["OCIO"]
-if not ocio_config_path:
-    sys.exit(1)
-
-root = nuke.root()
-root["colorManagement"].setValue("OCIO")
-root["OCIO_config"].setValue("custom")
-root["customOCIOConfigPath"].setValue('')
-root["customOCIOConfigPath"].setValue(ocio_config_path)
-
-# check original media type, if it's not mov, convert it to mov
-if original_path.lower().endswith(".mov"):
-    pass
-else:
-    read_node = nuke.createNode("Read")
-    read_node["file"].setValue(original_path)
-    read_node["last"].setValue(end_frame)
-    read_node["origlast"].setValue(end_frame)
-    
-    if not os.path.exists(mov_input_dir):
-        os.makedirs(mov_input_dir)
-    
-    write_node = nuke.createNode("Write")
-    write_node["file"].setValue(converted_mov_path)
-    write_node["file_type"].setValue("mov")
-    write_node["mov64_codec"].setValue(codec)
-    nuke.execute(write_node, start_frame, end_frame)
-    end_frame = end_frame - start_frame + 1
-    start_frame = 1
-    
-# edit original mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-read_node["colorspace"].setValue(colorspace_key)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(edited_mov_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-write_node["colorspace"].setValue(colorspace_key)
-
-nuke.execute(write_node, start_frame, end_frame)
-
-# convert original mov to dpx
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-
-retime_nodes = []
-for retime in retime_info:
-    first_frame, retime_duration, retime_percent = retime
-    if first_frame == "" or retime_duration == "" or retime_percent == "":
-        raise ValueError("Please fill in the retime information.")
-    
-    last_frame = int(first_frame) + int(retime_duration) - 1
-    retime_ratio = int(retime_percent) / 100
-
-    retime_node = nuke.createNode("Retime")
-    retime_node.setInput(0, read_node)
-    retime_node["input.first_lock"].setValue("enable")
-    retime_node["input.last_lock"].setValue("enable")
-    retime_node["output.first_lock"].setValue("enable")
-    retime_node["input.first"].setValue(int(first_frame))
-    retime_node["input.last"].setValue(int(last_frame))
-    retime_node["output.first"].setValue(1)
-    output_last = (int(last_frame) - int(first_frame)) / retime_ratio + 1
-    retime_node["output.last"].setValue(output_last)
-    retime_node["speed"].setValue(retime_ratio)
-    retime_nodes.append(retime_node)
-
-append_clip_node = nuke.createNode("AppendClip")
-for idx, retime_node in enumerate(retime_nodes):
-    append_clip_node.setInput(idx, retime_node)
-    
-ac_first_frame = int(append_clip_node["firstFrame"].value())
-ac_last_frame = int(append_clip_node["lastFrame"].value())
-
-if not os.path.exists(dpx_output_dir):
-    os.makedirs(dpx_output_dir)
-
-write_node = nuke.createNode("Write")
-write_node.setInput(0, append_clip_node)
-write_node["file"].setValue(dpx_output_path)
-write_node["file_type"].setValue("dpx")
-nuke.execute(write_node, ac_first_frame, ac_last_frame)
-
-# convert dpx to colored jpg
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(dpx_output_path)
-read_node["colorspace"].setValue(colorspace_key)
-read_node["last"].setValue(ac_last_frame)
-read_node["origlast"].setValue(ac_last_frame)
-
-if not os.path.exists(jpg_output_dir):
-    os.makedirs(jpg_output_dir)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(jpg_output_path)
-write_node["file_type"].setValue("jpeg")
-write_node["colorspace"].setValue(colorspace_value)
-nuke.execute(write_node, ac_first_frame, ac_last_frame)
-
-# convert colored jpg to mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(jpg_output_path)
-read_node["last"].setValue(ac_last_frame)
-read_node["origlast"].setValue(ac_last_frame)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(colored_mov_output_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-nuke.execute(write_node, ac_first_frame, ac_last_frame)
-                """
-                script_path = os.path.join(
-                    self.current_dir, 
-                    f"converter_mov_to_dpx_retime_{self.shot_name}_v{int(self.version):03d}.py"
-                )
-                
-                with open(script_path, "w") as f:
-                    f.write(script)
-            else:
-                script = f"""# -*- coding: utf-8 -*-
-# WHEN YOU WANT TO MODIFY THIS SCRIPT, PLEASE MODIFY "generate_converter.py".
-
-# IF THIS SCRIPT STILL EXISTS, 
-# IT IS LIKELY THAT AN ERROR OCCURRED DURING THE CONVERSION PROCESS.
-
-__author__ = "Juno Park"
-__github__ = "https://github.com/junopark00"
-
-import os
-import sys
-import nuke
-
-codec = "{self.codec}"
-colorspace_key = "{self.colorspace_key}"
-colorspace_value = "{COLORSPACE[self.colorspace_key]}"
-start_frame = {self.start_frame}
-end_frame = {self.end_frame}
-
-original_path = "{self.original_path}"
-output_dir = "{self.output_dir}"
-mov_input_dir = "{self.mov_input_dir}"
-converted_mov_path = "{self.converted_mov_path}"
-edited_mov_path = "{self.edited_mov_path}"
-dpx_output_dir = "{self.dpx_output_dir}"
-dpx_output_path = "{self.dpx_output_path}"
-jpg_output_dir = "{self.jpg_output_dir}"
-jpg_output_path = "{self.jpg_output_path}"
-colored_mov_output_path = "{self.colored_mov_output_path}"
-
-# set_ocio_color_management
-ocio_config_path = os.environ["OCIO"]
-if not ocio_config_path:
-    sys.exit(1)
-
-root = nuke.root()
-root["colorManagement"].setValue("OCIO")
-root["OCIO_config"].setValue("custom")
-root["customOCIOConfigPath"].setValue('')
-root["customOCIOConfigPath"].setValue(ocio_config_path)
-
-# check original media type, if it's not mov, convert it to mov
-if original_path.lower().endswith(".mov"):
-    pass
-else:
-    read_node = nuke.createNode("Read")
-    read_node["file"].setValue(original_path)
-    read_node["first"].setValue(start_frame)
-    read_node["origfirst"].setValue(start_frame)
-    read_node["last"].setValue(end_frame)
-    read_node["origlast"].setValue(end_frame)
-    
-    if not os.path.exists(mov_input_dir):
-        os.makedirs(mov_input_dir)
-    
-    write_node = nuke.createNode("Write")
-    write_node["file"].setValue(converted_mov_path)
-    write_node["file_type"].setValue("mov")
-    write_node["mov64_codec"].setValue(codec)
-    nuke.execute(write_node, start_frame, end_frame)
-    end_frame = end_frame - start_frame + 1
-    start_frame = 1
-    
-# edit original mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-read_node["colorspace"].setValue(colorspace_key)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(edited_mov_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-write_node["colorspace"].setValue(colorspace_key)
-
-nuke.execute(write_node, start_frame, end_frame)
-
-# convert original mov to dpx
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-
-if not os.path.exists(dpx_output_dir):
-    os.makedirs(dpx_output_dir)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(dpx_output_path)
-write_node["file_type"].setValue("dpx")
-nuke.execute(write_node, start_frame, end_frame)
-    
-# convert dpx to colored jpg
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(dpx_output_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-read_node["colorspace"].setValue(colorspace_key)
-
-if not os.path.exists(jpg_output_dir):
-    os.makedirs(jpg_output_dir)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(jpg_output_path)
-write_node["file_type"].setValue("jpeg")
-write_node["colorspace"].setValue(colorspace_value)
-nuke.execute(write_node, start_frame, end_frame)
-
-# convert colored jpg to mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(jpg_output_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(colored_mov_output_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-nuke.execute(write_node, start_frame, end_frame)
-                """
-                script_path = os.path.join(
-                    self.current_dir, 
-                    f"converter_mov_to_dpx_{self.shot_name}_v{int(self.version):03d}.py"
-                )
-                
-                with open(script_path, "w") as f:
-                    f.write(script)
+        if EXECUTION_BACKEND == "farm":
+            if not FARM_QUEUE_DIR:
+                raise ValueError("FARM_QUEUE_DIR is not set for the farm backend.")
+            base_dir = os.path.join(FARM_QUEUE_DIR, "specs")
         else:
-            if self.apply_retime:
-                script = f"""# -*- coding: utf-8 -*-
-# WHEN YOU WANT TO MODIFY THIS SCRIPT, PLEASE MODIFY "generate_converter.py".
-
-# IF THIS SCRIPT STILL EXISTS, 
-# IT IS LIKELY THAT AN ERROR OCCURRED DURING THE CONVERSION PROCESS.
-
-__author__ = "Juno Park"
-__github__ = "https://github.com/junopark00"
-
-import os
-import sys
-import nuke
-
-codec = "{self.codec}"
-colorspace_key = "{self.colorspace_key}"
-colorspace_value = "{COLORSPACE[self.colorspace_key]}"
-retime_info = {self.retime_info}
-start_frame = {self.start_frame}
-end_frame = {self.end_frame}
-
-original_path = "{self.original_path}"
-output_dir = "{self.output_dir}"
-mov_input_dir = "{self.mov_input_dir}"
-converted_mov_path = "{self.converted_mov_path}"
-edited_mov_path = "{self.edited_mov_path}"
-dpx_output_dir = "{self.dpx_output_dir}"
-dpx_output_path = "{self.dpx_output_path}"
-jpg_output_dir = "{self.jpg_output_dir}"
-jpg_output_path = "{self.jpg_output_path}"
-colored_mov_output_path = "{self.colored_mov_output_path}"
-
-# set_ocio_color_management
-ocio_config_path = os.environ["OCIO"]
-if not ocio_config_path:
-    sys.exit(1)
-
-root = nuke.root()
-root["colorManagement"].setValue("OCIO")
-root["OCIO_config"].setValue("custom")
-root["customOCIOConfigPath"].setValue('')
-root["customOCIOConfigPath"].setValue(ocio_config_path)
-
-# check original media type, if it's not mov, convert it to mov
-if original_path.lower().endswith(".mov"):
-    pass
-else:
-    read_node = nuke.createNode("Read")
-    read_node["file"].setValue(original_path)
-    read_node["first"].setValue(start_frame)
-    read_node["origfirst"].setValue(start_frame)
-    read_node["last"].setValue(end_frame)
-    read_node["origlast"].setValue(end_frame)
-    
-    if not os.path.exists(mov_input_dir):
-        os.makedirs(mov_input_dir)
-    
-    write_node = nuke.createNode("Write")
-    write_node["file"].setValue(converted_mov_path)
-    write_node["file_type"].setValue("mov")
-    write_node["mov64_codec"].setValue(codec)
-    nuke.execute(write_node, start_frame, end_frame)
-    end_frame = end_frame - start_frame + 1
-    start_frame = 1
-    
-# edit original mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-read_node["colorspace"].setValue(colorspace_key)
-
-retime_nodes = []
-for retime in retime_info:
-    first_frame, retime_duration, retime_percent = retime
-    if first_frame == "" or retime_duration == "" or retime_percent == "":
-        raise ValueError("Please fill in the retime information.")
-    
-    last_frame = int(first_frame) + int(retime_duration) - 1
-    retime_ratio = int(retime_percent) / 100
-    
-    retime_node = nuke.createNode("Retime")
-    retime_node.setInput(0, read_node)
-    retime_node["input.first_lock"].setValue("enable")
-    retime_node["input.last_lock"].setValue("enable")
-    retime_node["output.first_lock"].setValue("enable")
-    retime_node["input.first"].setValue(int(first_frame))
-    retime_node["input.last"].setValue(int(last_frame))
-    retime_node["output.first"].setValue(1)
-    output_last = (int(last_frame) - int(first_frame)) / retime_ratio + 1
-    retime_node["output.last"].setValue(output_last)
-    retime_node["speed"].setValue(retime_ratio)
-    retime_nodes.append(retime_node)
-    
-append_clip_node = nuke.createNode("AppendClip")
-for idx, retime_node in enumerate(retime_nodes):
-    append_clip_node.setInput(idx, retime_node)
-    
-ac_first_frame = int(append_clip_node["firstFrame"].value())
-ac_last_frame = int(append_clip_node["lastFrame"].value())
-
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-write_node = nuke.createNode("Write")
-write_node.setInput(0, append_clip_node)
-write_node["file"].setValue(edited_mov_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-write_node["colorspace"].setValue(colorspace_key)
-
-nuke.execute(write_node, ac_first_frame, ac_last_frame)
-
-# apply colorspace and export mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(edited_mov_path)
-read_node["colorspace"].setValue(colorspace_key)
-read_node["first"].setValue(ac_first_frame)
-read_node["origfirst"].setValue(ac_first_frame)
-read_node["last"].setValue(ac_last_frame)
-read_node["origlast"].setValue(ac_last_frame)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(colored_mov_output_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-write_node["colorspace"].setValue(colorspace_value)
-
-nuke.execute(write_node, ac_first_frame, ac_last_frame)
-                """
-                script_path = os.path.join(
-                    self.current_dir, 
-                    f"converter_original_retime_{self.shot_name}_v{int(self.version):03d}.py"
+            base_dir = os.path.join(
+                sgtk.platform.current_bundle().cache_location, "converters"
                 )
-                
-                with open(script_path, "w") as f:
-                    f.write(script)
-            else:
-                script = f"""# -*- coding: utf-8 -*-
-# WHEN YOU WANT TO MODIFY THIS SCRIPT, PLEASE MODIFY "generate_converter.py".
-
-# IF THIS SCRIPT STILL EXISTS, 
-# IT IS LIKELY THAT AN ERROR OCCURRED DURING THE CONVERSION PROCESS.
-
-__author__ = "Juno Park"
-__github__ = "https://github.com/junopark00"
-
-import os
-import sys
-import nuke
-
-codec = "{self.codec}"
-colorspace_key = "{self.colorspace_key}"
-colorspace_value = "{COLORSPACE[self.colorspace_key]}"
-start_frame = {self.start_frame}
-end_frame = {self.end_frame}
-
-original_path = "{self.original_path}"
-output_dir = "{self.output_dir}"
-mov_input_dir = "{self.mov_input_dir}"
-converted_mov_path = "{self.converted_mov_path}"
-edited_mov_path = "{self.edited_mov_path}"
-dpx_output_dir = "{self.dpx_output_dir}"
-dpx_output_path = "{self.dpx_output_path}"
-jpg_output_dir = "{self.jpg_output_dir}"
-jpg_output_path = "{self.jpg_output_path}"
-colored_mov_output_path = "{self.colored_mov_output_path}"
-
-# set_ocio_color_management
-ocio_config_path = os.environ["OCIO"]
-if not ocio_config_path:
-    sys.exit(1)
-
-root = nuke.root()
-root["colorManagement"].setValue("OCIO")
-root["OCIO_config"].setValue("custom")
-root["customOCIOConfigPath"].setValue('')
-root["customOCIOConfigPath"].setValue(ocio_config_path)
-
-# check original media type, if it's not mov, convert it to mov
-if original_path.lower().endswith(".mov"):
-    pass
-else:
-    read_node = nuke.createNode("Read")
-    read_node["file"].setValue(original_path)
-    read_node["first"].setValue(start_frame)
-    read_node["origfirst"].setValue(start_frame)
-    read_node["last"].setValue(end_frame)
-    read_node["origlast"].setValue(end_frame)
-    
-    if not os.path.exists(mov_input_dir):
-        os.makedirs(mov_input_dir)
-    
-    write_node = nuke.createNode("Write")
-    write_node["file"].setValue(converted_mov_path)
-    write_node["file_type"].setValue("mov")
-    write_node["mov64_codec"].setValue(codec)
-    nuke.execute(write_node, start_frame, end_frame)
-    end_frame = end_frame - start_frame + 1
-    start_frame = 1
-    
-# edit original mov
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(converted_mov_path)
-read_node["first"].setValue(start_frame)
-read_node["origfirst"].setValue(start_frame)
-read_node["last"].setValue(end_frame)
-read_node["origlast"].setValue(end_frame)
-read_node["colorspace"].setValue(colorspace_key)
-
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(edited_mov_path)
-write_node["file_type"].setValue("mov")
-write_node["colorspace"].setValue(colorspace_key)
-nuke.execute(write_node, start_frame, end_frame)
-
-# apply colorspace and export mov
-mov_end = end_frame - start_frame + 1
-read_node = nuke.createNode("Read")
-read_node["file"].setValue(edited_mov_path)
-read_node["colorspace"].setValue(colorspace_key)
-read_node["first"].setValue(1)
-read_node["origfirst"].setValue(1)
-read_node["last"].setValue(mov_end)
-read_node["origlast"].setValue(mov_end)
-
-write_node = nuke.createNode("Write")
-write_node["file"].setValue(colored_mov_output_path)
-write_node["file_type"].setValue("mov")
-write_node["mov64_codec"].setValue(codec)
-write_node["colorspace"].setValue(colorspace_value)
-
-nuke.execute(write_node, 1, mov_end)
-                """
-                script_path = os.path.join(
-                    self.current_dir, 
-                    f"converter_original_{self.shot_name}_v{int(self.version):03d}.py"
+        os.makedirs(base_dir, exist_ok=True)
+        return tempfile.mkdtemp(
+            prefix=f"{getpass.getuser()}_{time.strftime('%Y%m%d_%H%M%S')}_",
+            dir=base_dir
+            )
+        
+    @classmethod
+    def create_backend(cls) -> ExecutionBackend:
+        """
+        Create the execution backend of EXECUTION_BACKEND.
+        The worker pool is shared by every conversion, so its workers stay warm.
+        """
+        if EXECUTION_BACKEND == "farm":
+            if not FARM_QUEUE_DIR:
+                raise ValueError("FARM_QUEUE_DIR is not set for the farm backend.")
+            return FarmBackend(
+                FARM_QUEUE_DIR, FARM_PENDING_TIMEOUT, FARM_HEARTBEAT_TIMEOUT
                 )
-                
-                with open(script_path, "w") as f:
-                    f.write(script)
-                    
-        return script_path
\ No newline at end of file
+        if EXECUTION_BACKEND == "pool":
+            if cls._worker_pool is None:
+                cls._worker_pool = NukeWorkerPool(
+                    NUKE_PATH, NUKE_MAX_JOBS, NUKE_WORKER_MAX_JOBS
+                    )
+            return cls._worker_pool
+        if EXECUTION_BACKEND != "local":
+            raise ValueError(f"Unknown execution backend: {EXECUTION_BACKEND}")
+        return LocalBackend(NUKE_MAX_JOBS)
+        
+    @classmethod
+    def shutdown_worker_pool(cls) -> None:
+        """
+        Stop the persistent Nuke workers, if they were started.
+        """
+        if cls._worker_pool is not None:
+            cls._worker_pool.shutdown()
+            cls._worker_pool = None
+        
+    def build_spec(self) -> ConverterSpec:
+        """
+        Build the job spec of the converter from the data.
+        
+        Returns:
+            ConverterSpec: spec of the conversion
+        """
+        source = SourceSpec(
+            # mov plates are read from the mov directory, like the converted ones
+            path=self.converted_mov_path,
+            first=self.start_frame,
+            last=self.end_frame,
+            colorspace=self.colorspace_key,
+            )
+        outputs = []
+        
+        if not self.original_path.lower().endswith(".mov"):
+            source.path = self.original_path
+            if READ_SEQUENCE_DIRECTLY:
+                # the sequence starts at frame 1, like the converted mov
+                source.start_at = 1
+                if PLATE_MOV_DELIVERABLE:
+                    outputs.append(OutputSpec(
+                        name="plate_mov",
+                        path=self.converted_mov_path,
+                        file_type="mov",
+                        codec=self.codec,
+                        colorspace=self.colorspace_key,
+                        ))
+            else:
+                source.transcode_path = self.converted_mov_path
+                source.transcode_codec = self.codec
+        
+        colorspace_value = COLORSPACE[self.colorspace_key]
+        if self.mov_to_dpx:
+            outputs += [
+                OutputSpec(
+                    name="edited_mov",
+                    path=self.edited_mov_path,
+                    file_type="mov",
+                    codec=self.codec,
+                    colorspace=self.colorspace_key,
+                    ),
+                # dpx keeps the code values of the plate
+                OutputSpec(
+                    name="dpx",
+                    path=self.dpx_output_path,
+                    file_type="dpx",
+                    colorspace=self.colorspace_key,
+                    retimed=True,
+                    ),
+                OutputSpec(
+                    name="colored_mov",
+                    path=self.colored_mov_output_path,
+                    file_type="mov",
+                    codec=self.codec,
+                    colorspace=colorspace_value,
+                    retimed=True,
+                    ),
+                ]
+            if JPG_DELIVERABLE:
+                outputs.append(OutputSpec(
+                    name="jpg",
+                    path=self.jpg_output_path,
+                    file_type="jpeg",
+                    colorspace=colorspace_value,
+                    retimed=True,
+                    ))
+        else:
+            outputs += [
+                OutputSpec(
+                    name="edited_mov",
+                    path=self.edited_mov_path,
+                    file_type="mov",
+                    codec=self.codec,
+                    colorspace=self.colorspace_key,
+                    retimed=True,
+                    ),
+                OutputSpec(
+                    name="colored_mov",
+                    path=self.colored_mov_output_path,
+                    file_type="mov",
+                    codec=self.codec,
+                    colorspace=colorspace_value,
+                    retimed=True,
+                    ),
+                ]
+        
+        retimes = []
+        for first_frame, retime_duration, retime_percent in self.retime_info:
+            if first_frame == "" or retime_duration == "" or retime_percent == "":
+                raise ValueError("Please fill in the retime information.")
+            retimes.append(RetimeSpec(
+                first=int(first_frame),
+                duration=int(retime_duration),
+                percent=int(retime_percent),
+                ))
+        
+        return ConverterSpec(
+            f"{self.shot_name}_v{int(self.version):03d}",
+            source,
+            outputs,
+            retimes,
+            )
+        
+    def generate(self, spec_dir: str) -> str:
+        """
+        Generate the job spec of the converter.
+        
+        Args:
+            spec_dir (str): directory of the specs of the publish,
+                from create_spec_dir
+        
+        Returns:
+            str: The path of the generated spec.
+        """
+        spec = self.build_spec()
+        spec_path = os.path.join(
+            spec_dir,
+            f"converter_{self.shot_name}_v{int(self.version):03d}.json"
+            )
+        spec.save(spec_path)
+        
+        return spec_path
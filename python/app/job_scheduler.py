@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script runs command line jobs on an execution backend.
+
+The backends share a non-blocking interface, the jobs are submitted
+and their status is polled, so the caller can keep working in between:
+    - LocalBackend runs the jobs as local processes,
+      with a bounded number of processes.
+    - NukeWorkerPool (nuke_worker_pool.py) runs Nuke jobs
+      on persistent Nuke processes.
+    - FarmBackend (farm_backend.py) submits the jobs to a render farm queue.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import time
+import uuid
+import heapq
+import subprocess
+
+import sgtk
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class Job:
+    """
+    A command to run, with its timing and exit code once it has run.
+    """
+    def __init__(self, name: str, args: list, priority: int = 0):
+        """
+        Args:
+            name (str): name of the job, for the logs
+            args (list): command line arguments, run without a shell
+            priority (int): jobs with a higher priority are started first
+        """
+        self.job_id = uuid.uuid4().hex
+        self.name = name
+        self.args = args
+        self.priority = priority
+        self.start_time = None
+        self.end_time = None
+        self.return_code = None
+        self.error = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    @property
+    def succeeded(self) -> bool:
+        return self.return_code == 0 and self.error is None
+
+
+class ExecutionBackend:
+    """
+    Interface of the execution backends.
+    Both methods return immediately, the jobs run in the background.
+    """
+    name = ""
+
+    def submit(self, job: Job) -> None:
+        """
+        Queue a job to run.
+        """
+        raise NotImplementedError
+
+    def poll(self) -> list:
+        """
+        Update the status of the submitted jobs.
+
+        Returns:
+            list: jobs finished since the last poll, with their exit code
+                or error set
+        """
+        raise NotImplementedError
+
+
+class LocalBackend(ExecutionBackend):
+    """
+    Run the jobs as local processes in priority order,
+    with at most max_parallel at the same time.
+    A new job is started as soon as a running one exits,
+    so the machine and the licences are used without oversubscription.
+    """
+    name = "local"
+
+    def __init__(self, max_parallel: int = 0):
+        """
+        Args:
+            max_parallel (int): number of jobs running at the same time,
+                0 for the CPU count
+        """
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self._queue = []
+        self._count = 0
+        self._running = []
+
+    def submit(self, job: Job) -> None:
+        # the submission order breaks the ties of the priority
+        heapq.heappush(self._queue, (-job.priority, self._count, job))
+        self._count += 1
+
+    def poll(self) -> list:
+        finished = []
+        for process, job in list(self._running):
+            return_code = process.poll()
+            if return_code is None:
+                continue
+            self._running.remove((process, job))
+            job.return_code = return_code
+            job.end_time = time.time()
+            finished.append(job)
+
+        while self._queue and len(self._running) < self.max_parallel:
+            _, _, job = heapq.heappop(self._queue)
+            logger.debug("Starting %s: %s", job.name, job.args)
+            job.start_time = time.time()
+            try:
+                process = subprocess.Popen(job.args)
+            except OSError as e:
+                job.error = str(e)
+                job.end_time = time.time()
+                finished.append(job)
+                continue
+            self._running.append((process, job))
+
+        return finished
+
+
+class JobScheduler:
+    """
+    Submit jobs to a backend and wait until all of them finish.
+    """
+    def __init__(self, backend: ExecutionBackend, poll_interval: float = 0.5):
+        """
+        Args:
+            backend (ExecutionBackend): backend to run the jobs on
+            poll_interval (float): seconds between the checks of the running jobs
+        """
+        self.backend = backend
+        self.poll_interval = poll_interval
+
+    def run(self, jobs: list, on_finished=None, on_poll=None, canceled=None) -> list:
+        """
+        Run the jobs and wait until all of them exit, or until canceled.
+
+        Args:
+            jobs (list): jobs to run
+            on_finished (callable): called as on_finished(job) when a job exits,
+                while the other jobs keep running
+            on_poll (callable): called as on_poll() after every poll,
+                for the periodic work of the caller
+            canceled (threading.Event): stop waiting when set,
+                the jobs still running are left to the backend
+
+        Returns:
+            list: the jobs, in the order they finished
+        """
+        for job in jobs:
+            self.backend.submit(job)
+
+        finished = []
+        while len(finished) < len(jobs):
+            if canceled is not None and canceled.is_set():
+                logger.warning(
+                    "Stopped waiting for %d jobs", len(jobs) - len(finished)
+                    )
+                break
+
+            for job in self.backend.poll():
+                finished.append(job)
+                self._log(job)
+                if on_finished is not None:
+                    on_finished(job)
+            if on_poll is not None:
+                on_poll()
+
+            if len(finished) < len(jobs):
+                if canceled is not None:
+                    canceled.wait(self.poll_interval)
+                else:
+                    time.sleep(self.poll_interval)
+
+        return finished
+
+    def _log(self, job: Job) -> None:
+        if job.error is not None:
+            logger.error("%s failed: %s", job.name, job.error)
+        elif job.succeeded:
+            logger.info("Finished %s in %.1fs", job.name, job.elapsed)
+        else:
+            logger.error(
+                "%s failed with return code %s after %.1fs",
+                job.name,
+                job.return_code,
+                job.elapsed
+                )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script collects the counts and the elapsed time per phase
+of an operation, and logs them as a single summary line.
+ex) Validate version: rows=120, new=3 | query 0.084s, compare 0.001s | total 0.086s
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import time
+import logging
+import contextlib
+
+from .constants import LOG_SUMMARY
+
+
+class LogSummary:
+    """
+    Counts and elapsed time per phase of an operation.
+    """
+    def __init__(self, logger: logging.Logger, name: str):
+        """
+        Args:
+            logger (Logger): logger to write the summary to
+            name (str): name of the operation
+        """
+        self._logger = logger
+        self._name = name
+        self._counts = {}
+        self._phases = {}
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Time a phase of the operation. The time of a repeated phase adds up.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[name] = (
+                self._phases.get(name, 0.0) + time.perf_counter() - start
+                )
+
+    def count(self, name: str, value: int = 1) -> None:
+        self._counts[name] = self._counts.get(name, 0) + value
+
+    def log(self, level: int = logging.INFO) -> None:
+        """
+        Log the summary line, unless the summary is turned off.
+        """
+        if not LOG_SUMMARY or not self._logger.isEnabledFor(level):
+            return
+
+        counts = ", ".join(f"{name}={value}" for name, value in self._counts.items())
+        phases = ", ".join(
+            f"{name} {elapsed:.3f}s" for name, elapsed in self._phases.items()
+            )
+        self._logger.log(
+            level,
+            "%s: %s | %s | total %.3fs",
+            self._name,
+            counts or "-",
+            phases or "-",
+            time.perf_counter() - self._start
+            )
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script is a persistent Nuke worker, run as "nuke -t nuke_worker.py".
+It's started by NukeWorkerPool (nuke_worker_pool.py), not by the app itself.
+
+The worker runs the converter runner one spec after another in the same
+Nuke session, so Nuke's startup, plugin scan and licence checkout
+are paid once per worker instead of once per shot.
+
+Requests are read from stdin and responses are written to stdout,
+one JSON object per line:
+    request     {"job_id": str, "script": str, "args": list}
+    response    {"job_id": str, "return_code": int}
+Everything else printed by Nuke or the scripts goes to stderr,
+so it never mixes with the responses.
+The worker exits when stdin is closed.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import sys
+import json
+import runpy
+import traceback
+
+import nuke
+
+
+def run_script(script: str, args: list) -> int:
+    """
+    Run a converter script like "nuke -t script args" would,
+    then reset the session for the next job.
+
+    Returns:
+        int: exit code of the script
+    """
+    argv = sys.argv
+    cwd = os.getcwd()
+    sys.argv = [script] + list(args)
+    return_code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return_code = 0
+        elif isinstance(e.code, int):
+            return_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            return_code = 1
+    except Exception:
+        traceback.print_exc()
+        return_code = 1
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+        # remove the nodes and reset the root settings
+        nuke.scriptClear()
+    return return_code
+
+
+def main() -> None:
+    # keep stdout for the responses, the rest of the output goes to stderr
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        return_code = run_script(request["script"], request.get("args", []))
+        responses.write(
+            json.dumps({"job_id": request["job_id"], "return_code": return_code})
+            + "\n"
+            )
+        responses.flush()
+
+
+if __name__ == "__main__":
+    main()
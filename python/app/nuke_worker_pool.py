@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script runs the converter jobs on a pool of persistent Nuke workers.
+
+Every worker is a long-lived "nuke -t nuke_worker.py" process.
+The jobs are sent to the idle workers through their stdin,
+and the workers answer on their stdout when a job finishes.
+The workers stay warm between the jobs and between the publishes,
+so Nuke starts once per worker instead of once per shot.
+
+A worker that dies in the middle of a job fails that job only,
+a new worker is started for the next jobs.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import json
+import time
+import queue
+import heapq
+import threading
+import subprocess
+
+import sgtk
+
+from .job_scheduler import ExecutionBackend, Job
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "nuke_worker.py")
+
+
+class NukeWorker:
+    """
+    A persistent Nuke process running one job at a time.
+    Its responses are read on a thread and put on the events queue,
+    as (worker, response), and (worker, None) once the process exited.
+    """
+    def __init__(self, nuke_path: str, events: queue.Queue):
+        self.process = subprocess.Popen(
+            [nuke_path, "-t", WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            )
+        self.job = None
+        self.jobs_run = 0
+        self._reader = threading.Thread(target=self._read, args=(events,), daemon=True)
+        self._reader.start()
+
+    def _read(self, events: queue.Queue) -> None:
+        for line in self.process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                logger.debug("Unexpected output of Nuke worker: %s", line.rstrip())
+                continue
+            events.put((self, response))
+        self.process.wait()
+        events.put((self, None))
+
+    def send(self, job: Job) -> None:
+        """
+        Send a job to the worker, the worker must be idle.
+        """
+        self.job = job
+        self.process.stdin.write(
+            json.dumps({"job_id": job.job_id, "script": job.args[2], "args": job.args[3:]})
+            + "\n"
+            )
+        self.process.stdin.flush()
+
+    def stop(self) -> None:
+        """
+        Ask the worker to exit once its current job is done.
+        """
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+
+class NukeWorkerPool(ExecutionBackend):
+    """
+    Run Nuke terminal jobs, [nuke, "-t", script, *args],
+    on at most size persistent workers, in priority order.
+    The workers are started when needed and kept until shutdown.
+    """
+    name = "pool"
+
+    def __init__(self, nuke_path: str, size: int = 0, max_jobs_per_worker: int = 0):
+        """
+        Args:
+            nuke_path (str): path to the Nuke executable
+            size (int): number of workers, 0 for the CPU count
+            max_jobs_per_worker (int): number of jobs a worker runs
+                before it's replaced by a new one, 0 for no limit
+        """
+        self.nuke_path = nuke_path
+        self.size = size or os.cpu_count() or 1
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._queue = []
+        self._count = 0
+        self._workers = []
+        self._events = queue.Queue()
+
+    def submit(self, job: Job) -> None:
+        if len(job.args) < 3 or job.args[1] != "-t":
+            raise ValueError(f"Not a Nuke terminal job: {job.args}")
+        # the submission order breaks the ties of the priority
+        heapq.heappush(self._queue, (-job.priority, self._count, job))
+        self._count += 1
+
+    def poll(self) -> list:
+        finished = self._collect()
+
+        while self._queue:
+            worker = next((w for w in self._workers if w.job is None), None)
+            if worker is None:
+                if len(self._workers) >= self.size:
+                    break
+                try:
+                    worker = NukeWorker(self.nuke_path, self._events)
+                except OSError as e:
+                    _, _, job = heapq.heappop(self._queue)
+                    job.error = str(e)
+                    finished.append(job)
+                    continue
+                logger.debug("Started Nuke worker %s", worker.process.pid)
+                self._workers.append(worker)
+
+            _, _, job = heapq.heappop(self._queue)
+            logger.debug("Sending %s to Nuke worker %s", job.name, worker.process.pid)
+            job.start_time = time.time()
+            try:
+                worker.send(job)
+            except OSError as e:
+                # the worker died, its exit is collected with the events
+                job.error = f"Nuke worker exited: {e}"
+                job.end_time = time.time()
+                worker.job = None
+                self._workers.remove(worker)
+                finished.append(job)
+
+        return finished
+
+    def _collect(self) -> list:
+        """
+        Handle the responses and exits of the workers.
+
+        Returns:
+            list: jobs finished since the last call
+        """
+        finished = []
+        while True:
+            try:
+                worker, response = self._events.get_nowait()
+            except queue.Empty:
+                return finished
+
+            job = worker.job
+            if response is None:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+                if job is not None:
+                    logger.warning(
+                        "Nuke worker %s exited while running %s",
+                        worker.process.pid,
+                        job.name
+                        )
+                    worker.job = None
+                    job.return_code = worker.process.returncode or 1
+                    job.end_time = time.time()
+                    finished.append(job)
+                continue
+
+            if job is None or response.get("job_id") != job.job_id:
+                logger.warning("Unexpected response of Nuke worker: %s", response)
+                continue
+
+            worker.job = None
+            worker.jobs_run += 1
+            job.return_code = response.get("return_code", 1)
+            job.end_time = time.time()
+            finished.append(job)
+
+            if self.max_jobs_per_worker and worker.jobs_run >= self.max_jobs_per_worker:
+                # release the memory Nuke keeps between the jobs
+                worker.stop()
+                self._workers.remove(worker)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Stop the workers. The queued jobs are dropped.
+
+        Args:
+            timeout (float): seconds to wait for a worker before killing it
+        """
+        self._queue = []
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            try:
+                worker.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning("Killing Nuke worker %s", worker.process.pid)
+                worker.process.kill()
@@ -11,116 +11,356 @@ __author__ = "Juno Park"
 __github__ = "https://github.com/junopark00"
 
 import os
+import time
+
 import sgtk
 
+from .constants import PUBLISH_BATCH_SIZE, PUBLISH_FLUSH_INTERVAL
+from .publish_journal import PublishJournal, movie_signature
+from .uploader import Uploader
+
 
 # Set standard sgtk logger
 logger = sgtk.platform.get_logger(__name__)
 
 
 class Publish:
-    def __init__(self, data: list, colorspace: str):
+    def __init__(
+        self, 
+        data: list, 
+        colorspace: str, 
+        batch_size: int = PUBLISH_BATCH_SIZE,
+        flush_interval: float = PUBLISH_FLUSH_INTERVAL
+        ):
         self.data = data
         self.colorspace = colorspace
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
         
         self._app = sgtk.platform.current_bundle()
         self._sg = self._app.shotgun
+        self._journal = None
+        # {movie path: version code} of the submitted uploads
+        self._upload_codes = {}
+        # {movie path: movie_signature()} of the submitted uploads
+        self._upload_movies = {}
+        # version codes published in this run
+        self._run_codes = set()
+        # rows queued to be published together, and when the first was queued
+        self._queued_rows = []
+        self._queued_since = None
+        self._uploader = Uploader(
+            started=self._upload_started, 
+            progress=self._upload_finished
+            )
     
-    def publish_to_shotgrid(self) -> None:
-        """
-        Publishes the version data to ShotGrid.
-        """
-        version_data = {}
-        for row, data in enumerate(self.data):
-            version_entry = {}
-            version_entry["project"] = self._app.context.project
-            version_entry["sg_roll"] = data["roll"]
-            version_entry["sg_version_1"] = data["version"]
-            version_entry["sg_type"] = data["type"]
-            version_entry["sg_scan_path_1"] = data["scan_path"]
-            version_entry["sg_scan_name"] = data["scan_name"]
-            version_entry["sg_clip_name"] = "\n".join(data["clip_name"]) if isinstance(data["clip_name"], list) else data["clip_name"]
-            version_entry["sg_pad"] = data["pad"]
-            version_entry["sg_ext"] = data["ext"]
-            version_entry["sg_resolution"] = data["resolution"]
-            version_entry["sg_start_frame"] = str(data["start_frame"])
-            version_entry["sg_end_frame"] = str(data["end_frame"])
-            version_entry["sg_duration"] = str(data["duration"])
-            version_entry["sg_retime_duration"] = "\n".join(data["retime_duration"]) if isinstance(data["retime_duration"], list) else data["retime_duration"]
-            version_entry["sg_retime_percent"] = "\n".join(data["retime_percent"]) if isinstance(data["retime_percent"], list) else data["retime_percent"]
-            version_entry["sg_retime_start_frame"] = "\n".join(data["retime_start_frame"]) if isinstance(data["retime_start_frame"], list) else data["retime_start_frame"]
-            version_entry["sg_timecode_in"] = str(data["timecode_in"])
-            version_entry["sg_timecode_out"] = str(data["timecode_out"])
-            version_entry["sg_just_in"] = str(data["just_in"])
-            version_entry["sg_just_out"] = str(data["just_out"])
-            version_entry["sg_framerate"] = data["framerate"]
-            version_entry["sg_date"] = "\n".join(data["date"]) if isinstance(data["date"], list) else data["date"]
-            version_entry["sg_clip_tag"] = "\n".join(data["clip_tag"]) if isinstance(data["clip_tag"], list) else data["clip_tag"]
-
-            output_path = os.path.dirname(data['scan_path'])
-            colorspace = self.colorspace
-            
-            uploaded_movie_path = (f"{output_path}/"
-                                   "mov/"
-                                   f"{data['shot_name']}_"
-                                   f"{colorspace}_"
-                                   f"{data['type']}_v"
-                                   f"{int(data['version']):03d}"
-                                   ".mov"
-                                   )
+    def publish_rows(self, rows) -> None:
+        """
+        Create the versions of the rows and start uploading their movies.
+        The uploads run in the background, call wait() to finish them.
+        Rows can be published as soon as their conversion is done.
+        
+        Args:
+            rows (iterable): rows of the data to publish
+        """
+        version_data = {row: self.version_entry(row) for row in rows}
+        
+        # check the movies before creating the versions
+        uploaded_movies = {}
+        for row in version_data:
+            uploaded_movie = self.uploaded_movie(row)
+            if not os.path.exists(uploaded_movie):
+                logger.error(f"MOV not found: {uploaded_movie}")
+                continue
+            uploaded_movies[row] = uploaded_movie
+        
+        # record every step, so an interrupted publish can be resumed
+        journal = self.journal
+        codes = {row: version_data[row]["code"] for row in uploaded_movies}
+        self._run_codes.update(codes.values())
+        
+        # reuse the versions created by an interrupted publish
+        versions = self.journaled_versions(journal, codes)
+        if versions:
+            logger.info(f"Resuming publish, {len(versions)} versions already created")
+        
+        created, failures = self.create_versions({
+            row: version_data[row]
+            for row in uploaded_movies
+            if row not in versions
+            })
+        journal.versions_created(
+            {codes[row]: version["id"] for row, version in created.items()}
+            )
+        versions.update(created)
+        for row, error in failures.items():
+            logger.error(
+                f"Failed to create version of row {row} "
+                f"({version_data[row]['code']}): {error}"
+                )
+        
+        # upload the movies concurrently, each worker has its own connection
+        for row, version in versions.items():
+            movie = movie_signature(uploaded_movies[row])
+            if journal.is_uploaded(codes[row], movie):
+                logger.debug(f"Movie already uploaded: {uploaded_movies[row]}")
+                continue
+            if journal.is_upload_started(codes[row]):
+                logger.info(f"Uploading interrupted movie again: {uploaded_movies[row]}")
+            self._upload_codes[uploaded_movies[row]] = codes[row]
+            self._upload_movies[uploaded_movies[row]] = movie
+            self._uploader.submit(row, version["id"], uploaded_movies[row])
+    
+    def queue_rows(self, rows) -> list:
+        """
+        Queue rows to be published in a batch with the next ones.
+        The queue is published as soon as it holds a full batch.
+        
+        Args:
+            rows (iterable): rows of the data to publish
             
-            edited_movie_path = (f"{output_path}/"
-                                 f"{data['shot_name']}_"
-                                 f"{data['type']}_v"
-                                 f"{int(data['version']):03d}"
-                                 ".mov"
-                                 )
+        Returns:
+            list: rows published by this call
+        """
+        if not self._queued_rows:
+            self._queued_since = time.monotonic()
+        self._queued_rows.extend(rows)
+        if len(self._queued_rows) >= self.batch_size:
+            return self.flush_rows()
+        return []
+    
+    def flush_rows(self, due_only: bool = False) -> list:
+        """
+        Publish the queued rows.
+        
+        Args:
+            due_only (bool): publish only if the first row waited
+                for the flush interval
             
-            dpx_frames_path = (f"{output_path}/"
-                               "dpx/"
+        Returns:
+            list: rows published by this call
+        """
+        if not self._queued_rows:
+            return []
+        if due_only and time.monotonic() - self._queued_since < self.flush_interval:
+            return []
+        rows, self._queued_rows = self._queued_rows, []
+        self.publish_rows(rows)
+        return rows
+    
+    def wait(self) -> None:
+        """
+        Wait for the running uploads.
+        """
+        upload_failures = self._uploader.wait()
+        for row, error in upload_failures.items():
+            logger.error(
+                f"Failed to upload movie of row {row} "
+                f"({self.version_entry(row)['code']}): {error}"
+                )
+        
+        # the complete publishes are not resumed by a later run,
+        # the failed ones are kept to be run again
+        if self._run_codes:
+            journal = self.journal
+            journal.retire(
+                [code for code in self._run_codes if journal.is_uploaded(code)]
+                )
+            self._run_codes = set()
+    
+    @property
+    def journal(self) -> PublishJournal:
+        if self._journal is None:
+            self._journal = PublishJournal(
+                os.path.join(
+                    self._app.cache_location,
+                    "publish_journal",
+                    f"{self._app.context.project['id']}.jsonl"
+                    )
+                )
+        return self._journal
+    
+    def _upload_started(self, path: str) -> None:
+        self.journal.upload_started(
+            self._upload_codes[path], path, self._upload_movies[path]
+            )
+    
+    def _upload_finished(self, done: int, total: int, path: str, error: str) -> None:
+        if error is None:
+            self.journal.upload_finished(
+                self._upload_codes[path], path, self._upload_movies[path]
+                )
+    
+    def version_entry(self, row: int) -> dict:
+        """
+        Get the 'Version' entity data of a row.
+        """
+        data = self.data[row]
+        version_entry = {}
+        version_entry["project"] = self._app.context.project
+        version_entry["sg_roll"] = data["roll"]
+        version_entry["sg_version_1"] = data["version"]
+        version_entry["sg_type"] = data["type"]
+        version_entry["sg_scan_path_1"] = data["scan_path"]
+        version_entry["sg_scan_name"] = data["scan_name"]
+        version_entry["sg_clip_name"] = "\n".join(data["clip_name"]) if isinstance(data["clip_name"], list) else data["clip_name"]
+        version_entry["sg_pad"] = data["pad"]
+        version_entry["sg_ext"] = data["ext"]
+        version_entry["sg_resolution"] = data["resolution"]
+        version_entry["sg_start_frame"] = str(data["start_frame"])
+        version_entry["sg_end_frame"] = str(data["end_frame"])
+        version_entry["sg_duration"] = str(data["duration"])
+        version_entry["sg_retime_duration"] = "\n".join(data["retime_duration"]) if isinstance(data["retime_duration"], list) else data["retime_duration"]
+        version_entry["sg_retime_percent"] = "\n".join(data["retime_percent"]) if isinstance(data["retime_percent"], list) else data["retime_percent"]
+        version_entry["sg_retime_start_frame"] = "\n".join(data["retime_start_frame"]) if isinstance(data["retime_start_frame"], list) else data["retime_start_frame"]
+        version_entry["sg_timecode_in"] = str(data["timecode_in"])
+        version_entry["sg_timecode_out"] = str(data["timecode_out"])
+        version_entry["sg_just_in"] = str(data["just_in"])
+        version_entry["sg_just_out"] = str(data["just_out"])
+        version_entry["sg_framerate"] = data["framerate"]
+        version_entry["sg_date"] = "\n".join(data["date"]) if isinstance(data["date"], list) else data["date"]
+        version_entry["sg_clip_tag"] = "\n".join(data["clip_tag"]) if isinstance(data["clip_tag"], list) else data["clip_tag"]
+
+        output_path = os.path.dirname(data['scan_path'])
+        colorspace = self.colorspace
+        
+        uploaded_movie_path = (f"{output_path}/"
+                               "mov/"
                                f"{data['shot_name']}_"
                                f"{colorspace}_"
                                f"{data['type']}_v"
                                f"{int(data['version']):03d}"
-                               "_%04d.dpx"
+                               ".mov"
                                )
-            
-            version_entry["code"] = os.path.splitext(
-                os.path.basename(
-                    uploaded_movie_path
-                    )
-                )[0]
-            version_entry["sg_path_to_frames"] = dpx_frames_path
-            version_entry["sg_path_to_movie"] = edited_movie_path
-            
-            version_data[row] = version_entry
         
-        for row, data in version_data.items():
-            output_path = (
-                os.path.dirname(self.data[row]["scan_path"])
+        edited_movie_path = (f"{output_path}/"
+                             f"{data['shot_name']}_"
+                             f"{data['type']}_v"
+                             f"{int(data['version']):03d}"
+                             ".mov"
+                             )
+        
+        dpx_frames_path = (f"{output_path}/"
+                           "dpx/"
+                           f"{data['shot_name']}_"
+                           f"{colorspace}_"
+                           f"{data['type']}_v"
+                           f"{int(data['version']):03d}"
+                           "_%04d.dpx"
+                           )
+        
+        version_entry["code"] = os.path.splitext(
+            os.path.basename(
+                uploaded_movie_path
                 )
+            )[0]
+        version_entry["sg_path_to_frames"] = dpx_frames_path
+        version_entry["sg_path_to_movie"] = edited_movie_path
+        
+        return version_entry
+    
+    def uploaded_movie(self, row: int) -> str:
+        """
+        Get the path of the movie to upload for a row.
+        """
+        output_path = (
+            os.path.dirname(self.data[row]["scan_path"])
+            )
+        
+        uploaded_movie_name = (
+            f"{self.data[row]['shot_name']}_"
+            f"{self.colorspace}_"
+            f"{self.data[row]['type']}_v"
+            f"{int(self.data[row]['version']):03d}"
+            ".mov"
+            )
+        
+        return f"{output_path}/{uploaded_movie_name}"
+    
+    def journaled_versions(self, journal: PublishJournal, codes: dict) -> dict:
+        """
+        Get the versions recorded in the journal, which still exist on ShotGrid.
+        
+        Args:
+            journal (PublishJournal): journal of the publish
+            codes (dict): {row: version code}
             
-            uploaded_movie_name = (
-                f"{self.data[row]['shot_name']}_"
-                f"{colorspace}_"
-                f"{self.data[row]['type']}_v"
-                f"{int(self.data[row]['version']):03d}"
-                ".mov"
+        Returns:
+            dict: {row: version entity}
+        """
+        version_ids = {}
+        for row, code in codes.items():
+            version_id = journal.version_id(code)
+            if version_id is not None:
+                version_ids[row] = version_id
+        if not version_ids:
+            return {}
+        
+        # the versions may have been deleted since
+        existing_ids = {
+            version["id"]
+            for version in self._sg.find(
+                "Version", [["id", "in", list(version_ids.values())]], ["id"]
                 )
+            }
+        
+        versions = {}
+        for row, version_id in version_ids.items():
+            if version_id in existing_ids:
+                versions[row] = {"type": "Version", "id": version_id}
+            else:
+                logger.warning(
+                    f"Version {version_id} of {codes[row]} no longer exists, "
+                    "creating it again"
+                    )
+        return versions
+    
+    def create_versions(self, version_data: dict) -> tuple:
+        """
+        Create the versions with batch requests.
+        A batch is a single transaction, if it fails, none of its versions
+        are created, so its versions are created one by one
+        to find the failed rows.
+        
+        Args:
+            version_data (dict): {row: version entity data}
             
-            uploaded_movie = f"{output_path}/{uploaded_movie_name}"
-            
-            if not os.path.exists(uploaded_movie):
-                logger.error(f"MOV not found: {uploaded_movie}")
+        Returns:
+            tuple: ({row: created version}, {row: error message})
+        """
+        versions = {}
+        failures = {}
+        rows = list(version_data)
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            requests = [
+                {
+                    "request_type": "create",
+                    "entity_type": "Version",
+                    "data": version_data[row],
+                }
+                for row in chunk
+                ]
+            try:
+                # the results are in the order of the requests
+                created = self._sg.batch(requests)
+            except Exception as e:
+                logger.warning(
+                    f"Batch of {len(chunk)} versions failed, "
+                    f"creating them one by one: {e}"
+                    )
+                for row in chunk:
+                    try:
+                        versions[row] = self._sg.create("Version", version_data[row])
+                    except Exception as e:
+                        failures[row] = str(e)
                 continue
             
-            version = self._sg.create("Version", data)
-            logger.debug(f"Version created: {version}")
-            
-            self._sg.upload(
-                "Version",
-                version["id"],
-                uploaded_movie,
-                "sg_uploaded_movie"
-                )
-            logger.debug(f"Uploaded movie: {uploaded_movie}")
+            versions.update(zip(chunk, created))
+        
+        logger.debug(
+            f"Created {len(versions)} versions in batches of {self.batch_size}, "
+            f"{len(failures)} failed"
+            )
+        
+        return versions, failures
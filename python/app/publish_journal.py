@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script records the steps of a publish in an on-disk journal,
+so an interrupted publish can be run again without duplicating versions.
+
+The journal is a JSON lines file, one record per step:
+    {"code": ..., "step": "created", "version_id": ...}
+    {"code": ..., "step": "upload_started", "path": ..., "movie": [size, mtime]}
+    {"code": ..., "step": "upload_finished", "path": ..., "movie": [size, mtime]}
+    {"code": ..., "step": "retired"}
+Records are only appended and flushed to the disk one by one,
+so a crash loses at most the step that was being written.
+
+The entries of a code are retired once its publish is complete,
+so only interrupted publishes are resumed, a later publish of the
+same code creates a new version.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import json
+import time
+import threading
+
+import sgtk
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+CREATED = "created"
+UPLOAD_STARTED = "upload_started"
+UPLOAD_FINISHED = "upload_finished"
+RETIRED = "retired"
+
+
+def movie_signature(path: str) -> list:
+    """
+    Get the size and modification time of a movie,
+    a movie rendered again doesn't count as uploaded.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class PublishJournal:
+    """
+    Steps of the published versions, keyed by the version code.
+    The uploads run on several threads, so the writes are guarded by a lock.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): path to the journal file
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        # {code: {"version_id": id, "upload": step, "path": path, "movie": movie}}
+        self._state = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            return
+
+        line_count = 0
+        broken = False
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # the last record of a crash can be cut off
+                    logger.warning("Skipped a broken record in %s", self._path)
+                    broken = True
+                    continue
+                line_count += 1
+                self._apply(record)
+
+        # rewrite without the broken records, the next ones would follow
+        # a cut off line, and keep a single record per step of each version
+        if broken or line_count > 2 * len(self._state) + 100:
+            self._compact()
+
+    def _apply(self, record: dict) -> None:
+        if record["step"] == RETIRED:
+            self._state.pop(record["code"], None)
+            return
+        state = self._state.setdefault(record["code"], {})
+        if record["step"] == CREATED:
+            state["version_id"] = record["version_id"]
+            # a new version of the same code, its upload starts over
+            state.pop("upload", None)
+            state.pop("path", None)
+            state.pop("movie", None)
+        else:
+            state["upload"] = record["step"]
+            state["path"] = record.get("path")
+            state["movie"] = record.get("movie")
+
+    def _records(self) -> list:
+        records = []
+        for code, state in self._state.items():
+            if "version_id" in state:
+                records.append(
+                    {"code": code, "step": CREATED, "version_id": state["version_id"]}
+                    )
+            if "upload" in state:
+                records.append({
+                    "code": code,
+                    "step": state["upload"],
+                    "path": state.get("path"),
+                    "movie": state.get("movie"),
+                    })
+        return records
+
+    def _compact(self) -> None:
+        temp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in self._records():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path)
+
+    def _append(self, records: list) -> None:
+        with self._lock:
+            with open(self._path, "a", encoding="utf-8") as f:
+                for record in records:
+                    record["time"] = time.time()
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for record in records:
+                self._apply(record)
+
+    def version_id(self, code: str) -> int:
+        """
+        Get the id of the version created for the code, None if not created.
+        """
+        return self._state.get(code, {}).get("version_id")
+
+    def is_uploaded(self, code: str, movie: list = None) -> bool:
+        """
+        Check if the movie of the code was uploaded.
+
+        Args:
+            code (str): version code
+            movie (list): movie_signature() of the movie to upload,
+                the upload only counts for the same movie if given
+        """
+        state = self._state.get(code, {})
+        if state.get("upload") != UPLOAD_FINISHED:
+            return False
+        return movie is None or state.get("movie") == movie
+
+    def is_upload_started(self, code: str) -> bool:
+        return self._state.get(code, {}).get("upload") == UPLOAD_STARTED
+
+    def versions_created(self, versions: dict) -> None:
+        """
+        Record the created versions.
+
+        Args:
+            versions (dict): {code: version id}
+        """
+        self._append([
+            {"code": code, "step": CREATED, "version_id": version_id}
+            for code, version_id in versions.items()
+            ])
+
+    def upload_started(self, code: str, path: str, movie: list = None) -> None:
+        self._append([{"code": code, "step": UPLOAD_STARTED, "path": path, "movie": movie}])
+
+    def upload_finished(self, code: str, path: str, movie: list = None) -> None:
+        self._append([{"code": code, "step": UPLOAD_FINISHED, "path": path, "movie": movie}])
+
+    def retire(self, codes: list) -> None:
+        """
+        Forget the codes whose publish is complete.
+        """
+        codes = [code for code in codes if code in self._state]
+        if codes:
+            self._append([{"code": code, "step": RETIRED} for code in codes])
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script is the table model for the loaded excel data.
+The cell values are kept in a columnar store and
+the view asks the model only for the cells it paints.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+from sgtk.platform.qt import QtCore
+
+from .excel_manager import ColumnStore
+
+
+# role of the (content key, image bytes) of a thumbnail cell
+THUMBNAIL_ROLE = QtCore.Qt.UserRole + 1
+
+
+class ExcelTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over a ColumnStore.
+    The check states and thumbnail images are kept beside the cell values.
+    Only the content key and the package member of each image are kept,
+    the delegate reads and decodes the images from the excel file when painted.
+    """
+    def __init__(self, check_column: int, parent=None):
+        QtCore.QAbstractTableModel.__init__(self, parent)
+        self._check_column = check_column
+        self._header_labels = []
+        self._store = ColumnStore()
+        self._checked = bytearray()
+        self._images = {}
+        self._image_source = ""
+        self._dirty = set()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._store.row_count
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return max(self._store.column_count, len(self._header_labels))
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            if (row, column) in self._images:
+                return ""
+            return self._store.value(row, column)
+
+        if role == QtCore.Qt.CheckStateRole and column == self._check_column:
+            if self._checked[row]:
+                return QtCore.Qt.Checked
+            return QtCore.Qt.Unchecked
+
+        if role == THUMBNAIL_ROLE:
+            image = self._images.get((row, column))
+            if image is None:
+                return None
+            digest, media_path = image
+            return digest, (self._image_source, media_path)
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        row, column = index.row(), index.column()
+
+        if role == QtCore.Qt.CheckStateRole and column == self._check_column:
+            self._checked[row] = value == QtCore.Qt.Checked
+            self.dataChanged.emit(index, index)
+            return True
+
+        if role == QtCore.Qt.EditRole:
+            text = str(value)
+            if text == self._store.value(row, column):
+                return True
+            self._store.set_value(row, column, text)
+            self._dirty.add((row, column))
+            self.dataChanged.emit(index, index)
+            return True
+
+        return False
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+
+        if (index.row(), index.column()) in self._images:
+            return QtCore.Qt.ItemIsEnabled
+
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == self._check_column:
+            # the check column is checkable only
+            return flags | QtCore.Qt.ItemIsUserCheckable
+        return flags | QtCore.Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            if section < len(self._header_labels):
+                return self._header_labels[section]
+            return ""
+        return str(section + 1)
+
+    def set_sheet(self, header_labels: list, store: ColumnStore) -> None:
+        """
+        Replace the model data with the loaded sheet.
+
+        Args:
+            header_labels (list): header labels of the sheet
+            store (ColumnStore): cell values of the sheet
+        """
+        self.beginResetModel()
+        self._header_labels = list(header_labels)
+        self._store = store
+        self._checked = bytearray(store.row_count)
+        self._images = {}
+        self._image_source = ""
+        self._dirty = set()
+        self.endResetModel()
+
+    def append_rows(self, rows: list) -> None:
+        """
+        Append loaded rows at the end of the model.
+
+        Args:
+            rows (list): rows of cell values
+        """
+        if not rows:
+            return
+
+        width = max(len(row) for row in rows)
+        column_count = self.columnCount()
+        if width > column_count:
+            self.beginInsertColumns(QtCore.QModelIndex(), column_count, width - 1)
+            self._store.ensure_columns(width)
+            self.endInsertColumns()
+
+        first = self._store.row_count
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(rows) - 1)
+        self._store.append_rows(rows)
+        self._checked.extend(bytes(len(rows)))
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """
+        Remove every row and column from the model.
+        """
+        self.set_sheet([], ColumnStore())
+
+    def header_labels(self) -> list:
+        return [
+            self.headerData(column, QtCore.Qt.Horizontal)
+            for column in range(self.columnCount())
+            ]
+
+    def text(self, row: int, column: int) -> str:
+        return self.data(self.index(row, column))
+
+    def set_text(self, row: int, column: int, text: str) -> None:
+        self.setData(self.index(row, column), text)
+
+    def row_values(self, row: int) -> list:
+        return [self.text(row, column) for column in range(self.columnCount())]
+
+    def changed_cells(self) -> dict:
+        """
+        Get the cells edited since the sheet was loaded or saved.
+
+        Returns:
+            dict: {(row, column): text}, row and column are 0-based
+        """
+        return {
+            (row, column): self._store.value(row, column)
+            for row, column in self._dirty
+            }
+
+    def clear_changed_cells(self, saved_cells: dict = None) -> None:
+        """
+        Mark the saved cells as unchanged.
+        Cells edited again after the save started keep their changed state.
+
+        Args:
+            saved_cells (dict): {(row, column): text} that was saved,
+                every cell is cleared if not given
+        """
+        if saved_cells is None:
+            self._dirty = set()
+            return
+        for cell, text in saved_cells.items():
+            if self._store.value(*cell) == text:
+                self._dirty.discard(cell)
+
+    def set_all_checked(self, checked: bool) -> None:
+        """
+        Set the check state of every row with a single change notification.
+
+        Args:
+            checked (bool): whether to check the rows
+        """
+        if not self._checked:
+            return
+        self._checked = bytearray([checked]) * len(self._checked)
+        self.dataChanged.emit(
+            self.index(0, self._check_column),
+            self.index(len(self._checked) - 1, self._check_column),
+            )
+
+    def checked_rows(self) -> list:
+        return [row for row, checked in enumerate(self._checked) if checked]
+
+    def set_images(self, source: str, images: list) -> None:
+        """
+        Set the thumbnail images of the cells.
+
+        Args:
+            source (str): path to the excel file the images are stored in
+            images (list): [(row, column, content key, media path)],
+                row and column are 0-based
+        """
+        self._image_source = source
+        for row, column, digest, media_path in images:
+            self._images[(row, column)] = (digest, media_path)
+        if images:
+            rows = [row for row, _, _, _ in images]
+            columns = [column for _, column, _, _ in images]
+            self.dataChanged.emit(
+                self.index(min(rows), min(columns)),
+                self.index(max(rows), max(columns))
+                )
+
+    def images(self) -> list:
+        """
+        Returns:
+            list: [(row, column, media path)] of the cells,
+                row and column are 0-based
+        """
+        return [
+            (row, column, media_path)
+            for (row, column), (_, media_path) in self._images.items()
+            ]
+
+    def set_image_source(self, source: str, images: list = None) -> None:
+        """
+        Point the images to the saved excel file.
+        The content keys are kept, so the cached thumbnails are still used.
+
+        Args:
+            source (str): path to the excel file the images are stored in
+            images (list): [(row, column, media path)] of the saved file,
+                row and column are 0-based, None if the members are unchanged
+        """
+        self._image_source = source
+        for row, column, media_path in images or []:
+            if (row, column) in self._images:
+                digest, _ = self._images[(row, column)]
+                self._images[(row, column)] = (digest, media_path)
+
+    def thumbnail_changed(self, row: int, column: int) -> None:
+        """
+        Repaint a thumbnail cell, called when its thumbnail is ready.
+        """
+        index = self.index(row, column)
+        self.dataChanged.emit(index, index)
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script handles the thumbnails of the loaded excel file.
+The thumbnails are decoded from the image bytes of the xlsx package,
+read when a thumbnail is needed, without writing intermediate files.
+
+Scaled thumbnails are also kept in a per-user disk cache across sessions,
+so reloading the same sheet skips decoding and scaling.
+
+Only the thumbnails of the painted cells are decoded,
+and the decoded ones are kept under a memory budget.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import hashlib
+import zipfile
+import threading
+from collections import OrderedDict
+
+import sgtk
+from sgtk.platform.qt import QtCore, QtGui
+
+from .table_model import THUMBNAIL_ROLE
+from .xlsx_reader import read_image_data
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+def image_key(data: bytes) -> str:
+    """
+    Get the content key of the image bytes.
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+def scale_image(data: bytes, width: int, height: int) -> QtGui.QImage:
+    """
+    Decode the image bytes and scale it to fit the size,
+    preserving the aspect ratio.
+
+    Args:
+        data (bytes): encoded image bytes
+        width (int): width to fit
+        height (int): height to fit
+
+    Returns:
+        QImage: scaled image, null if the bytes can't be decoded
+    """
+    image = QtGui.QImage.fromData(data)
+    if image.isNull():
+        return image
+    return image.scaled(
+        width,
+        height,
+        QtCore.Qt.KeepAspectRatio,
+        QtCore.Qt.SmoothTransformation
+        )
+
+
+class ThumbnailCache:
+    """
+    Scaled thumbnails keyed by the image content and the target size.
+    The same image is decoded once, even if it's used in several cells.
+
+    The cache is bounded by a memory budget, the least recently painted
+    thumbnails are dropped first, so rows far off screen don't stay in memory.
+    """
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes (int): memory budget of the cached pixmaps in bytes
+        """
+        self._max_bytes = max_bytes
+        # {key: pixmap}, from the least to the most recently used
+        self._pixmaps = OrderedDict()
+        self._total_bytes = 0
+
+    @staticmethod
+    def key(digest: str, width: int, height: int) -> tuple:
+        return (digest, width, height)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: QtGui.QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def lookup(self, key: tuple) -> QtGui.QPixmap:
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def insert(self, key: tuple, pixmap: QtGui.QPixmap) -> None:
+        old_pixmap = self._pixmaps.pop(key, None)
+        if old_pixmap is not None:
+            self._total_bytes -= self._pixmap_bytes(old_pixmap)
+        self._pixmaps[key] = pixmap
+        self._total_bytes += self._pixmap_bytes(pixmap)
+
+        # keep the pixmap just inserted, even if it's over the budget alone
+        while self._total_bytes > self._max_bytes and len(self._pixmaps) > 1:
+            _, dropped = self._pixmaps.popitem(last=False)
+            self._total_bytes -= self._pixmap_bytes(dropped)
+
+    def clear(self) -> None:
+        self._pixmaps.clear()
+        self._total_bytes = 0
+
+
+class ThumbnailDiskCache:
+    """
+    Scaled thumbnails stored on disk, keyed by the image content and the size.
+    The least recently used files are removed when the cache is over its size.
+    It's used from the pool threads, so the index is guarded by a lock.
+    The cached files are indexed on the first store, on a pool thread,
+    the loads don't need the index.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir (str): directory of the cache
+            max_bytes (int): size limit of the cache in bytes
+        """
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # {path: size}, from the least to the most recently used
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = False
+
+    def _path(self, key: tuple) -> str:
+        digest, width, height = key
+        return os.path.join(
+            self._cache_dir, digest[:2], f"{digest}_{width}x{height}.png"
+            )
+
+    def _scan(self) -> None:
+        """
+        Index the cached files, ordered by their last use.
+        Called with the lock held.
+        """
+        self._scanned = True
+        if not os.path.isdir(self._cache_dir):
+            return
+
+        files = []
+        for sub_dir in os.scandir(self._cache_dir):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                if not entry.name.endswith(".png"):
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+
+        for _, path, size in sorted(files):
+            # the files stored before the scan are already indexed
+            if path not in self._entries:
+                self._entries[path] = size
+                self._total_bytes += size
+            self._entries.move_to_end(path)
+
+    def load(self, key: tuple) -> QtGui.QImage:
+        """
+        Load a cached thumbnail.
+
+        Returns:
+            QImage: cached thumbnail, None if not cached
+        """
+        path = self._path(key)
+        image = QtGui.QImage(path)
+        if image.isNull():
+            return None
+
+        # mark as recently used, the mtime keeps the order across sessions
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return image
+
+    def store(self, key: tuple, image: QtGui.QImage) -> None:
+        """
+        Store a thumbnail and remove the least recently used ones
+        if the cache is over its size.
+        """
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not image.save(temp_path, "PNG"):
+                raise OSError("Failed to write %s" % temp_path)
+            # another session may write the same key, the rename is atomic
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.warning("Failed to cache thumbnail: %s" % e)
+            return
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            if not self._scanned:
+                self._scan()
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self._max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class _ScaleSignals(QtCore.QObject):
+    scaled = QtCore.Signal(int, object, object, bool)
+
+
+class _ScaleTask(QtCore.QRunnable):
+    """
+    Read, decode and scale a thumbnail on a pool thread,
+    unless it's found in the disk cache.
+    Only QImage is used here, QPixmap must be created on the main thread.
+    """
+    def __init__(self, generation, key, source, width, height, disk_cache, signals):
+        QtCore.QRunnable.__init__(self)
+        self._generation = generation
+        self._key = key
+        self._source = source
+        self._width = width
+        self._height = height
+        self._disk_cache = disk_cache
+        self._signals = signals
+
+    def run(self) -> None:
+        image = None
+        if self._disk_cache is not None:
+            image = self._disk_cache.load(self._key)
+        cache_hit = image is not None
+
+        if not cache_hit:
+            excel_path, media_path = self._source
+            try:
+                data = read_image_data(excel_path, media_path)
+            except (OSError, KeyError, zipfile.BadZipFile) as e:
+                logger.warning("Failed to read thumbnail image %s: %s" % (media_path, e))
+                data = b""
+            image = scale_image(data, self._width, self._height)
+            if self._disk_cache is not None and not image.isNull():
+                self._disk_cache.store(self._key, image)
+
+        self._signals.scaled.emit(self._generation, self._key, image, cache_hit)
+
+
+class ThumbnailLoader(QtCore.QObject):
+    """
+    Decode and scale thumbnails concurrently on a thread pool.
+    Thumbnails are requested when their cell is painted,
+    so only the visible rows are decoded.
+    thumbnail_ready is emitted for the cells whose thumbnail got cached.
+    """
+    thumbnail_ready = QtCore.Signal(int, int)
+
+    def __init__(
+        self,
+        cache: ThumbnailCache,
+        disk_cache: ThumbnailDiskCache = None,
+        max_threads: int = 0,
+        placeholder: bool = True,
+        parent=None
+        ):
+        """
+        Args:
+            cache (ThumbnailCache): cache of the scaled thumbnails
+            disk_cache (ThumbnailDiskCache): cache across sessions, optional
+            max_threads (int): number of pool threads, 0 for the ideal count
+            placeholder (bool): whether to show a placeholder until
+                the thumbnail is ready
+        """
+        QtCore.QObject.__init__(self, parent)
+        self._cache = cache
+        self._disk_cache = disk_cache
+        self._placeholder = placeholder
+        self._pool = QtCore.QThreadPool(self)
+        if max_threads:
+            self._pool.setMaxThreadCount(max_threads)
+        self._signals = _ScaleSignals(self)
+        self._signals.scaled.connect(self._on_scaled)
+        self._generation = 0
+        self._priority = 0
+        self._pending = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def pixmap(
+        self,
+        row: int,
+        column: int,
+        digest: str,
+        source: tuple,
+        width: int,
+        height: int
+        ) -> QtGui.QPixmap:
+        """
+        Get the thumbnail of a cell.
+        If it's not cached, it's scaled on the pool and
+        a placeholder is returned in the meantime.
+
+        Args:
+            row (int): 0-based row of the cell
+            column (int): 0-based column of the cell
+            digest (str): content key of the image bytes
+            source (tuple): (excel path, media path) to read the image from
+            width (int): width to fit
+            height (int): height to fit
+
+        Returns:
+            QPixmap: thumbnail or placeholder, None if there is nothing to show
+        """
+        key = self._cache.key(digest, width, height)
+        pixmap = self._cache.lookup(key)
+        if pixmap is not None:
+            return pixmap
+
+        self._request(row, column, key, source, width, height)
+
+        if self._placeholder:
+            return self._placeholder_pixmap(width, height)
+        return None
+
+    def _request(self, row, column, key, source, width, height) -> None:
+        # the same image in several cells is scaled once
+        if key in self._pending:
+            if (row, column) not in self._pending[key]:
+                self._pending[key].append((row, column))
+            return
+        self._pending[key] = [(row, column)]
+
+        # the latest requests are for the rows on screen, run them first
+        self._priority += 1
+        self._pool.start(
+            _ScaleTask(
+                self._generation,
+                key,
+                source,
+                width,
+                height,
+                self._disk_cache,
+                self._signals
+                ),
+            self._priority
+            )
+
+    def cancel(self) -> None:
+        """
+        Drop the queued requests. Running tasks finish but are ignored.
+        Called when another file is loaded or the dialog is closed,
+        so the disk cache statistics of the load are logged here.
+        """
+        self._log_cache_stats()
+        self._generation += 1
+        self._pool.clear()
+        self._pending = {}
+
+    def wait(self) -> None:
+        self._pool.waitForDone()
+
+    def _on_scaled(
+        self,
+        generation: int,
+        key: tuple,
+        image: QtGui.QImage,
+        cache_hit: bool
+        ) -> None:
+        if generation != self._generation:
+            return
+        if image.isNull():
+            logger.warning("Failed to decode thumbnail image.")
+
+        if cache_hit:
+            self._cache_hits += 1
+        else:
+            self._cache_misses += 1
+
+        self._cache.insert(key, QtGui.QPixmap.fromImage(image))
+        for row, column in self._pending.pop(key, []):
+            self.thumbnail_ready.emit(row, column)
+
+    def _log_cache_stats(self) -> None:
+        requests = self._cache_hits + self._cache_misses
+        if self._disk_cache is None or not requests:
+            return
+        logger.info(
+            "Thumbnail disk cache: %d hits, %d misses, %.0f%% hit rate",
+            self._cache_hits,
+            self._cache_misses,
+            100.0 * self._cache_hits / requests
+            )
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _placeholder_pixmap(self, width: int, height: int) -> QtGui.QPixmap:
+        key = ("placeholder", width, height)
+        pixmap = self._cache.lookup(key)
+        if pixmap is None:
+            pixmap = QtGui.QPixmap(width, height)
+            pixmap.fill(QtGui.QColor(60, 60, 60))
+            self._cache.insert(key, pixmap)
+        return pixmap
+
+
+class ThumbnailDelegate(QtGui.QStyledItemDelegate):
+    """
+    Paint the thumbnail cells of the table.
+    The view paints only the visible cells, so only those are decoded.
+    """
+    def __init__(self, loader: ThumbnailLoader, parent=None):
+        QtGui.QStyledItemDelegate.__init__(self, parent)
+        self._loader = loader
+
+    def paint(self, painter, option, index) -> None:
+        image = index.data(THUMBNAIL_ROLE)
+        if image is None:
+            QtGui.QStyledItemDelegate.paint(self, painter, option, index)
+            return
+
+        digest, source = image
+        rect = option.rect
+        pixmap = self._loader.pixmap(
+            index.row(), index.column(), digest, source, rect.width(), rect.height()
+            )
+        if pixmap is None or pixmap.isNull():
+            return
+
+        # left aligned and vertically centered, like a decoration
+        y = rect.y() + (rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(rect.x(), y, pixmap)
@@ -34,6 +34,16 @@ class Ui_Dialog(object):
         self.button_load_path.setFocusPolicy(QtCore.Qt.NoFocus)
         self.horizontal_layout_1.addWidget(self.button_load_path)
         
+        self.progress_bar_load = QtGui.QProgressBar(Dialog)
+        self.progress_bar_load.setVisible(False)
+        self.horizontal_layout_1.addWidget(self.progress_bar_load)
+        
+        self.button_cancel_load = QtGui.QPushButton(Dialog)
+        self.button_cancel_load.setText("Cancel")
+        self.button_cancel_load.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.button_cancel_load.setVisible(False)
+        self.horizontal_layout_1.addWidget(self.button_cancel_load)
+        
         self.main_layout.addLayout(self.horizontal_layout_1)
         
         self.horizontal_layout_2 = QtGui.QHBoxLayout()
@@ -74,9 +84,9 @@ class Ui_Dialog(object):
         
         self.main_layout.addLayout(self.horizontal_layout_2)
         
-        self.table_widget = QtGui.QTableWidget(Dialog)
+        self.table_view = QtGui.QTableView(Dialog)
         
-        self.main_layout.addWidget(self.table_widget)
+        self.main_layout.addWidget(self.table_view)
         
         self.horizontal_layout_3 = QtGui.QHBoxLayout()
         
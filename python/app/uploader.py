@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script uploads the published movies to ShotGrid concurrently.
+Each worker thread has its own ShotGrid connection,
+a connection can't be shared by threads sending requests at the same time.
+
+Failed uploads are retried with an exponential backoff.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import sgtk
+
+from .constants import UPLOAD_BACKOFF, UPLOAD_RETRIES, UPLOAD_WORKERS
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class Uploader:
+    """
+    Upload movies to the 'sg_uploaded_movie' field of the versions
+    with a bounded number of concurrent uploads.
+    """
+    def __init__(
+        self,
+        max_workers: int = UPLOAD_WORKERS,
+        retries: int = UPLOAD_RETRIES,
+        backoff: float = UPLOAD_BACKOFF,
+        connect=None,
+        started=None,
+        progress=None
+        ):
+        """
+        Args:
+            max_workers (int): number of concurrent uploads
+            retries (int): number of retries of a failed upload
+            backoff (float): seconds to wait before the first retry,
+                doubled on every retry
+            connect (callable): creates a ShotGrid connection for a worker,
+                a connection of the current user by default
+            started (callable): called as started(path) on the worker thread
+                when an upload starts
+            progress (callable): called as progress(done, total, path, error)
+                on the worker thread when an upload is finished,
+                error is None on success
+        """
+        self._max_workers = max(1, max_workers)
+        self._retries = retries
+        self._backoff = backoff
+        self._connect = connect or sgtk.util.shotgun.create_sg_connection
+        self._started = started
+        self._progress = progress
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._submitted = 0
+        self._done = 0
+        self._failures = {}
+
+    def _connection(self):
+        # a connection per worker thread, created on its first upload
+        sg = getattr(self._local, "sg", None)
+        if sg is None:
+            sg = self._local.sg = self._connect()
+        return sg
+
+    def upload(self, version_id: int, path: str) -> None:
+        """
+        Upload a movie, retrying with backoff if it fails.
+
+        Args:
+            version_id (int): id of the version
+            path (str): path to the movie
+        """
+        for attempt in range(self._retries + 1):
+            try:
+                self._connection().upload(
+                    "Version", version_id, path, "sg_uploaded_movie"
+                    )
+                return
+            except Exception as e:
+                if attempt == self._retries:
+                    raise
+                # a fresh connection, the failed one may be broken
+                self._local.sg = None
+                delay = self._backoff * 2 ** attempt
+                delay += random.uniform(0, self._backoff)
+                logger.warning(
+                    "Upload of %s failed, retrying in %.1fs (%d/%d): %s",
+                    path,
+                    delay,
+                    attempt + 1,
+                    self._retries,
+                    e
+                    )
+                time.sleep(delay)
+
+    def submit(self, row: int, version_id: int, path: str) -> None:
+        """
+        Start uploading a movie in the background.
+        The upload starts as soon as a worker is free.
+
+        Args:
+            row (int): row of the movie, to report the failure
+            version_id (int): id of the version
+            path (str): path to the movie
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+            self._submitted += 1
+            future = self._executor.submit(self._timed_upload, version_id, path)
+        future.add_done_callback(lambda future: self._on_done(row, path, future))
+
+    def _on_done(self, row: int, path: str, future) -> None:
+        # called on the worker thread which ran the upload
+        error = None
+        try:
+            size, elapsed = future.result()
+        except Exception as e:
+            error = str(e)
+
+        with self._lock:
+            self._done += 1
+            done, total = self._done, self._submitted
+            if error is not None:
+                self._failures[row] = error
+
+        if error is not None:
+            logger.error("Failed to upload %s (%d/%d): %s", path, done, total, error)
+        else:
+            logger.info(
+                "Uploaded %s (%d/%d), %.1f MB in %.1fs",
+                path,
+                done,
+                total,
+                size / 1024 / 1024,
+                elapsed
+                )
+        if self._progress is not None:
+            self._progress(done, total, path, error)
+
+    def wait(self) -> dict:
+        """
+        Wait for the submitted uploads.
+
+        Returns:
+            dict: {row: error message} of the failed uploads
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        with self._lock:
+            failures = self._failures
+            self._failures = {}
+            self._submitted = 0
+            self._done = 0
+        return failures
+
+    def upload_all(self, uploads: list) -> dict:
+        """
+        Upload the movies concurrently.
+
+        Args:
+            uploads (list): [(row, version id, path)]
+
+        Returns:
+            dict: {row: error message} of the failed uploads
+        """
+        for row, version_id, path in uploads:
+            self.submit(row, version_id, path)
+        return self.wait()
+
+    def _timed_upload(self, version_id: int, path: str) -> tuple:
+        if self._started is not None:
+            self._started(path)
+        start = time.perf_counter()
+        self.upload(version_id, path)
+        return os.path.getsize(path), time.perf_counter() - start
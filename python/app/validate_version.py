@@ -11,17 +11,59 @@ __author__ = "Juno Park"
 __github__ = "https://github.com/junopark00"
 
 
+import logging
+
+import sgtk
+
+from .log_summary import LogSummary
+from .version_code import index_version_codes
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
 class ValidateVersion:
     def __init__(
         self, 
         shotgrid_data: list, 
         checked_data: dict, 
-        colorspace: str
+        colorspace: str,
+        latest_versions: dict = None,
+        summary: LogSummary = None
         ):
+        """
+        Args:
+            shotgrid_data (list): 'Version' entities with the 'code' field
+            checked_data (dict): checked rows {'row': data}
+            colorspace (str): selected colorspace
+            latest_versions (dict): {(seq_shot_name, colorspace, type): version},
+                used instead of parsing the shotgrid data if given
+            summary (LogSummary): summary to add the counts and phases to,
+                logged by the validation itself if not given
+        """
         self._shotgrid_data = shotgrid_data
         self._checked_data = checked_data
         self._selected_colorspace = colorspace
+        self._latest_versions = latest_versions
+        self._summary = summary
         self._validated_version = None
+        self.malformed_codes = []
+        
+    def latest_versions(self) -> dict:
+        """
+        Parse the sg data and get the latest version of each shot.
+        
+        Returns:
+            dict: {(seq_shot_name, colorspace, type): latest version}
+        """
+        if self._latest_versions is not None:
+            return self._latest_versions
+        
+        exist_version, self.malformed_codes = index_version_codes(
+            data['code'] for data in self._shotgrid_data
+            )
+        return exist_version
         
     def validate_version(self) -> dict:
         """
@@ -32,51 +74,49 @@ class ValidateVersion:
         Returns:
             dict: validated data {'row': version}
         """
+        summary = self._summary or LogSummary(logger, "Validate version")
         validated_data = {}
-        # parse shotgrid data
-        exist_version = {}
-        for data in self._shotgrid_data:
-            version_name = data['code']  # seq001_shot001_sRGB_org_v001
-            version_num = int(version_name.split('_')[-1][1:]) # 1
-            seq_shot_name = (
-                f"{version_name.split('_')[0]}_"
-                f"{version_name.split('_')[1]}"
-                )
-            print("seq_shot_name: ", seq_shot_name)
-            colorspace = version_name.split("_")[2] # sRGB
-            _type = version_name.split("_")[3]
-            
-            if seq_shot_name not in exist_version:
-                exist_version[seq_shot_name] = {}
-            if colorspace not in exist_version[seq_shot_name]:
-                exist_version[seq_shot_name][colorspace] = {}
-            if _type not in exist_version[seq_shot_name][colorspace]:
-                exist_version[seq_shot_name][colorspace][_type] = []
-            
-            exist_version[seq_shot_name][colorspace][_type].append(version_num)
-            print("exist_version: ", exist_version)
-            # exist_version = {'seq001_shot001': {'sRGB': {'org': [1, 2, 3]}}}
+        # exist_version = {('seq001_shot001', 'sRGB', 'org'): 3}
+        with summary.phase("parse"):
+            exist_version = self.latest_versions()
+        summary.count("versions", len(self._shotgrid_data))
+        summary.count("malformed", len(self.malformed_codes))
 
+        # checked once, the loop spends no time on logging when debug is off
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
         # parse checked data
-        for row, column in self._checked_data.items():
-            seq_shot_name = column["shot_name"]
-            colorspace = self._selected_colorspace
-            _type = column["type"]
-            file_name = f"{seq_shot_name}_{colorspace}_{_type}"
-            print("file_name: ", file_name)
-            
-            # compare the version
-            if (seq_shot_name in exist_version and 
-                colorspace in exist_version[seq_shot_name] and 
-                _type in exist_version[seq_shot_name][colorspace]):
+        with summary.phase("compare"):
+            for row, column in self._checked_data.items():
+                seq_shot_name = column["shot_name"]
+                colorspace = self._selected_colorspace
+                _type = column["type"]
                 
-                latest_version = max(exist_version[seq_shot_name][colorspace][_type])
-                print("latest_version: ", latest_version)
-                new_version = latest_version + 1
-            else:
-                new_version = 1
-                
-            validated_data[row] = new_version
+                # compare the version
+                latest_version = exist_version.get((seq_shot_name, colorspace, _type))
+                if latest_version is not None:
+                    new_version = latest_version + 1
+                else:
+                    new_version = 1
+                    
+                if debug:
+                    logger.debug(
+                        "%s_%s_%s: latest version %s, new version %d",
+                        seq_shot_name,
+                        colorspace,
+                        _type,
+                        latest_version,
+                        new_version
+                        )
+                    
+                validated_data[row] = new_version
+        
+        summary.count("rows", len(validated_data))
+        summary.count(
+            "new", sum(1 for version in validated_data.values() if version == 1)
+            )
+        if self._summary is None:
+            summary.log()
         
         return validated_data
     
@@ -84,4 +124,4 @@ class ValidateVersion:
     def validated_version(self) -> dict:
         if self._validated_version is None:
             self._validated_version = self.validate_version()
-        return self._validated_version
\ No newline at end of file
+        return self._validated_version
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script parses the code of 'Version' entities.
+ex) seq001_shot001_sRGB_org_v001
+
+The codes are parsed with a single precompiled pattern,
+and the codes that don't follow the naming are reported, not raised.
+
+Run this script to benchmark the parser on synthetic codes.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import re
+import time
+
+
+# seq_shot_colorspace_type[_...]_vNNN, the tokens between type and
+# the version are ignored
+_VERSION_CODE = re.compile(
+    r"([^_]+)_([^_]+)_([^_]+)_([^_]+)(?:_.*)?_v(\d+)"
+    )
+
+
+class VersionCode:
+    """
+    Parsed code of a 'Version' entity.
+    """
+    __slots__ = ("seq", "shot", "colorspace", "type", "number")
+
+    def __init__(self, seq: str, shot: str, colorspace: str, _type: str, number: int):
+        self.seq = seq
+        self.shot = shot
+        self.colorspace = colorspace
+        self.type = _type
+        self.number = number
+
+    @property
+    def seq_shot_name(self) -> str:
+        return f"{self.seq}_{self.shot}"
+
+    @property
+    def key(self) -> tuple:
+        """
+        (seq_shot_name, colorspace, type) of the version.
+        """
+        return (self.seq_shot_name, self.colorspace, self.type)
+
+    def __repr__(self) -> str:
+        return (
+            f"VersionCode({self.seq!r}, {self.shot!r}, {self.colorspace!r}, "
+            f"{self.type!r}, {self.number})"
+            )
+
+
+def parse_version_code(code: str) -> VersionCode:
+    """
+    Parse the code of a 'Version' entity.
+
+    Returns:
+        VersionCode: parsed code, None if the code doesn't follow the naming
+    """
+    match = _VERSION_CODE.fullmatch(code)
+    if match is None:
+        return None
+    seq, shot, colorspace, _type, number = match.groups()
+    return VersionCode(seq, shot, colorspace, _type, int(number))
+
+
+def index_version_codes(codes) -> tuple:
+    """
+    Get the latest version of each shot in a single pass over the codes.
+
+    Args:
+        codes (iterable): codes of 'Version' entities
+
+    Returns:
+        tuple: ({(seq_shot_name, colorspace, type): latest version},
+            [malformed codes])
+    """
+    latest_versions = {}
+    malformed = []
+    for code in codes:
+        version_code = parse_version_code(code) if code else None
+        if version_code is None:
+            malformed.append(code)
+            continue
+
+        key = version_code.key
+        if version_code.number > latest_versions.get(key, 0):
+            latest_versions[key] = version_code.number
+
+    return latest_versions, malformed
+
+
+def benchmark(count: int = 100000, repeat: int = 5) -> None:
+    """
+    Benchmark the parser on synthetic codes, 1% of them malformed.
+
+    Args:
+        count (int): number of codes
+        repeat (int): number of runs, the best one is reported
+    """
+    colorspaces = ["sRGB", "ACEScg", "rec709"]
+    types = ["org", "src", "edit"]
+    codes = []
+    for i in range(count):
+        if i % 100 == 99:
+            codes.append(f"malformed{i}")
+            continue
+        # 2000 shots of 20 sequences, with several versions each
+        shot = i % 2000
+        codes.append(
+            f"seq{shot // 100:03d}_shot{shot:04d}_"
+            f"{colorspaces[i // 2000 % 3]}_{types[i // 6000 % 3]}_"
+            f"v{i // 18000 + 1:03d}"
+            )
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        latest_versions, malformed = index_version_codes(codes)
+        times.append(time.perf_counter() - start)
+
+    best = min(times)
+    print(
+        f"{count} codes: {best * 1000:.1f} ms, "
+        f"{best / count * 1e6:.2f} us per code, "
+        f"{len(latest_versions)} shots, {len(malformed)} malformed"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script keeps a local index of the latest 'Version' of each shot.
+The index is stored in a SQLite database in the user's cache directory
+and maps (seq_shot_name, colorspace, type) to the latest version number.
+
+Only the versions created or updated since the last sync are fetched,
+so validating the versions doesn't query the whole project every time.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import sqlite3
+import datetime
+import contextlib
+
+import sgtk
+
+from .version_code import index_version_codes
+from .version_query import find_updated_versions
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    project_id INTEGER NOT NULL,
+    shot TEXT NOT NULL,
+    colorspace TEXT NOT NULL,
+    type TEXT NOT NULL,
+    max_version INTEGER NOT NULL,
+    PRIMARY KEY (project_id, shot, colorspace, type)
+);
+CREATE TABLE IF NOT EXISTS sync (
+    project_id INTEGER PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+class VersionIndex:
+    """
+    Latest version of each (seq_shot_name, colorspace, type) of a project.
+
+    The latest version only goes up, a deleted version keeps its number
+    in the index, so a version number is never used twice.
+    """
+    # versions updated around the last sync can be missed
+    # if their time is not yet visible, so the sync is overlapped
+    SYNC_OVERLAP = datetime.timedelta(minutes=5)
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): path to the SQLite database
+        """
+        self._db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # several dialogs can share the index, wait for their writes
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def last_sync(self, project_id: int) -> datetime.datetime:
+        """
+        Get the time of the latest version fetched for the project.
+
+        Returns:
+            datetime: time of the last sync, None if never synced
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT synced_at FROM sync WHERE project_id = ?",
+                (project_id,)
+                ).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0])
+
+    def refresh(self, sg, project: dict) -> int:
+        """
+        Fetch the versions created or updated since the last sync
+        and update the latest versions.
+
+        Args:
+            sg (Shotgun): ShotGrid connection
+            project (dict): project entity
+
+        Returns:
+            int: number of fetched versions
+        """
+        project_id = project["id"]
+        since = self.last_sync(project_id)
+        versions = find_updated_versions(
+            sg,
+            project,
+            since - self.SYNC_OVERLAP if since else None,
+            fields=["code", "created_at", "updated_at"]
+            )
+
+        synced_at = since
+        for data in versions:
+            # the server time of the fetched versions, not the local clock
+            for field in ("created_at", "updated_at"):
+                if data.get(field) and (synced_at is None or data[field] > synced_at):
+                    synced_at = data[field]
+
+        latest_versions, malformed = index_version_codes(
+            data.get("code") for data in versions
+            )
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO versions "
+                "(project_id, shot, colorspace, type, max_version) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (project_id, shot, colorspace, type) "
+                "DO UPDATE SET max_version = "
+                "max(max_version, excluded.max_version)",
+                [
+                    (project_id, shot, colorspace, _type, version)
+                    for (shot, colorspace, _type), version in latest_versions.items()
+                    ]
+                )
+            if synced_at is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync (project_id, synced_at) "
+                    "VALUES (?, ?)",
+                    (project_id, synced_at.isoformat())
+                    )
+
+        logger.debug(
+            "Version index of project %s refreshed with %d versions, "
+            "%d codes not following the naming",
+            project_id,
+            len(versions),
+            len(malformed)
+            )
+
+        return len(versions)
+
+    def latest_versions(self, project_id: int, keys: list) -> dict:
+        """
+        Get the latest versions of the given shots.
+
+        Args:
+            project_id (int): id of the project
+            keys (list): [(seq_shot_name, colorspace, type)]
+
+        Returns:
+            dict: {(seq_shot_name, colorspace, type): latest version},
+                the shots without a version are not included
+        """
+        latest_versions = {}
+        with self._connect() as conn:
+            for key in set(keys):
+                row = conn.execute(
+                    "SELECT max_version FROM versions "
+                    "WHERE project_id = ? AND shot = ? "
+                    "AND colorspace = ? AND type = ?",
+                    (project_id,) + tuple(key)
+                    ).fetchone()
+                if row is not None:
+                    latest_versions[key] = row[0]
+        return latest_versions
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script queries the 'Version' entities of the checked shots.
+The query is filtered on ShotGrid by the version code prefixes,
+so only the versions of the checked shots, colorspace and type are fetched,
+regardless of the number of versions in the project.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import datetime
+
+import sgtk
+
+from .constants import VERSION_QUERY_BATCH_SIZE, VERSION_QUERY_PAGE_SIZE
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+def version_code_prefix(shot_name: str, colorspace: str, _type: str) -> str:
+    """
+    Get the code prefix of the versions. ex) seq001_shot001_sRGB_org_v
+    """
+    return f"{shot_name}_{colorspace}_{_type}_v"
+
+
+def find_versions(
+    sg,
+    project: dict,
+    prefixes: list,
+    fields: list = None,
+    batch_size: int = VERSION_QUERY_BATCH_SIZE,
+    page_size: int = VERSION_QUERY_PAGE_SIZE
+    ) -> list:
+    """
+    Find the versions whose code starts with one of the prefixes.
+    The prefixes are queried in batches and every batch is read page by page,
+    so the number of requests is bounded by the selection.
+
+    Args:
+        sg (Shotgun): ShotGrid connection
+        project (dict): project entity
+        prefixes (list): version code prefixes
+        fields (list): fields to return, 'code' by default
+        batch_size (int): number of prefixes per query
+        page_size (int): number of versions per page
+
+    Returns:
+        list: version entities
+    """
+    fields = fields or ["code"]
+    prefixes = sorted(set(prefixes))
+
+    versions = []
+    requests = 0
+    for start in range(0, len(prefixes), batch_size):
+        filters = [
+            ["project", "is", project],
+            {
+                "filter_operator": "any",
+                "filters": [
+                    ["code", "starts_with", prefix]
+                    for prefix in prefixes[start:start + batch_size]
+                    ],
+                },
+            ]
+        result, pages = _find_paged(sg, filters, fields, page_size)
+        versions.extend(result)
+        requests += pages
+
+    logger.debug(
+        "Found %d versions of %d prefixes in %d requests",
+        len(versions),
+        len(prefixes),
+        requests
+        )
+
+    return versions
+
+
+def find_updated_versions(
+    sg,
+    project: dict,
+    since: datetime.datetime = None,
+    fields: list = None,
+    page_size: int = VERSION_QUERY_PAGE_SIZE
+    ) -> list:
+    """
+    Find the versions of the project created or updated after the given time.
+
+    Args:
+        sg (Shotgun): ShotGrid connection
+        project (dict): project entity
+        since (datetime): time of the last query, every version if None
+        fields (list): fields to return, 'code' by default
+        page_size (int): number of versions per page
+
+    Returns:
+        list: version entities
+    """
+    fields = fields or ["code"]
+    filters = [["project", "is", project]]
+    if since is not None:
+        filters.append({
+            "filter_operator": "any",
+            "filters": [
+                ["created_at", "greater_than", since],
+                ["updated_at", "greater_than", since],
+                ],
+            })
+
+    versions, requests = _find_paged(sg, filters, fields, page_size)
+    logger.debug(
+        "Found %d versions updated since %s in %d requests",
+        len(versions),
+        since,
+        requests
+        )
+
+    return versions
+
+
+def _find_paged(sg, filters: list, fields: list, page_size: int) -> tuple:
+    """
+    Find the versions page by page.
+
+    Returns:
+        tuple: (version entities, number of requests)
+    """
+    versions = []
+    page = 1
+    while True:
+        # a stable order, so the pages don't overlap or skip
+        result = sg.find(
+            "Version",
+            filters,
+            fields,
+            order=[{"field_name": "id", "direction": "asc"}],
+            limit=page_size,
+            page=page
+            )
+        versions.extend(result)
+        if len(result) < page_size:
+            return versions, page
+        page += 1
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script defines the background workers of the app.
+The workers run off the Qt main thread and report back through signals,
+so the ShotGrid Desktop window stays responsive.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import time
+import threading
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import cleanup
+from .excel_manager import ColumnStore, ExcelManager, SheetSnapshot
+from .generate_converter import GenerateConverter
+from .publish import Publish
+from .thumbnails import image_key
+from .version_index import VersionIndex
+from .xlsx_reader import (
+    iter_image_data,
+    read_row_count_hint,
+    read_sheet_images,
+    read_sheet_layout,
+    )
+
+
+# Set standard sgtk logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class LoadExcelThread(QtCore.QThread):
+    """
+    Load an excel file and stream its rows to the UI in batches.
+
+    The rows are sent first, so the table fills up while the file is parsed.
+    The layout and images follow once every row has been read.
+    """
+    header_loaded = QtCore.Signal(object)
+    rows_loaded = QtCore.Signal(object)
+    progress = QtCore.Signal(int, int)
+    layout_loaded = QtCore.Signal(object, object)
+    images_loaded = QtCore.Signal(object)
+    load_finished = QtCore.Signal(object)
+    load_failed = QtCore.Signal(str)
+
+    # a batch is sent when it is full or when this many seconds passed
+    BATCH_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        excel_manager: ExcelManager,
+        excel_path: str,
+        read_only: bool,
+        batch_size: int = 1000,
+        parent=None
+        ):
+        QtCore.QThread.__init__(self, parent)
+        self._excel_manager = excel_manager
+        self._excel_path = excel_path
+        self._read_only = read_only
+        self._batch_size = batch_size
+        self._canceled = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Ask the worker to stop. The rows already sent are not taken back.
+        """
+        self._canceled.set()
+
+    def is_canceled(self) -> bool:
+        return self._canceled.is_set()
+
+    def run(self) -> None:
+        try:
+            snapshot = self._load()
+        except Exception as e:
+            logger.exception("Failed to load Excel file: %s" % self._excel_path)
+            self.load_failed.emit(str(e))
+            return
+
+        if snapshot is not None:
+            self.load_finished.emit(snapshot)
+
+    def _load(self) -> SheetSnapshot:
+        """
+        Load the excel file and emit the loaded data.
+
+        Returns:
+            SheetSnapshot: snapshot without cell values, None if canceled.
+                The cell values are only sent through rows_loaded.
+        """
+        if not self._read_only:
+            return self._load_editable()
+
+        snapshot = SheetSnapshot()
+        start = time.perf_counter()
+
+        # exclude the header row
+        total = max(read_row_count_hint(self._excel_path) - 1, 0)
+
+        rows = self._excel_manager.stream_rows(self._excel_path)
+        try:
+            snapshot.header_labels = list(next(rows, ()))
+            self.header_loaded.emit(snapshot.header_labels)
+            if not self._emit_rows(rows, total):
+                return None
+        finally:
+            # close the workbook even if canceled in the middle
+            rows.close()
+        snapshot.timings["cell_values"] = time.perf_counter() - start
+
+        phase_start = time.perf_counter()
+        layout = read_sheet_layout(self._excel_path)
+        snapshot.row_heights = layout.row_heights
+        snapshot.column_widths = layout.column_widths
+        self.layout_loaded.emit(snapshot.row_heights, snapshot.column_widths)
+        snapshot.timings["layout"] = time.perf_counter() - phase_start
+
+        if self.is_canceled():
+            return None
+
+        phase_start = time.perf_counter()
+        snapshot.images = layout.images
+        self._emit_images(snapshot)
+        snapshot.timings["images"] = time.perf_counter() - phase_start
+
+        snapshot.timings["total"] = time.perf_counter() - start
+        self._excel_manager.log_timings(self._excel_path, snapshot)
+
+        return snapshot
+
+    def _load_editable(self) -> SheetSnapshot:
+        """
+        Load the whole workbook in edit mode, then emit it in batches.
+        """
+        snapshot = self._excel_manager.load_excel(self._excel_path)
+        store = snapshot.cell_values
+
+        self.header_loaded.emit(snapshot.header_labels)
+        if not self._emit_rows(store.rows(), store.row_count):
+            return None
+        self.layout_loaded.emit(snapshot.row_heights, snapshot.column_widths)
+        self._emit_images(snapshot)
+
+        # the rows are owned by the table model from now on
+        snapshot.cell_values = ColumnStore()
+
+        return snapshot
+
+    def _emit_images(self, snapshot: SheetSnapshot) -> None:
+        """
+        Emit the images with their content keys,
+        so the keys are not computed on the main thread.
+        The bytes are read one image at a time and not kept,
+        the thumbnails read them again from the file when needed.
+
+        The images of the rows are owned by the table model from now on,
+        the snapshot only keeps the header images the table doesn't show.
+
+        Args:
+            snapshot (SheetSnapshot): snapshot with the loaded images
+        """
+        image_data = iter_image_data(
+            self._excel_path, [media_path for _, _, media_path in snapshot.images]
+            )
+        self.images_loaded.emit([
+            (row, column, image_key(data), media_path)
+            for (row, column, _), (media_path, data) in zip(snapshot.images, image_data)
+            ])
+        snapshot.images = [image for image in snapshot.images if image[0] < 2]
+
+    def _emit_rows(self, rows, total: int) -> bool:
+        """
+        Emit the rows in batches.
+
+        Args:
+            rows (iterable): rows of cell values
+            total (int): expected number of rows, 0 if unknown
+
+        Returns:
+            bool: False if canceled
+        """
+        batch = []
+        loaded = 0
+        last_emit = time.perf_counter()
+        for row in rows:
+            if self.is_canceled():
+                return False
+
+            batch.append(row)
+            now = time.perf_counter()
+            if (len(batch) >= self._batch_size or
+                now - last_emit >= self.BATCH_INTERVAL):
+                loaded += len(batch)
+                self.rows_loaded.emit(batch)
+                self.progress.emit(loaded, max(total, loaded))
+                batch = []
+                last_emit = now
+
+        if batch:
+            loaded += len(batch)
+            self.rows_loaded.emit(batch)
+        self.progress.emit(loaded, loaded)
+
+        return True
+
+
+class SaveExcelThread(QtCore.QThread):
+    """
+    Save the excel file off the main thread.
+
+    Only the changed cells are patched into the file when given,
+    otherwise the whole table is written.
+    patch_failed is emitted if the file can't be patched,
+    so the caller can save the whole table instead.
+    When the whole table is written, the images are stored anew,
+    so save_finished also gives where they are in the saved file.
+    """
+    save_finished = QtCore.Signal(str, object, object)
+    patch_failed = QtCore.Signal(str)
+    save_failed = QtCore.Signal(str)
+
+    def __init__(
+        self,
+        excel_manager: ExcelManager,
+        excel_path: str,
+        version_up: bool,
+        changed_cells: dict = None,
+        table_data: tuple = None,
+        parent=None
+        ):
+        """
+        Args:
+            excel_manager (ExcelManager): manager of the loaded excel file
+            excel_path (str): path to the excel file
+            version_up (bool): whether to version up the file
+            changed_cells (dict): {(row, column): text} to patch
+            table_data (tuple): (header data, cell data, images)
+                to write the whole table
+        """
+        QtCore.QThread.__init__(self, parent)
+        self._excel_manager = excel_manager
+        self._excel_path = excel_path
+        self._version_up = version_up
+        self._changed_cells = changed_cells
+        self._table_data = table_data
+
+    def run(self) -> None:
+        try:
+            if self._table_data is not None:
+                header_data, cell_data, images = self._table_data
+                save_path = self._excel_manager.save_excel(
+                    header_data, cell_data, self._excel_path, self._version_up, images
+                    )
+            else:
+                try:
+                    save_path = self._excel_manager.save_excel_incremental(
+                        self._changed_cells, self._excel_path, self._version_up
+                        )
+                except ValueError as e:
+                    logger.warning("Failed to patch the excel file: %s" % e)
+                    self.patch_failed.emit(str(e))
+                    return
+        except Exception as e:
+            logger.exception("Failed to save Excel file: %s" % self._excel_path)
+            self.save_failed.emit(str(e))
+            return
+
+        # the images of a patched file are kept as they are
+        saved_images = None
+        if self._table_data is not None:
+            saved_images = read_sheet_images(save_path)
+        self.save_finished.emit(save_path, self._changed_cells, saved_images)
+
+
+class PublishThread(QtCore.QThread):
+    """
+    Run the converters and publish the shots in batches as they're converted.
+
+    The jobs are submitted and tracked here, locally or on the farm,
+    so the dialog stays responsive while the shots are rendered and uploaded.
+    The specs of the completed converters are cleaned up here too,
+    so they're removed even if the dialog was closed in the meantime.
+    """
+    shot_completed = QtCore.Signal(int, int)
+    publish_finished = QtCore.Signal(object)
+    publish_failed = QtCore.Signal(str)
+
+    def __init__(
+        self,
+        generate_converter: GenerateConverter,
+        converters: list,
+        grouped_data: list,
+        colorspace: str,
+        priorities: dict = None,
+        cliplib: bool = False,
+        parent=None
+        ):
+        """
+        Args:
+            generate_converter (GenerateConverter): runs the converters
+            converters (list): paths of the converter specs,
+                in the order of the grouped data
+            grouped_data (list): data of the shots to publish
+            colorspace (str): selected colorspace
+            priorities (dict): {converter: priority} of the jobs
+            cliplib (bool): whether to clean up the cliplib too
+        """
+        QtCore.QThread.__init__(self, parent)
+        self._generate_converter = generate_converter
+        self._converters = converters
+        self._grouped_data = grouped_data
+        self._colorspace = colorspace
+        self._priorities = priorities
+        self._cliplib = cliplib
+        self._canceled = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Stop waiting for the running converters.
+        The shots already converted are still published.
+        """
+        self._canceled.set()
+
+    def run(self) -> None:
+        completed_converter = []
+        try:
+            # created on this thread to use this thread's ShotGrid connection
+            publish = Publish(self._grouped_data, self._colorspace)
+            converter_rows = {
+                converter: row for row, converter in enumerate(self._converters)
+                }
+            published = []
+
+            def report(rows):
+                if not rows:
+                    return
+                published.extend(rows)
+                self.shot_completed.emit(len(published), len(self._converters))
+
+            # the converted shots are published in batches,
+            # when a batch is full or its first shot waited long enough
+            def publish_converted(converter):
+                logger.debug("Queueing %s to publish" % converter)
+                report(publish.queue_rows([converter_rows[converter]]))
+
+            completed_converter = self._generate_converter.execute(
+                self._converters,
+                on_completed=publish_converted,
+                priorities=self._priorities,
+                on_poll=lambda: report(publish.flush_rows(due_only=True)),
+                canceled=self._canceled
+                )
+
+            # publish the last shots and wait for the uploads still running
+            report(publish.flush_rows())
+            publish.wait()
+        except Exception as e:
+            logger.exception("Failed to publish")
+            self.publish_failed.emit(str(e))
+            return
+        finally:
+            self._cleanup(completed_converter)
+
+        self.publish_finished.emit(completed_converter)
+
+    def _cleanup(self, completed_converter: list) -> None:
+        logger.debug("Cleaning up")
+        try:
+            cleanup.cleanup_temp_files(completed_converter, self._cliplib)
+        except OSError as e:
+            logger.warning("Failed to clean up the converters: %s" % e)
+        logger.debug("Cleaned up")
+
+
+class RefreshVersionIndexThread(QtCore.QThread):
+    """
+    Fetch the versions updated since the last sync into the version index.
+
+    The first sync pages every version of the project,
+    so it's never run on the main thread.
+    """
+    refresh_finished = QtCore.Signal(int)
+    refresh_failed = QtCore.Signal(str)
+
+    def __init__(self, version_index: VersionIndex, project: dict, parent=None):
+        """
+        Args:
+            version_index (VersionIndex): index to refresh
+            project (dict): project entity
+        """
+        QtCore.QThread.__init__(self, parent)
+        self._version_index = version_index
+        self._project = project
+
+    def run(self) -> None:
+        try:
+            # this thread's ShotGrid connection, the connections are per thread
+            sg = sgtk.platform.current_bundle().shotgun
+            count = self._version_index.refresh(sg, self._project)
+        except Exception as e:
+            logger.exception("Failed to refresh the version index")
+            self.refresh_failed.emit(str(e))
+            return
+
+        self.refresh_finished.emit(count)
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script reads the layout of an excel file directly from the xlsx package.
+It streams the sheet xml, so the memory stays flat regardless of the sheet size.
+
+openpyxl's read-only mode does not expose row heights, column widths or images,
+so these are parsed here while the cell values are streamed by openpyxl.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+XDR_NS = "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+# openpyxl returns this width for columns without a <col> definition
+DEFAULT_COLUMN_WIDTH = 13
+
+_CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+
+
+class SheetLayout:
+    """
+    Row heights, column widths and embedded images of a sheet.
+    The images are (row, column, media path), their bytes stay in the file.
+    """
+    def __init__(self):
+        self.max_row = 0
+        self.max_column = 0
+        self.row_heights = {}
+        self.column_widths = {}
+        self.images = []
+
+
+def column_index(letters: str) -> int:
+    """
+    Convert column letters to a 1-based column index. ex) 'AB' -> 28
+    """
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+
+def _part_rels_path(part_path: str) -> str:
+    """
+    Get the path of the relationship part for the given part.
+    ex) xl/worksheets/sheet1.xml -> xl/worksheets/_rels/sheet1.xml.rels
+    """
+    part_dir, part_name = posixpath.split(part_path)
+    return posixpath.join(part_dir, "_rels", f"{part_name}.rels")
+
+
+def _read_rels(archive: zipfile.ZipFile, part_path: str) -> dict:
+    """
+    Read the relationships of a part.
+
+    Returns:
+        dict: {relationship id: absolute part path}
+    """
+    rels_path = _part_rels_path(part_path)
+    if rels_path not in archive.namelist():
+        return {}
+
+    part_dir = posixpath.dirname(part_path)
+    rels = {}
+    root = ET.fromstring(archive.read(rels_path))
+    for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target")
+        if rel.get("TargetMode") == "External":
+            continue
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(part_dir, target))
+        rels[rel.get("Id")] = target
+    return rels
+
+
+def active_sheet_path(archive: zipfile.ZipFile) -> str:
+    """
+    Get the path of the active worksheet in the package.
+    """
+    workbook_path = "xl/workbook.xml"
+    root = ET.fromstring(archive.read(workbook_path))
+
+    active_tab = 0
+    view = root.find(f"{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView")
+    if view is not None:
+        active_tab = int(view.get("activeTab", 0))
+
+    sheets = root.findall(f"{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet")
+    if not sheets:
+        raise ValueError("No worksheet found in the excel file.")
+    if active_tab >= len(sheets):
+        active_tab = 0
+
+    rels = _read_rels(archive, workbook_path)
+    return rels[sheets[active_tab].get(f"{{{REL_NS}}}id")]
+
+
+def _read_drawing_images(archive: zipfile.ZipFile, drawing_path: str) -> list:
+    """
+    Read the images anchored in a drawing part.
+
+    Returns:
+        list: [(row, column, media path)], row and column are 1-based,
+            the media path is the member of the image in the package
+    """
+    rels = _read_rels(archive, drawing_path)
+    root = ET.fromstring(archive.read(drawing_path))
+
+    images = []
+    for anchor in root:
+        anchor_from = anchor.find(f"{{{XDR_NS}}}from")
+        blip = anchor.find(f".//{{{A_NS}}}blip")
+        if anchor_from is None or blip is None:
+            continue
+
+        media_path = rels.get(blip.get(f"{{{REL_NS}}}embed"))
+        if media_path is None:
+            continue
+
+        row = int(anchor_from.find(f"{{{XDR_NS}}}row").text) + 1
+        column = int(anchor_from.find(f"{{{XDR_NS}}}col").text) + 1
+        images.append((row, column, media_path))
+    return images
+
+
+def _read_sheet_images(
+    archive: zipfile.ZipFile, 
+    sheet_path: str, 
+    drawing_ids: list
+    ) -> list:
+    """
+    Read the images of the drawings of a sheet.
+
+    Args:
+        drawing_ids (list): relationship ids of the <drawing> tags of the sheet
+
+    Returns:
+        list: [(row, column, media path)], row and column are 1-based
+    """
+    sheet_rels = _read_rels(archive, sheet_path)
+    images = []
+    for drawing_id in drawing_ids:
+        drawing_path = sheet_rels.get(drawing_id)
+        if drawing_path is not None:
+            images.extend(_read_drawing_images(archive, drawing_path))
+    return images
+
+
+def read_sheet_images(excel_path: str) -> list:
+    """
+    Read where the images of the active sheet are anchored
+    and where they are stored in the xlsx package.
+    The image bytes are read on demand with iter_image_data.
+
+    Args:
+        excel_path (str): path to the excel file
+
+    Returns:
+        list: [(row, column, media path)], row and column are 1-based
+    """
+    drawing_ids = []
+    with zipfile.ZipFile(excel_path) as archive:
+        sheet_path = active_sheet_path(archive)
+        with archive.open(sheet_path) as sheet_xml:
+            for _, elem in ET.iterparse(sheet_xml):
+                if elem.tag == f"{{{MAIN_NS}}}drawing":
+                    drawing_ids.append(elem.get(f"{{{REL_NS}}}id"))
+                elif elem.tag == f"{{{MAIN_NS}}}row":
+                    # drop the parsed cells to keep the memory flat
+                    elem.clear()
+        return _read_sheet_images(archive, sheet_path, drawing_ids)
+
+
+def iter_image_data(excel_path: str, media_paths):
+    """
+    Read the bytes of images stored in the xlsx package, one at a time,
+    as they are stored, without decoding them.
+
+    Args:
+        excel_path (str): path to the excel file
+        media_paths (iterable): members of the images in the package
+
+    Yields:
+        tuple: (media path, image bytes)
+    """
+    with zipfile.ZipFile(excel_path) as archive:
+        for media_path in media_paths:
+            yield media_path, archive.read(media_path)
+
+
+def read_image_data(excel_path: str, media_path: str) -> bytes:
+    """
+    Read the bytes of an image stored in the xlsx package.
+    """
+    with zipfile.ZipFile(excel_path) as archive:
+        return archive.read(media_path)
+
+
+def read_row_count_hint(excel_path: str) -> int:
+    """
+    Read the row count of the active sheet from its dimension tag.
+    The tag is written before the cells, so only the head of the sheet is parsed.
+    The value is a hint and can be wrong if the file was not written by Excel.
+
+    Args:
+        excel_path (str): path to the excel file
+
+    Returns:
+        int: number of rows including the header, 0 if unknown
+    """
+    with zipfile.ZipFile(excel_path) as archive:
+        sheet_path = active_sheet_path(archive)
+        with archive.open(sheet_path) as sheet_xml:
+            for _, elem in ET.iterparse(sheet_xml, events=("start",)):
+                if elem.tag == f"{{{MAIN_NS}}}dimension":
+                    ref = _CELL_REF.match(elem.get("ref", "").split(":")[-1])
+                    return int(ref.group(2)) if ref else 0
+                if elem.tag == f"{{{MAIN_NS}}}sheetData":
+                    return 0
+    return 0
+
+
+def read_sheet_layout(excel_path: str) -> SheetLayout:
+    """
+    Read the layout of the active sheet without loading the cells in memory.
+    Row heights exclude the header row, like the editable loader.
+
+    Args:
+        excel_path (str): path to the excel file
+
+    Returns:
+        SheetLayout: layout of the active sheet
+    """
+    layout = SheetLayout()
+    heights = {}
+    widths = {}
+    drawing_ids = []
+
+    with zipfile.ZipFile(excel_path) as archive:
+        sheet_path = active_sheet_path(archive)
+
+        with archive.open(sheet_path) as sheet_xml:
+            row = 0
+            column = 0
+            for event, elem in ET.iterparse(sheet_xml, events=("start", "end")):
+                tag = elem.tag
+
+                if event == "start":
+                    # attributes are complete on the start tag,
+                    # children are not parsed yet
+                    if tag == f"{{{MAIN_NS}}}row":
+                        row = int(elem.get("r", row + 1))
+                        column = 0
+                        height = elem.get("ht")
+                        if height is not None:
+                            heights[row] = float(height)
+                    continue
+
+                if tag == f"{{{MAIN_NS}}}c":
+                    ref = _CELL_REF.match(elem.get("r", ""))
+                    if ref:
+                        column = column_index(ref.group(1))
+                    else:
+                        column += 1
+                    layout.max_column = max(layout.max_column, column)
+                    layout.max_row = max(layout.max_row, row)
+
+                elif tag == f"{{{MAIN_NS}}}row":
+                    # drop the parsed cells to keep the memory flat
+                    elem.clear()
+
+                elif tag == f"{{{MAIN_NS}}}col":
+                    width = elem.get("width")
+                    if width is not None:
+                        first, last = int(elem.get("min")), int(elem.get("max"))
+                        for column in range(first, last + 1):
+                            widths[column] = float(width)
+
+                elif tag == f"{{{MAIN_NS}}}drawing":
+                    drawing_ids.append(elem.get(f"{{{REL_NS}}}id"))
+
+        layout.images = _read_sheet_images(archive, sheet_path, drawing_ids)
+
+    layout.row_heights = {
+        row: heights.get(row)
+        for row in range(2, layout.max_row + 1) # Skip the header row
+    }
+    layout.column_widths = {
+        column: widths.get(column, DEFAULT_COLUMN_WIDTH)
+        for column in range(1, layout.max_column + 1)
+    }
+
+    return layout
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script patches the cells of an excel file directly in the xlsx package.
+Only the changed cells of the active sheet are rewritten.
+Every other part of the package, like the styles, images and other sheets,
+is copied as it is.
+
+A formula cell is not patched, the calculation chain and the shared
+formulas would still point at it. ValueError is raised instead,
+so the caller saves the whole table.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+from .xlsx_reader import active_sheet_path, column_index
+
+
+_SHEET_DATA = re.compile(r"<sheetData\b[^>]*?(/?)>")
+_ROW_TAG = re.compile(r"<row\b([^>]*?)(/?)>")
+_CELL = re.compile(r"<c\b([^>]*?)(?:/>|>.*?</c>)", re.DOTALL)
+_SPANS = re.compile(r'\s+spans="[^"]*"')
+_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+_CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+_DIMENSION = re.compile(r'<dimension\b[^>]*?\bref="([^"]*)"')
+_FORMULA = re.compile(r"<f\b")
+# numbers as written in <v>, python's float() accepts more, like "1_000"
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def _attributes(text: str) -> dict:
+    return dict(_ATTRIBUTE.findall(text))
+
+
+def _is_number(text: str) -> bool:
+    return _NUMBER.fullmatch(text) is not None
+
+
+def _cell_xml(ref: str, text: str, attributes: dict) -> str:
+    """
+    Build the xml of a cell, keeping the style of the original cell.
+    A numeric cell stays numeric if the new text is a number,
+    other values are written as inline strings.
+    """
+    attrs = f' r="{ref}"'
+    if "s" in attributes:
+        attrs += f' s="{attributes["s"]}"'
+
+    if text == "":
+        return f"<c{attrs}/>"
+
+    was_number = attributes and attributes.get("t", "n") == "n"
+    if was_number and _is_number(text):
+        return f"<c{attrs}><v>{text}</v></c>"
+
+    return (
+        f'<c{attrs} t="inlineStr">'
+        f'<is><t xml:space="preserve">{escape(text)}</t></is>'
+        "</c>"
+        )
+
+
+def _row_xml(row: int, cells: dict) -> str:
+    """
+    Build the xml of a new row.
+    """
+    return "<row r=\"%d\">%s</row>" % (
+        row,
+        "".join(
+            _cell_xml(f"{get_column_letter(column)}{row}", text, {})
+            for column, text in sorted(cells.items())
+            ),
+        )
+
+
+def _patch_row(row_xml: str, row: int, cells: dict) -> str:
+    """
+    Patch the cells of a row.
+
+    Args:
+        row_xml (str): xml of the row element
+        row (int): 1-based row
+        cells (dict): {1-based column: text}
+
+    Returns:
+        str: patched xml of the row
+    """
+    tag = _ROW_TAG.match(row_xml)
+    # spans is a hint of the cell range, new cells can be outside of it
+    head = "<row%s>" % _SPANS.sub("", tag.group(1))
+    tail = "</row>"
+    if tag.group(2):
+        # self-closed row without cells
+        body = ""
+    else:
+        body = row_xml[tag.end():-len("</row>")]
+
+    pending = dict(cells)
+    pieces = []
+    position = 0
+    for match in _CELL.finditer(body):
+        attributes = _attributes(match.group(1))
+        ref = _CELL_REF.match(attributes.get("r", ""))
+        if not ref:
+            raise ValueError("Cell without reference in row %d" % row)
+        column = column_index(ref.group(1))
+
+        # insert the new cells before this one, in column order
+        for new_column in sorted(c for c in pending if c < column):
+            pieces.append(body[position:match.start()])
+            position = match.start()
+            pieces.append(
+                _cell_xml(f"{get_column_letter(new_column)}{row}", pending.pop(new_column), {})
+                )
+
+        if column in pending:
+            if _FORMULA.search(match.group(0)):
+                raise ValueError("Cell %s%d holds a formula." % (ref.group(1), row))
+            pieces.append(body[position:match.start()])
+            pieces.append(
+                _cell_xml(f"{ref.group(1)}{row}", pending.pop(column), attributes)
+                )
+            position = match.end()
+
+    pieces.append(body[position:])
+    for new_column in sorted(pending):
+        pieces.append(
+            _cell_xml(f"{get_column_letter(new_column)}{row}", pending[new_column], {})
+            )
+
+    return head + "".join(pieces) + tail
+
+
+def _patch_dimension(xml: str, cells: dict) -> str:
+    """
+    Grow the <dimension> range of the worksheet to the patched cells.
+    """
+    dimension = _DIMENSION.search(xml)
+    if dimension is None or not cells:
+        return xml
+
+    rows = [row for row, _ in cells]
+    columns = [column for _, column in cells]
+    first_row, last_row = min(rows), max(rows)
+    first_column, last_column = min(columns), max(columns)
+    for ref in dimension.group(1).split(":"):
+        ref = _CELL_REF.fullmatch(ref)
+        if ref is None:
+            continue
+        row, column = int(ref.group(2)), column_index(ref.group(1))
+        first_row, last_row = min(first_row, row), max(last_row, row)
+        first_column, last_column = min(first_column, column), max(last_column, column)
+
+    first = f"{get_column_letter(first_column)}{first_row}"
+    last = f"{get_column_letter(last_column)}{last_row}"
+    ref = first if first == last else f"{first}:{last}"
+    return xml[:dimension.start(1)] + ref + xml[dimension.end(1):]
+
+
+def patch_sheet_xml(xml: str, cells: dict) -> str:
+    """
+    Patch the cells of a worksheet xml.
+
+    Args:
+        xml (str): xml of the worksheet
+        cells (dict): {(1-based row, 1-based column): text}
+
+    Returns:
+        str: patched xml of the worksheet
+    """
+    cells_by_row = {}
+    for (row, column), text in cells.items():
+        cells_by_row.setdefault(row, {})[column] = text
+    rows = sorted(cells_by_row)
+    xml = _patch_dimension(xml, cells)
+
+    sheet_data = _SHEET_DATA.search(xml)
+    if sheet_data is None:
+        raise ValueError("No sheetData in the worksheet.")
+    if sheet_data.group(1):
+        # empty sheet, <sheetData/>
+        return (
+            xml[:sheet_data.start()]
+            + "<sheetData>"
+            + "".join(_row_xml(row, cells_by_row[row]) for row in rows)
+            + "</sheetData>"
+            + xml[sheet_data.end():]
+            )
+    data_end = xml.index("</sheetData>", sheet_data.end())
+
+    pieces = []
+    position = sheet_data.end()
+    i = 0
+    for match in _ROW_TAG.finditer(xml, sheet_data.end(), data_end):
+        if i == len(rows):
+            break
+
+        ref = _attributes(match.group(1)).get("r")
+        if ref is None:
+            raise ValueError("Row without reference in the worksheet.")
+        row = int(ref)
+
+        # insert the new rows before this one, in row order
+        while i < len(rows) and rows[i] < row:
+            pieces.append(xml[position:match.start()])
+            position = match.start()
+            pieces.append(_row_xml(rows[i], cells_by_row[rows[i]]))
+            i += 1
+
+        if match.group(2):
+            row_end = match.end()
+        else:
+            row_end = xml.index("</row>", match.end()) + len("</row>")
+
+        if i < len(rows) and rows[i] == row:
+            pieces.append(xml[position:match.start()])
+            pieces.append(_patch_row(xml[match.start():row_end], row, cells_by_row[row]))
+            position = row_end
+            i += 1
+
+    pieces.append(xml[position:data_end])
+    for row in rows[i:]:
+        pieces.append(_row_xml(row, cells_by_row[row]))
+
+    return xml[:sheet_data.end()] + "".join(pieces) + xml[data_end:]
+
+
+def patch_cells(excel_path: str, save_path: str, cells: dict) -> None:
+    """
+    Write the changed cells of the active sheet to a copy of the excel file.
+    The other parts of the package are copied unchanged.
+    The save path must differ from the excel path, the caller writes to
+    a temporary file and moves it into place.
+
+    Args:
+        excel_path (str): path to the source excel file
+        save_path (str): path to write the patched excel file
+        cells (dict): {(1-based row, 1-based column): text}
+    """
+    with zipfile.ZipFile(excel_path) as source:
+        sheet_path = active_sheet_path(source)
+        xml = source.read(sheet_path).decode("utf-8")
+        patched_xml = patch_sheet_xml(xml, cells).encode("utf-8")
+
+        with zipfile.ZipFile(save_path, "w") as target:
+            for info in source.infolist():
+                if info.filename == sheet_path:
+                    target.writestr(info, patched_xml)
+                else:
+                    target.writestr(info, source.read(info.filename))
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script sets up the tests of the app modules.
+
+The app package is registered without running its __init__,
+which imports the dialog and needs the Qt of a running engine.
+The modules that don't use Qt can be imported from it.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import sys
+import types
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "python", "app")
+
+if "app" not in sys.modules:
+    package = types.ModuleType("app")
+    package.__path__ = [APP_DIR]
+    sys.modules["app"] = package
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the farm backend with the local stand-in of the farm queue.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import os
+import sys
+import time
+
+import pytest
+
+# the app modules log through sgtk
+pytest.importorskip("sgtk")
+
+from app.farm_backend import DONE, PENDING, RUNNING, FarmBackend, LocalFarmQueue
+from app.job_scheduler import Job, JobScheduler
+
+
+def python_job(name: str, code: str, priority: int = 0) -> Job:
+    return Job(name, [sys.executable, "-c", code], priority)
+
+
+def queue_files(queue_dir: str) -> list:
+    return [
+        name
+        for state in (PENDING, RUNNING, DONE)
+        for name in os.listdir(os.path.join(queue_dir, state))
+        ]
+
+
+def test_jobs_run_on_the_queue(tmp_path):
+    queue_dir = str(tmp_path)
+    backend = FarmBackend(queue_dir)
+    node = LocalFarmQueue(queue_dir, max_parallel=2, poll_interval=0.05)
+    jobs = [
+        python_job("ok", "pass"),
+        python_job("fail", "raise SystemExit(3)"),
+        python_job("first", "pass", priority=10),
+        ]
+
+    node.start()
+    try:
+        finished = JobScheduler(backend, 0.05).run(jobs)
+    finally:
+        node.stop()
+
+    return_codes = {job.name: job.return_code for job in finished}
+    assert return_codes == {"ok": 0, "fail": 3, "first": 0}
+    assert all(job.start_time and job.end_time for job in finished)
+    assert queue_files(queue_dir) == []
+
+
+def test_unclaimed_job_times_out(tmp_path):
+    queue_dir = str(tmp_path)
+    backend = FarmBackend(queue_dir, pending_timeout=0.1)
+    job = python_job("lost", "pass")
+
+    # no node takes the job
+    finished = JobScheduler(backend, 0.05).run([job])
+
+    assert finished == [job]
+    assert not job.succeeded
+    assert "picked up" in job.error
+    assert queue_files(queue_dir) == []
+
+
+def test_job_without_heartbeat_times_out(tmp_path):
+    queue_dir = str(tmp_path)
+    backend = FarmBackend(queue_dir, heartbeat_timeout=0.2)
+    node = LocalFarmQueue(queue_dir, poll_interval=0.05)
+    job = python_job("stuck", "import time; time.sleep(30)")
+    backend.submit(job)
+
+    # the node claims the job, then stops sending heartbeats like a dead node
+    node.process()
+    assert os.path.exists(os.path.join(queue_dir, RUNNING, job.job_id + ".json"))
+    deadline = time.time() + 5
+    finished = []
+    while not finished and time.time() < deadline:
+        finished = backend.poll()
+        time.sleep(0.05)
+
+    assert finished == [job]
+    assert "heartbeat" in job.error
+    assert queue_files(queue_dir) == []
+
+    # the node drops the result of a job taken back by the submitter
+    for process, _ in node._backend._running:
+        process.kill()
+    while node._running:
+        node.process()
+        time.sleep(0.05)
+    assert queue_files(queue_dir) == []
+
+
+def test_heartbeat_keeps_a_long_job_alive(tmp_path):
+    queue_dir = str(tmp_path)
+    backend = FarmBackend(queue_dir, heartbeat_timeout=0.3)
+    node = LocalFarmQueue(queue_dir, poll_interval=0.05)
+    job = python_job("long", "import time; time.sleep(1)")
+
+    node.start()
+    try:
+        finished = JobScheduler(backend, 0.05).run([job])
+    finally:
+        node.stop()
+
+    assert finished == [job]
+    assert job.succeeded, job.error
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the job scheduler with the local backend.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import sys
+import time
+import threading
+
+import pytest
+
+# the app modules log through sgtk
+pytest.importorskip("sgtk")
+
+from app.job_scheduler import Job, JobScheduler, LocalBackend
+
+
+def python_job(name: str, code: str, priority: int = 0) -> Job:
+    return Job(name, [sys.executable, "-c", code], priority)
+
+
+def test_jobs_run_with_their_exit_codes():
+    jobs = [
+        python_job("ok", "pass"),
+        python_job("fail", "raise SystemExit(2)"),
+        ]
+    reported = []
+    polls = []
+
+    finished = JobScheduler(LocalBackend(2), 0.01).run(
+        jobs, on_finished=reported.append, on_poll=lambda: polls.append(1)
+        )
+
+    assert sorted(job.name for job in finished) == ["fail", "ok"]
+    assert reported == finished
+    assert polls
+    assert {job.name: job.return_code for job in jobs} == {"ok": 0, "fail": 2}
+    assert [job.succeeded for job in jobs] == [True, False]
+    assert all(job.elapsed >= 0 for job in jobs)
+
+
+def test_jobs_start_in_priority_order(tmp_path):
+    log_path = tmp_path / "order.txt"
+    code = "import sys; open(sys.argv[1], 'a').write(sys.argv[2] + '\\n')"
+    jobs = [
+        Job(name, [sys.executable, "-c", code, str(log_path), name], priority)
+        for name, priority in [("low", 0), ("high", 10), ("middle", 5), ("low2", 0)]
+        ]
+
+    JobScheduler(LocalBackend(1), 0.01).run(jobs)
+
+    # one job at a time, the submission order breaks the ties
+    assert log_path.read_text().split() == ["high", "middle", "low", "low2"]
+
+
+def test_parallel_jobs_are_limited(tmp_path):
+    code = (
+        "import os, sys, time\n"
+        "path = os.path.join(sys.argv[1], sys.argv[2])\n"
+        "open(path, 'w').close()\n"
+        "running = len(os.listdir(sys.argv[1]))\n"
+        "time.sleep(0.2)\n"
+        "os.remove(path)\n"
+        "raise SystemExit(running)\n"
+        )
+    jobs = [
+        Job(str(i), [sys.executable, "-c", code, str(tmp_path), str(i)])
+        for i in range(4)
+        ]
+
+    JobScheduler(LocalBackend(2), 0.01).run(jobs)
+
+    # the exit code is the number of jobs running when it started
+    assert all(1 <= job.return_code <= 2 for job in jobs)
+
+
+def test_missing_executable_fails_the_job():
+    job = Job("missing", ["/nonexistent/nuke", "-t", "script.py"])
+
+    finished = JobScheduler(LocalBackend(1), 0.01).run([job])
+
+    assert finished == [job]
+    assert not job.succeeded
+    assert job.error
+
+
+def test_cancel_stops_waiting():
+    canceled = threading.Event()
+    jobs = [
+        python_job("quick", "pass", priority=1),
+        python_job("slow", "import time; time.sleep(5)"),
+        ]
+
+    def job_finished(job):
+        canceled.set()
+
+    backend = LocalBackend(2)
+    start = time.time()
+    finished = JobScheduler(backend, 0.01).run(
+        jobs, on_finished=job_finished, canceled=canceled
+        )
+
+    assert [job.name for job in finished] == ["quick"]
+    assert time.time() - start < 4
+
+    # the job left to the backend keeps running
+    assert jobs[1].return_code is None
+    for process, _ in backend._running:
+        process.kill()
+        process.wait()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the on-disk journal of the publishes.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import json
+
+import pytest
+
+# the app modules log through sgtk
+pytest.importorskip("sgtk")
+
+from app.publish_journal import PublishJournal, UPLOAD_FINISHED
+
+
+def read_records(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_an_interrupted_publish(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = PublishJournal(path)
+    journal.versions_created({"shot_v001": 10, "shot_v002": 11})
+    journal.upload_started("shot_v001", "/movies/shot_v001.mov", [100, 1])
+    journal.upload_finished("shot_v001", "/movies/shot_v001.mov", [100, 1])
+    journal.upload_started("shot_v002", "/movies/shot_v002.mov", [200, 2])
+
+    journal = PublishJournal(path)
+
+    assert journal.version_id("shot_v001") == 10
+    assert journal.is_uploaded("shot_v001", [100, 1])
+    # a movie rendered again is uploaded again
+    assert not journal.is_uploaded("shot_v001", [100, 2])
+    assert journal.is_upload_started("shot_v002")
+
+
+def test_retired_codes_are_forgotten(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = PublishJournal(path)
+    journal.versions_created({"shot_v001": 10})
+    journal.upload_finished("shot_v001", "/movies/shot_v001.mov", [100, 1])
+    journal.retire(["shot_v001", "unknown"])
+
+    journal = PublishJournal(path)
+
+    assert journal.version_id("shot_v001") is None
+    assert not journal.is_uploaded("shot_v001")
+
+
+def test_compaction_keeps_the_record_schema(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = PublishJournal(path)
+    journal.versions_created({"shot_v001": 10})
+    # enough steps to compact the journal when it's loaded again
+    for _ in range(60):
+        journal.upload_started("shot_v001", "/movies/shot_v001.mov", [100, 1])
+        journal.upload_finished("shot_v001", "/movies/shot_v001.mov", [100, 1])
+
+    journal = PublishJournal(path)
+
+    records = read_records(path)
+    assert [record["step"] for record in records] == ["created", UPLOAD_FINISHED]
+    assert records[1] == {
+        "code": "shot_v001",
+        "step": UPLOAD_FINISHED,
+        "path": "/movies/shot_v001.mov",
+        "movie": [100, 1],
+    }
+    assert journal.is_uploaded("shot_v001", [100, 1])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the parser of the 'Version' codes.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import pytest
+
+from app.version_code import VersionCode, index_version_codes, parse_version_code
+
+
+def test_parse_well_formed_code():
+    version_code = parse_version_code("seq001_shot001_sRGB_org_v003")
+
+    assert isinstance(version_code, VersionCode)
+    assert version_code.seq == "seq001"
+    assert version_code.shot == "shot001"
+    assert version_code.colorspace == "sRGB"
+    assert version_code.type == "org"
+    assert version_code.number == 3
+    assert version_code.seq_shot_name == "seq001_shot001"
+    assert version_code.key == ("seq001_shot001", "sRGB", "org")
+
+
+def test_parse_ignores_the_tokens_before_the_version():
+    version_code = parse_version_code("seq001_shot001_ACEScg_src_retime_v012")
+
+    assert version_code.key == ("seq001_shot001", "ACEScg", "src")
+    assert version_code.number == 12
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "",
+        "seq001_shot001_sRGB_org",
+        "seq001_shot001_sRGB_v001",
+        "seq001_shot001_sRGB_org_v",
+        "seq001_shot001_sRGB_org_vabc",
+        "seq001_shot001_sRGB_org_v001.mov",
+        "seq001__sRGB_org_v001",
+    ]
+    )
+def test_parse_malformed_code(code):
+    assert parse_version_code(code) is None
+
+
+def test_version_code_has_no_dict():
+    version_code = parse_version_code("seq001_shot001_sRGB_org_v001")
+
+    with pytest.raises(AttributeError):
+        version_code.extra = True
+
+
+def test_index_keeps_the_latest_version():
+    latest_versions, malformed = index_version_codes([
+        "seq001_shot001_sRGB_org_v001",
+        "seq001_shot001_sRGB_org_v003",
+        "seq001_shot001_sRGB_org_v002",
+        "seq001_shot001_ACEScg_org_v001",
+        "seq001_shot002_sRGB_src_v010",
+        "malformed",
+        None,
+    ])
+
+    assert latest_versions == {
+        ("seq001_shot001", "sRGB", "org"): 3,
+        ("seq001_shot001", "ACEScg", "org"): 1,
+        ("seq001_shot002", "sRGB", "src"): 10,
+    }
+    assert malformed == ["malformed", None]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the image references read from the xlsx packages.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import io
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+Image = pytest.importorskip("PIL.Image")
+
+from app.xlsx_reader import iter_image_data, read_image_data, read_sheet_images
+
+
+def png_bytes(color: tuple) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def images():
+    return {(1, 1): png_bytes((255, 0, 0)), (3, 2): png_bytes((0, 0, 255))}
+
+
+@pytest.fixture
+def excel_path(tmp_path, images):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.append(["thumbnail", "shot_name"])
+    sheet.append([None, "seq001_shot001"])
+    sheet.append([None, "seq001_shot002"])
+    for (row, column), data in images.items():
+        img = openpyxl.drawing.image.Image(io.BytesIO(data))
+        img.anchor = "%s%d" % (openpyxl.utils.get_column_letter(column), row)
+        sheet.add_image(img)
+    path = str(tmp_path / "source.xlsx")
+    wb.save(path)
+    return path
+
+
+def test_read_sheet_images_keeps_references(excel_path, images):
+    refs = read_sheet_images(excel_path)
+
+    assert sorted((row, column) for row, column, _ in refs) == sorted(images)
+    for row, column, media_path in refs:
+        assert isinstance(media_path, str)
+        assert read_image_data(excel_path, media_path) == images[(row, column)]
+
+
+def test_iter_image_data_in_requested_order(excel_path, images):
+    refs = read_sheet_images(excel_path)
+    media_paths = [media_path for _, _, media_path in reversed(refs)]
+
+    data = list(iter_image_data(excel_path, media_paths))
+
+    assert [media_path for media_path, _ in data] == media_paths
+    assert [image for _, image in data] == [
+        images[(row, column)] for row, column, _ in reversed(refs)
+        ]
+
+
+def test_read_missing_image(excel_path):
+    with pytest.raises(KeyError):
+        read_image_data(excel_path, "xl/media/missing.png")
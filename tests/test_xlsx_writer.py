@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script tests the cell patcher of the xlsx packages, round trip with openpyxl.
+"""
+
+__author__ = "Juno Park"
+__github__ = "https://github.com/junopark00"
+
+
+import re
+import zipfile
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from app.xlsx_reader import active_sheet_path, read_row_count_hint
+from app.xlsx_writer import patch_cells
+
+
+@pytest.fixture
+def excel_path(tmp_path):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "Data"
+    sheet.append(["shot_name", "type", "version", "duration"])
+    sheet.append(["seq001_shot001", "org", 1, 10])
+    sheet.append(["seq001_shot002", "src", 2, 20])
+    sheet["E2"] = "=D2*2"
+    other = wb.create_sheet("Other")
+    other["A1"] = "untouched"
+    path = str(tmp_path / "source.xlsx")
+    wb.save(path)
+    return path
+
+
+def patch(excel_path: str, tmp_path, cells: dict):
+    save_path = str(tmp_path / "patched.xlsx")
+    patch_cells(excel_path, save_path, cells)
+    return save_path, openpyxl.load_workbook(save_path)
+
+
+def sheet_xml(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(active_sheet_path(archive)).decode("utf-8")
+
+
+def test_patch_existing_cells(excel_path, tmp_path):
+    _, wb = patch(excel_path, tmp_path, {(2, 2): "src", (3, 3): "5"})
+    sheet = wb["Data"]
+
+    assert sheet["B2"].value == "src"
+    # a numeric cell stays numeric
+    assert sheet["C3"].value == 5
+    assert sheet["A2"].value == "seq001_shot001"
+    assert sheet["C2"].value == 1
+
+
+def test_insert_rows_and_columns(excel_path, tmp_path):
+    save_path, wb = patch(
+        excel_path,
+        tmp_path,
+        {(2, 7): "note", (6, 1): "seq001_shot006", (6, 3): "1", (1, 7): "memo"}
+        )
+    sheet = wb["Data"]
+
+    assert sheet["G1"].value == "memo"
+    assert sheet["G2"].value == "note"
+    assert sheet["A6"].value == "seq001_shot006"
+    # a new cell is written as text
+    assert sheet["C6"].value == "1"
+    assert sheet["A3"].value == "seq001_shot002"
+
+    # the dimension covers the new cells
+    assert re.search(r'<dimension ref="A1:G6"', sheet_xml(save_path))
+    assert read_row_count_hint(save_path) == 6
+
+
+def test_escaping(excel_path, tmp_path):
+    texts = {
+        (2, 1): "<shot> & \"quoted\" 'name'",
+        (2, 3): "1_000",
+        (2, 4): " 12 ",
+        (3, 1): "line\nbreak",
+    }
+    _, wb = patch(excel_path, tmp_path, texts)
+    sheet = wb["Data"]
+
+    for (row, column), text in texts.items():
+        assert sheet.cell(row, column).value == text
+
+
+def test_formula_cell_is_not_patched(excel_path, tmp_path):
+    with pytest.raises(ValueError):
+        patch(excel_path, tmp_path, {(2, 5): "20"})
+
+
+def test_cells_around_a_formula_are_patched(excel_path, tmp_path):
+    _, wb = patch(excel_path, tmp_path, {(2, 4): "30", (2, 6): "after"})
+    sheet = wb["Data"]
+
+    assert sheet["D2"].value == 30
+    assert sheet["E2"].value == "=D2*2"
+    assert sheet["F2"].value == "after"
+
+
+def test_other_parts_are_untouched(excel_path, tmp_path):
+    save_path, wb = patch(excel_path, tmp_path, {(2, 2): "src"})
+
+    assert wb["Other"]["A1"].value == "untouched"
+    with zipfile.ZipFile(excel_path) as source, zipfile.ZipFile(save_path) as target:
+        sheet_path = active_sheet_path(source)
+        assert source.namelist() == target.namelist()
+        for name in source.namelist():
+            if name != sheet_path:
+                assert source.read(name) == target.read(name), name